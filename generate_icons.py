@@ -1,22 +1,37 @@
-from PIL import Image
 import os
+import sys
 
-# Create build/web/icons directory if it doesn't exist
-os.makedirs('build/web/icons', exist_ok=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+import data_paths
+import pipeline_profile
 
-# Load the Church-Link logo
-img = Image.open("assets/Enhanced app icon fo.png").convert("RGBA")
 
-# Resize to 192x192
-icon_192 = img.resize((192, 192), Image.Resampling.LANCZOS)
-icon_192.save('build/web/icons/Icon-192.png')
+def main():
+    from PIL import Image
 
-# Resize to 512x512
-icon_512 = img.resize((512, 512), Image.Resampling.LANCZOS)
-icon_512.save('build/web/icons/Icon-512.png')
+    # Create build/web/icons directory if it doesn't exist
+    icons_dir = os.path.join(data_paths.WEB_BUILD_DIR, 'icons')
+    os.makedirs(icons_dir, exist_ok=True)
 
-# For maskable, use the same resized images (simplified)
-icon_192.save('build/web/icons/Icon-maskable-192.png')
-icon_512.save('build/web/icons/Icon-maskable-512.png')
+    # Load the Church-Link logo
+    with pipeline_profile.stage("load"):
+        img = Image.open(data_paths.APP_ICON).convert("RGBA")
 
-print("Church-Link icons generated successfully!")
\ No newline at end of file
+    with pipeline_profile.stage("resize"):
+        # Resize to 192x192
+        icon_192 = img.resize((192, 192), Image.Resampling.LANCZOS)
+        icon_192.save(os.path.join(icons_dir, 'Icon-192.png'))
+
+        # Resize to 512x512
+        icon_512 = img.resize((512, 512), Image.Resampling.LANCZOS)
+        icon_512.save(os.path.join(icons_dir, 'Icon-512.png'))
+
+        # For maskable, use the same resized images (simplified)
+        icon_192.save(os.path.join(icons_dir, 'Icon-maskable-192.png'))
+        icon_512.save(os.path.join(icons_dir, 'Icon-maskable-512.png'))
+
+    print("Church-Link icons generated successfully!")
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "generate_icons")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Canonical book order and verse ordinals shared by the index builders
+
+A verse ordinal is the position of a verse in the canonical stream of a
+translation: books in canonical order, chapters in numeric order and verses in
+the order they appear in the asset. Ordinals are therefore only comparable
+between indexes built from the same translation build.
+"""
+
+import re
+from bisect import bisect_left
+
+from complete_bible_fix import BIBLE_STRUCTURE
+from packed_arrays import typed_array
+
+BOOKS = list(BIBLE_STRUCTURE)
+BOOK_INDEX = {name: index for index, name in enumerate(BOOKS)}
+
+# Alternative spellings used by reading plans and cross references
+BOOK_ALIASES = {
+    "Psalm": "Psalms",
+    "Song of Songs": "Song of Solomon",
+    "Revelations": "Revelation",
+}
+
+REFERENCE_RE = re.compile(r"^\s*(.+?)\s+(\d+)(?::(\d+))?\s*$")
+# "John 1:1-3", "Genesis 1-3", "Luke 1:1-2:5", "Psalm 23"
+PASSAGE_RE = re.compile(r"^\s*(.+?)\s+(\d+)(?::(\d+))?(?:\s*[-\u2013]\s*(\d+)(?::(\d+))?)?\s*$")
+
+
+def book_index(book_name):
+    """Return the canonical index of a book name or alias, or None"""
+    return BOOK_INDEX.get(BOOK_ALIASES.get(book_name, book_name))
+
+
+def testament(book_name):
+    """Return the testament of a book"""
+    return BIBLE_STRUCTURE[BOOKS[book_index(book_name)]]["testament"]
+
+
+def iter_book_chapters(bible_data):
+    """Yield (book_index, chapter_number, verses) in canonical order from either layout"""
+    books = bible_data.get("books", {})
+    if isinstance(books, dict):
+        by_name = books
+    else:
+        by_name = {}
+        for book_data in books:
+            chapters = {}
+            for index, chapter in enumerate(book_data.get("chapters", []), 1):
+                if isinstance(chapter, dict):
+                    chapters[str(chapter.get("number", index))] = chapter.get("verses", [])
+                else:
+                    chapters[str(index)] = chapter
+            by_name[book_data["name"]] = {"chapters": chapters}
+
+    ordered = sorted(
+        (book_index(name), name) for name in by_name if book_index(name) is not None
+    )
+    for index, name in ordered:
+        chapters = by_name[name].get("chapters", {})
+        for chapter_key in sorted(chapters, key=int):
+            yield index, int(chapter_key), chapters[chapter_key]
+
+
+def iter_verses(bible_data):
+    """Yield (ordinal, book_index, chapter, verse, text) for every verse in canonical order"""
+    ordinal = 0
+    for index, chapter, verses in iter_book_chapters(bible_data):
+        for verse_number, text in enumerate(verses, 1):
+            yield ordinal, index, chapter, verse_number, text
+            ordinal += 1
+
+
+def format_reference(book_idx, chapter, verse=None):
+    """Format a reference such as "John 3:16" from a book index"""
+    if verse is None:
+        return f"{BOOKS[book_idx]} {chapter}"
+    return f"{BOOKS[book_idx]} {chapter}:{verse}"
+
+
+def new_verse_table():
+    """Return empty ordinal -> (book, chapter, verse) arrays for an index file"""
+    return {
+        "verse_book": typed_array('B'),
+        "verse_chapter": typed_array('H'),
+        "verse_number": typed_array('H'),
+    }
+
+
+def add_verse(table, book_idx, chapter, verse):
+    """Append one verse to a table from new_verse_table()"""
+    table["verse_book"].append(book_idx)
+    table["verse_chapter"].append(chapter)
+    table["verse_number"].append(verse)
+
+
+def verse_reference(packed, ordinal):
+    """Format the reference of a verse ordinal stored in a packed index file"""
+    return format_reference(
+        packed.array("verse_book")[ordinal],
+        packed.array("verse_chapter")[ordinal],
+        packed.array("verse_number")[ordinal],
+    )
+
+
+def parse_reference(reference):
+    """Parse "John 3:16" or "Psalm 23" into (book_index, chapter, verse or None)"""
+    match = REFERENCE_RE.match(reference)
+    if not match:
+        raise ValueError(f"Invalid reference: {reference!r}")
+    index = book_index(match.group(1).strip())
+    if index is None:
+        raise ValueError(f"Unknown book in reference: {reference!r}")
+    verse = int(match.group(3)) if match.group(3) else None
+    return index, int(match.group(2)), verse
+
+
+def parse_passage(reference):
+    """Parse a reference or range into (book_index, start_chapter, start_verse, end_chapter, end_verse)
+
+    Verses are None when the passage covers whole chapters, so "Genesis 1-3"
+    is (0, 1, None, 3, None) and "John 1:1-3" is (42, 1, 1, 1, 3).
+    """
+    match = PASSAGE_RE.match(reference)
+    if not match:
+        raise ValueError(f"Invalid passage: {reference!r}")
+    index = book_index(match.group(1).strip())
+    if index is None:
+        raise ValueError(f"Unknown book in passage: {reference!r}")
+
+    start_chapter = int(match.group(2))
+    start_verse = int(match.group(3)) if match.group(3) else None
+    end_chapter, end_verse = start_chapter, start_verse
+    if match.group(4):
+        if match.group(5):
+            end_chapter, end_verse = int(match.group(4)), int(match.group(5))
+        elif start_verse is not None:
+            end_verse = int(match.group(4))
+        else:
+            end_chapter = int(match.group(4))
+    if (end_chapter, end_verse or 0) < (start_chapter, start_verse or 0):
+        raise ValueError(f"Passage runs backwards: {reference!r}")
+    return index, start_chapter, start_verse, end_chapter, end_verse
+
+
+class _VerseKeys:
+    """Sequence of (book, chapter, verse) keys over a packed verse table"""
+
+    def __init__(self, packed):
+        self.books = packed.array("verse_book")
+        self.chapters = packed.array("verse_chapter")
+        self.verses = packed.array("verse_number")
+
+    def __len__(self):
+        return len(self.books)
+
+    def __getitem__(self, ordinal):
+        return self.books[ordinal], self.chapters[ordinal], self.verses[ordinal]
+
+
+def verse_ordinal(packed, book_idx, chapter, verse=1):
+    """Binary search a packed verse table for a verse; return its ordinal or -1"""
+    keys = _VerseKeys(packed)
+    key = (book_idx, chapter, verse)
+    ordinal = bisect_left(keys, key)
+    if ordinal < len(keys) and keys[ordinal] == key:
+        return ordinal
+    return -1
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Script to build and apply chapter-level delta bundles between two Bible asset builds
+
+Usage:
+    python bible_delta.py manifest ../assets/bible_kjv.json -o kjv_manifest.json
+    python bible_delta.py diff old/bible_kjv.json ../assets/bible_kjv.json -o kjv_delta.json --translation KJV
+    python bible_delta.py apply old/bible_kjv.json kjv_delta.json -o bible_kjv.json
+    python bible_delta.py keygen -o delta_signing_key.pem
+
+Bundles are signed with Ed25519. The private key stays with the pipeline: the
+CHURCHLINK_DELTA_KEY environment variable holds it as PEM text or the path of
+a PEM file. The app only needs the public key (../assets/delta_public_key.pem
+by default), which can verify bundles but not create them.
+
+Requires the cryptography package for diff, apply and keygen.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+
+import data_paths
+import pipeline_profile
+
+DELTA_FORMAT = 2
+KEY_ENV_VAR = "CHURCHLINK_DELTA_KEY"
+PUBLIC_KEY_FILE = "delta_public_key.pem"
+
+
+def load_json_file(filepath):
+    """Load JSON file safely"""
+    try:
+        with open(filepath, 'r', encoding='utf-8-sig') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading {filepath}: {e}")
+        return None
+
+
+def save_json_file(filepath, data, compact=False):
+    """Save JSON file safely"""
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            if compact:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            else:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        print(f"Successfully saved {filepath}")
+        return True
+    except Exception as e:
+        print(f"Error saving {filepath}: {e}")
+        return False
+
+
+def canonical_json(data):
+    """Serialize data deterministically for hashing and signing"""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def chapter_digest(verses):
+    """Return the SHA-256 hex digest of a chapter's verse list"""
+    return hashlib.sha256(canonical_json(verses)).hexdigest()
+
+
+def iter_chapters(bible_data):
+    """Yield (book, testament, chapter_key, verses) from either Bible layout"""
+    books = bible_data.get("books", {})
+    if isinstance(books, dict):
+        for book_name, book_data in books.items():
+            for chapter_key, verses in book_data.get("chapters", {}).items():
+                yield book_name, book_data.get("testament"), str(chapter_key), verses
+    else:
+        for book_data in books:
+            for index, chapter in enumerate(book_data.get("chapters", []), 1):
+                if isinstance(chapter, dict):
+                    yield book_data["name"], book_data.get("testament"), str(chapter.get("number", index)), chapter.get("verses", [])
+                else:
+                    yield book_data["name"], book_data.get("testament"), str(index), chapter
+
+
+def build_manifest(bible_data):
+    """Map every book and chapter of a build to its content digest"""
+    manifest = {}
+    for book_name, testament, chapter_key, verses in iter_chapters(bible_data):
+        book_entry = manifest.setdefault(book_name, {"testament": testament, "chapters": {}})
+        book_entry["chapters"][chapter_key] = chapter_digest(verses)
+    return manifest
+
+
+def manifest_version(manifest):
+    """Return a single version digest summarising a manifest"""
+    return hashlib.sha256(canonical_json(manifest)).hexdigest()
+
+
+def diff_builds(old_data, new_data):
+    """Compare two builds chapter by chapter and return (changed, removed)"""
+    old_manifest = build_manifest(old_data)
+    changed = []
+    seen = set()
+
+    for book_name, testament, chapter_key, verses in iter_chapters(new_data):
+        seen.add((book_name, chapter_key))
+        old_book = old_manifest.get(book_name)
+        old_digest = old_book["chapters"].get(chapter_key) if old_book else None
+        digest = chapter_digest(verses)
+        if old_digest != digest or old_book["testament"] != testament:
+            changed.append({
+                "book": book_name,
+                "testament": testament,
+                "chapter": chapter_key,
+                "sha256": digest,
+                "verses": verses,
+            })
+
+    removed = []
+    for book_name, book_entry in old_manifest.items():
+        for chapter_key in book_entry["chapters"]:
+            if (book_name, chapter_key) not in seen:
+                removed.append({"book": book_name, "chapter": chapter_key})
+
+    return changed, removed
+
+
+def _unsigned_content(bundle):
+    """Return the bytes a bundle's signature covers"""
+    return canonical_json({k: v for k, v in bundle.items() if k != "signature"})
+
+
+def sign_bundle(bundle, private_key):
+    """Return the base64 Ed25519 signature of a bundle's unsigned content"""
+    return base64.b64encode(private_key.sign(_unsigned_content(bundle))).decode('ascii')
+
+
+def verify_signature(bundle, public_key):
+    """Check a bundle's signature against the public key"""
+    from cryptography.exceptions import InvalidSignature
+
+    signature = bundle.get("signature")
+    if not signature:
+        return False
+    try:
+        public_key.verify(base64.b64decode(signature, validate=True), _unsigned_content(bundle))
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+
+def create_delta(old_data, new_data, private_key, translation=None):
+    """Create a signed delta bundle that turns old_data into new_data"""
+    changed, removed = diff_builds(old_data, new_data)
+    bundle = {
+        "format": DELTA_FORMAT,
+        "translation": translation,
+        "base_version": manifest_version(build_manifest(old_data)),
+        "target_version": manifest_version(build_manifest(new_data)),
+        "changes": changed,
+        "removed": removed,
+    }
+    bundle["signature"] = sign_bundle(bundle, private_key)
+    return bundle
+
+
+def to_object_layout(bible_data):
+    """Return a copy of bible_data in the {"books": {name: {"chapters": {...}}}} layout"""
+    result = {"books": {}}
+    for book_name, testament, chapter_key, verses in iter_chapters(bible_data):
+        book_entry = result["books"].setdefault(book_name, {"testament": testament, "chapters": {}})
+        book_entry["chapters"][chapter_key] = list(verses)
+    return result
+
+
+def apply_delta(bible_data, bundle, public_key):
+    """Apply a verified delta bundle and return the patched build in object layout"""
+    if bundle.get("format") != DELTA_FORMAT:
+        raise ValueError(f"Unsupported delta format: {bundle.get('format')}")
+    if not verify_signature(bundle, public_key):
+        raise ValueError("Delta signature does not match")
+
+    base_version = manifest_version(build_manifest(bible_data))
+    if base_version != bundle["base_version"]:
+        raise ValueError(f"Delta expects base {bundle['base_version'][:12]}, found {base_version[:12]}")
+
+    patched = to_object_layout(bible_data)
+    books = patched["books"]
+
+    for entry in bundle["removed"]:
+        book_entry = books.get(entry["book"])
+        if book_entry:
+            book_entry["chapters"].pop(entry["chapter"], None)
+            if not book_entry["chapters"]:
+                del books[entry["book"]]
+
+    for entry in bundle["changes"]:
+        if chapter_digest(entry["verses"]) != entry["sha256"]:
+            raise ValueError(f"Chapter digest mismatch for {entry['book']} {entry['chapter']}")
+        book_entry = books.setdefault(entry["book"], {"testament": entry["testament"], "chapters": {}})
+        book_entry["testament"] = entry["testament"]
+        book_entry["chapters"][entry["chapter"]] = entry["verses"]
+
+    target_version = manifest_version(build_manifest(patched))
+    if target_version != bundle["target_version"]:
+        raise ValueError(f"Patched build {target_version[:12]} does not match target {bundle['target_version'][:12]}")
+
+    return patched
+
+
+def generate_signing_key():
+    """Return a new Ed25519 key pair as (private PEM, public PEM) bytes"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    private_key = Ed25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                            serialization.NoEncryption())
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_pem, public_pem
+
+
+def get_signing_key():
+    """Read the bundle signing (private) key from the environment"""
+    value = os.environ.get(KEY_ENV_VAR)
+    if not value:
+        print(f"Error: set {KEY_ENV_VAR} to the Ed25519 private key (PEM text or file) to sign delta bundles")
+        return None
+    try:
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+    except ImportError:
+        print("Error: cryptography is required (pip install cryptography)")
+        return None
+    try:
+        if value.lstrip().startswith("-----BEGIN"):
+            pem = value.encode('utf-8')
+        else:
+            with open(value, 'rb') as f:
+                pem = f.read()
+        key = load_pem_private_key(pem, password=None)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error loading the signing key from {KEY_ENV_VAR}: {e}")
+        return None
+    if not isinstance(key, Ed25519PrivateKey):
+        print(f"Error: {KEY_ENV_VAR} is not an Ed25519 private key")
+        return None
+    return key
+
+
+def get_verify_key(path=None):
+    """Read the bundle verification (public) key, by default the one shipped in the assets"""
+    path = path or data_paths.asset_path(PUBLIC_KEY_FILE)
+    try:
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+        from cryptography.hazmat.primitives.serialization import load_pem_public_key
+    except ImportError:
+        print("Error: cryptography is required (pip install cryptography)")
+        return None
+    try:
+        with open(path, 'rb') as f:
+            key = load_pem_public_key(f.read())
+    except (OSError, ValueError) as e:
+        print(f"Error loading the public key {path}: {e}")
+        return None
+    if not isinstance(key, Ed25519PublicKey):
+        print(f"Error: {path} is not an Ed25519 public key")
+        return None
+    return key
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chapter-level delta bundles for Bible assets")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    manifest_parser = subparsers.add_parser("manifest", help="write the chapter version manifest of a build")
+    manifest_parser.add_argument("build")
+    manifest_parser.add_argument("-o", "--output", required=True)
+
+    diff_parser = subparsers.add_parser("diff", help="create a signed delta between two builds")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    diff_parser.add_argument("-o", "--output", required=True)
+    diff_parser.add_argument("--translation")
+
+    apply_parser = subparsers.add_parser("apply", help="apply a delta bundle to a build")
+    apply_parser.add_argument("build")
+    apply_parser.add_argument("delta")
+    apply_parser.add_argument("-o", "--output", required=True)
+    apply_parser.add_argument("--public-key", help=f"Ed25519 public key (default: assets/{PUBLIC_KEY_FILE})")
+
+    keygen_parser = subparsers.add_parser("keygen", help="create an Ed25519 key pair for signing bundles")
+    keygen_parser.add_argument("-o", "--output", required=True, help="private key file (keep it out of the repo)")
+    keygen_parser.add_argument("--public-key", help=f"public key file (default: assets/{PUBLIC_KEY_FILE})")
+
+    args = parser.parse_args()
+
+    if args.command == "manifest":
+        bible_data = load_json_file(args.build)
+        if bible_data is None:
+            return 1
+        manifest = build_manifest(bible_data)
+        save_json_file(args.output, {"version": manifest_version(manifest), "books": manifest})
+        return 0
+
+    if args.command == "keygen":
+        try:
+            private_pem, public_pem = generate_signing_key()
+        except ImportError:
+            print("Error: cryptography is required (pip install cryptography)")
+            return 1
+        public_path = args.public_key or data_paths.asset_path(PUBLIC_KEY_FILE)
+        # Never overwrite a key: bundles signed with it would stop verifying
+        for path in (args.output, public_path):
+            if os.path.exists(path):
+                print(f"Error: {path} already exists")
+                return 1
+        fd = os.open(args.output, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(private_pem)
+        with open(public_path, 'wb') as f:
+            f.write(public_pem)
+        print(f"Private key saved to {args.output}; set {KEY_ENV_VAR} to it in the pipeline")
+        print(f"Public key saved to {public_path}; ship it with the app")
+        return 0
+
+    if args.command == "diff":
+        key = get_signing_key()
+        if key is None:
+            return 1
+        old_data = load_json_file(args.old)
+        new_data = load_json_file(args.new)
+        if old_data is None or new_data is None:
+            return 1
+        with pipeline_profile.stage("diff"):
+            bundle = create_delta(old_data, new_data, key, args.translation)
+        print(f"{len(bundle['changes'])} changed and {len(bundle['removed'])} removed chapters")
+        if not save_json_file(args.output, bundle, compact=True):
+            return 1
+        print(f"Delta size: {os.path.getsize(args.output)} bytes")
+        return 0
+
+    key = get_verify_key(args.public_key)
+    bible_data = load_json_file(args.build)
+    bundle = load_json_file(args.delta)
+    if key is None or bible_data is None or bundle is None:
+        return 1
+    try:
+        with pipeline_profile.stage("apply"):
+            patched = apply_delta(bible_data, bundle, key)
+    except ValueError as e:
+        print(f"Error applying delta: {e}")
+        return 1
+    if not save_json_file(args.output, patched):
+        return 1
+    print(f"Build updated to version {bundle['target_version'][:12]}")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "bible_delta")
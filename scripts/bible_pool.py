@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Script to build a content-addressed chapter pool shared by all Bible translations
+
+Chapter bodies are stored once in a pool keyed by their content hash and each
+translation only references pool entries, so translations that share text
+(NIV and ESV currently fall back to KJV) cost almost nothing extra.
+"""
+
+import argparse
+import json
+import os
+
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, chapter_digest, iter_chapters, load_json_file, manifest_version
+
+POOL_FORMAT = 1
+POOL_KEY_LENGTH = 16
+
+
+def add_translation(pool_data, translation, bible_data):
+    """Add a translation to the pool, storing only chapters not already present"""
+    pool = pool_data["chapters"]
+    books = {}
+    added = 0
+
+    for book_name, testament, chapter_key, verses in iter_chapters(bible_data):
+        digest = chapter_digest(verses)
+        pool_key = digest[:POOL_KEY_LENGTH]
+        existing = pool.get(pool_key)
+        if existing is None:
+            pool[pool_key] = verses
+            added += 1
+        elif chapter_digest(existing) != digest:
+            raise ValueError(f"Pool key collision for {book_name} {chapter_key}")
+
+        book_entry = books.setdefault(book_name, {"testament": testament, "chapters": {}})
+        book_entry["chapters"][chapter_key] = pool_key
+
+    pool_data["translations"][translation] = {
+        "version": manifest_version(build_manifest(bible_data)),
+        "books": books,
+    }
+    return added
+
+
+def expand_translation(pool_data, translation):
+    """Rebuild a translation in the {"books": {...}} layout from the pool"""
+    pool = pool_data["chapters"]
+    entry = pool_data["translations"][translation]
+    bible_data = {"books": {}}
+
+    for book_name, book_entry in entry["books"].items():
+        bible_data["books"][book_name] = {
+            "testament": book_entry["testament"],
+            "chapters": {
+                chapter_key: list(pool[pool_key])
+                for chapter_key, pool_key in book_entry["chapters"].items()
+            },
+        }
+    return bible_data
+
+
+def verify_pool(pool_data):
+    """Check that every translation expands back to its recorded version"""
+    ok = True
+    for translation, entry in pool_data["translations"].items():
+        expanded = expand_translation(pool_data, translation)
+        if manifest_version(build_manifest(expanded)) != entry["version"]:
+            print(f"✗ {translation} does not match its recorded version")
+            ok = False
+    return ok
+
+
+def build_pool(translations):
+    """Build pool data from a list of (translation, bible_data) pairs"""
+    pool_data = {"format": POOL_FORMAT, "chapters": {}, "translations": {}}
+    for translation, bible_data in translations:
+        added = add_translation(pool_data, translation, bible_data)
+        print(f"{translation}: {added} new chapters added to pool")
+    return pool_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the content-addressed Bible chapter pool")
+    parser.add_argument("-o", "--output", default=data_paths.asset_path('bible_pool.json'))
+    args = parser.parse_args()
+
+    translations = []
+    source_bytes = 0
+    for translation in data_paths.TRANSLATIONS:
+        file_path = data_paths.translation_path(translation)
+        with pipeline_profile.stage(f"load {translation}"):
+            bible_data = load_json_file(file_path)
+        if bible_data is None:
+            print(f"Warning: skipping {translation}")
+            continue
+        translations.append((translation, bible_data))
+        source_bytes += os.path.getsize(file_path)
+
+    with pipeline_profile.stage("build pool"):
+        pool_data = build_pool(translations)
+    with pipeline_profile.stage("verify pool"):
+        if not verify_pool(pool_data):
+            return 1
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(pool_data, f, ensure_ascii=False, separators=(',', ':'))
+
+    pool_bytes = os.path.getsize(args.output)
+    print(f"{len(pool_data['chapters'])} unique chapters for {len(translations)} translations")
+    print(f"Pool size: {pool_bytes} bytes (separate files: {source_bytes} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "bible_pool")
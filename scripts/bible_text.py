@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Word tokenization and normalization shared by the Bible index builders
+
+Every index (concordance, fuzzy search, related verses, highlight offsets)
+tokenizes verses with tokenize() so word positions and lemmas agree between
+them.
+"""
+
+import re
+
+WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+
+# KJV forms that suffix rules cannot reduce
+IRREGULAR_LEMMAS = {
+    "hath": "have", "hast": "have", "had": "have", "has": "have",
+    "doth": "do", "dost": "do", "did": "do", "didst": "do", "does": "do",
+    "saith": "say", "said": "say", "saidst": "say",
+    "art": "be", "wast": "be", "wert": "be", "is": "be", "am": "be", "are": "be",
+    "was": "be", "were": "be", "been": "be",
+    "shalt": "shall", "wilt": "will", "canst": "can", "couldest": "could",
+    "spake": "speak", "spoken": "speak", "came": "come", "went": "go",
+    "thee": "thou", "thy": "thou", "thine": "thou", "ye": "you",
+}
+
+# Words ending in -s or -eth/-est that are not inflections
+KEEP_AS_IS = {
+    "this", "his", "us", "thus", "yes", "less", "unless", "whereas", "alas", "perhaps", "riches",
+    "divers", "news", "series", "species", "themselves", "ourselves", "yourselves",
+    "best", "rest", "west", "east", "least", "priest", "beast", "feast", "breast", "forest",
+    "nest", "test", "guest", "chest", "honest", "dishonest", "earnest", "harvest", "interest",
+    "conquest", "request", "bequest", "manifest", "modest", "tempest", "protest", "behest",
+    "arrest", "contest", "digest", "blest", "teeth", "death", "breath", "earth", "faith", "truth",
+    # Names
+    "jesus", "moses", "judas", "james", "amos", "thomas", "barnabas", "silas", "elias", "esaias",
+    "jonas", "josias", "zacharias", "ananias", "lysias", "lysanias", "matthias", "annas",
+    "caiaphas", "cephas", "cleophas", "demas", "epaphras", "stephanas", "hermas", "phinehas",
+    "herodias", "apollos", "hermes", "sosthenes", "diotrephes", "artaxerxes", "manasses",
+    "patmos", "pergamos", "pathros", "troas", "athens", "rhodes",
+    "beth", "seth", "nazareth", "elisabeth", "japheth", "ashtoreth", "chinnereth", "shibboleth",
+}
+
+VOWELS = set("aeiou")
+
+
+def tokenize(text):
+    """Return (start, end, word) for every word in text"""
+    return [(match.start(), match.end(), match.group()) for match in WORD_RE.finditer(text)]
+
+
+def words(text):
+    """Return the lowercase words of text"""
+    return [match.group().lower() for match in WORD_RE.finditer(text)]
+
+
+def _restore_e(stem):
+    """Add back a silent e removed with a suffix (mak -> make, caus -> cause, trembl -> tremble)"""
+    if stem.endswith(("v", "c", "dg", "u")) or (stem.endswith("s") and not stem.endswith("ss")):
+        return stem + "e"
+    if len(stem) >= 3 and stem[-1] == "l" and stem[-2] in "bcdfgkptz":
+        return stem + "e"
+    if len(stem) >= 2 and stem[-1] not in VOWELS and stem[-1] not in "wxy" and stem[-2] in VOWELS:
+        if len(stem) == 2 or stem[-3] not in VOWELS:
+            # An unstressed last syllable takes no e (deliver, harden, visit, reckon)
+            unstressed = stem[-2] == "e" or stem[-2:] == "it" or stem[-2:] in ("on", "or")
+            if _syllables(stem) == 1 or not unstressed:
+                return stem + "e"
+            return stem
+    if len(stem) >= 4 and stem[-1] == stem[-2] and stem[-1] not in "lsz":
+        return stem[:-1]
+    return stem
+
+
+def _syllables(word):
+    """Count the vowel groups of a word"""
+    return sum(1 for index, char in enumerate(word) if char in VOWELS and (index == 0 or word[index - 1] not in VOWELS))
+
+
+def _restore_y(stem):
+    """Undo y -> ie before a suffix (cr -> cry, satisf -> satisfy, l -> lie)"""
+    return stem + "ie" if len(stem) == 1 else stem + "y"
+
+
+def normalize_word(word):
+    """Reduce a word to a light lemma: lowercase, no possessive, no KJV verb endings or plurals"""
+    word = word.lower()
+    if word.endswith("'s"):
+        word = word[:-2]
+    word = word.replace("'", "")
+
+    if word in IRREGULAR_LEMMAS:
+        return IRREGULAR_LEMMAS[word]
+    if word in KEEP_AS_IS or len(word) <= 3:
+        return word
+
+    if word.endswith("eeth"):
+        return word[:-2]
+    if word.endswith("tieth"):
+        # Ordinals (twentieth), not verbs
+        return word
+    if word.endswith(("ieth", "iest")) and len(word) > 4:
+        return _restore_y(word[:-4])
+    if word.endswith("eth") and len(word) > 4:
+        return _restore_e(word[:-3])
+    # Only stems of four or more letters, so -est words like "chest" or "guest" survive
+    if word.endswith("est") and len(word) > 6:
+        return _restore_e(word[:-3])
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "ches", "shes", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def lemmas(text):
+    """Return the normalized lemma of every word in text
+
+    A word normalizes the same wherever it stands, so a one-word query finds
+    the lemma it was indexed under.
+    """
+    return [normalize_word(match.group()) for match in WORD_RE.finditer(text)]
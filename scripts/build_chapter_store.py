@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Script to build an indexed chapter store for serving verse text
+
+The store is a packed file holding every verse text of a translation in
+canonical order plus a chapter table: a sorted chapter key (book * 1024 +
+chapter), the ordinal of each chapter's first verse and a 64-bit content
+digest per chapter. Looking a chapter up is one binary search, its verses are
+a contiguous slice of the memory-mapped text blob, and the digest gives the
+verse API a stable ETag without touching the text.
+
+Usage:
+    python build_chapter_store.py --translation KJV
+    python build_chapter_store.py --translation KJV --show "John 3"
+"""
+
+import argparse
+import hashlib
+from bisect import bisect_left
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, load_json_file, manifest_version
+from packed_arrays import PackedFile, add_strings, typed_array, write_packed
+
+CHAPTER_STORE_VERSION = 1
+CHAPTER_KEY_STRIDE = 1024
+
+
+def chapter_store_path(translation):
+    """Return the default output path of a translation's chapter store"""
+    return data_paths.build_path(f"chapters_{translation.lower()}.bin")
+
+
+def chapter_key(book_idx, chapter):
+    """Return the sortable key of a chapter"""
+    if not 0 < chapter < CHAPTER_KEY_STRIDE:
+        raise ValueError(f"Chapter {chapter} of {bible_canon.BOOKS[book_idx]} is out of range")
+    return book_idx * CHAPTER_KEY_STRIDE + chapter
+
+
+def build_chapter_store(bible_data):
+    """Stream a translation once and return (arrays, stats) for its chapter store"""
+    verse_table = bible_canon.new_verse_table()
+    chapter_keys = typed_array('I')
+    chapter_first_verse = typed_array('I')
+    chapter_digests = typed_array('Q')
+    texts = []
+
+    for book_idx, chapter, verses in bible_canon.iter_book_chapters(bible_data):
+        chapter_keys.append(chapter_key(book_idx, chapter))
+        chapter_first_verse.append(len(texts))
+        digest = hashlib.sha256()
+        for verse_number, text in enumerate(verses, 1):
+            bible_canon.add_verse(verse_table, book_idx, chapter, verse_number)
+            texts.append(text)
+            digest.update(text.encode('utf-8'))
+            digest.update(b"\0")
+        chapter_digests.append(int.from_bytes(digest.digest()[:8], 'little'))
+    chapter_first_verse.append(len(texts))
+
+    arrays = {
+        "chapter_key": chapter_keys,
+        "chapter_first_verse": chapter_first_verse,
+        "chapter_digest": chapter_digests,
+    }
+    add_strings(arrays, "text", texts)
+    arrays.update(verse_table)
+
+    stats = {
+        "chapters": len(chapter_keys),
+        "verses": len(texts),
+    }
+    return arrays, stats
+
+
+class ChapterStore:
+    """Chapter and verse-range lookups over a memory-mapped chapter store"""
+
+    def __init__(self, path=None, buffer=None):
+        self.packed = PackedFile(path, buffer)
+        self.meta = self.packed.meta
+        self.translation = self.meta["translation"]
+        self.keys = self.packed.array("chapter_key")
+        self.first_verse = self.packed.array("chapter_first_verse")
+        self.digests = self.packed.array("chapter_digest")
+        self.texts = self.packed.strings("text")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def chapter_index(self, book_idx, chapter):
+        """Return the index of a chapter, or -1 if the translation lacks it"""
+        # Out-of-range chapters would carry into the keys of the next book
+        if not 0 < chapter < CHAPTER_KEY_STRIDE:
+            return -1
+        key = chapter_key(book_idx, chapter)
+        index = bisect_left(self.keys, key)
+        return index if index < len(self.keys) and self.keys[index] == key else -1
+
+    def chapter(self, index):
+        """Return (book_idx, chapter number) of a chapter index"""
+        key = self.keys[index]
+        return key // CHAPTER_KEY_STRIDE, key % CHAPTER_KEY_STRIDE
+
+    def verse_count(self, index):
+        return self.first_verse[index + 1] - self.first_verse[index]
+
+    def verses(self, index, start=1, end=None):
+        """Return [(verse number, text)] of a chapter, optionally limited to start..end"""
+        first = self.first_verse[index]
+        count = self.verse_count(index)
+        end = count if end is None else min(end, count)
+        return [(number, self.texts[first + number - 1]) for number in range(max(start, 1), end + 1)]
+
+    def etag(self, index):
+        """Return a strong ETag for a chapter's content"""
+        return f'"{self.meta["source_version"][:12]}-{self.digests[index]:016x}"'
+
+    def close(self):
+        self.packed.close()
+
+
+def write_chapter_store(bible_data, translation, output_path):
+    """Build and write a translation's chapter store, returning its stats"""
+    arrays, stats = build_chapter_store(bible_data)
+    meta = dict(stats, translation=translation, format=CHAPTER_STORE_VERSION,
+                source_version=manifest_version(build_manifest(bible_data)))
+    stats["bytes"] = write_packed(output_path, arrays, meta)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the indexed chapter store used by the verse API")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--show", metavar="REFERENCE", help="print a chapter or verse from an existing store")
+    args = parser.parse_args()
+
+    output_path = args.output or chapter_store_path(args.translation)
+
+    if args.show:
+        store = ChapterStore(output_path)
+        book_idx, start_chapter, start_verse, _, end_verse = bible_canon.parse_passage(args.show)
+        index = store.chapter_index(book_idx, start_chapter)
+        if index < 0:
+            print(f"{args.show} is not in {args.translation}")
+            return 1
+        for number, text in store.verses(index, start_verse or 1, end_verse):
+            print(f"{number} {text}")
+        return 0
+
+    with pipeline_profile.stage("load"):
+        bible_data = load_json_file(data_paths.translation_path(args.translation))
+    if bible_data is None:
+        return 1
+
+    with pipeline_profile.stage("build"):
+        stats = write_chapter_store(bible_data, args.translation, output_path)
+
+    print(f"{stats['chapters']} chapters, {stats['verses']} verses")
+    print(f"Chapter store saved to {output_path} ({stats['bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "build_chapter_store")
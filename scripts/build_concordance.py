@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Script to build a precomputed concordance and word-frequency tables for a translation
+
+Each translation is streamed once. For every normalized lemma the index stores
+its total count, per-book and per-chapter counts and the sorted ordinals of
+the verses it occurs in, all as CSR-style typed arrays in a packed file, so a
+lookup is a binary search over the sorted lemma table plus array slicing.
+
+Usage:
+    python build_concordance.py --translation KJV
+    python build_concordance.py --translation KJV --lookup believeth
+"""
+
+import argparse
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, load_json_file, manifest_version
+from bible_text import lemmas
+from packed_arrays import PackedFile, add_strings, typed_array, write_packed
+
+CONCORDANCE_VERSION = 3
+
+
+def concordance_path(translation):
+    """Return the default output path of a translation's concordance"""
+    return data_paths.build_path(f"concordance_{translation.lower()}.bin")
+
+
+def build_concordance(bible_data):
+    """Stream a translation once and return (arrays, stats) for its concordance"""
+    verse_table = bible_canon.new_verse_table()
+    chapter_book = typed_array('B')
+    chapter_number = typed_array('H')
+    chapter_first_verse = typed_array('I')
+
+    # lemma -> [total, {book: count}, {chapter_ordinal: count}, [verse ordinals]]
+    entries = {}
+    tokens = 0
+    current_chapter = None
+
+    for ordinal, book_idx, chapter, verse, text in bible_canon.iter_verses(bible_data):
+        if (book_idx, chapter) != current_chapter:
+            current_chapter = (book_idx, chapter)
+            chapter_book.append(book_idx)
+            chapter_number.append(chapter)
+            chapter_first_verse.append(ordinal)
+        chapter_ordinal = len(chapter_book) - 1
+        bible_canon.add_verse(verse_table, book_idx, chapter, verse)
+
+        for lemma in lemmas(text):
+            tokens += 1
+            entry = entries.get(lemma)
+            if entry is None:
+                entry = entries[lemma] = [0, {}, {}, []]
+            entry[0] += 1
+            entry[1][book_idx] = entry[1].get(book_idx, 0) + 1
+            entry[2][chapter_ordinal] = entry[2].get(chapter_ordinal, 0) + 1
+            if not entry[3] or entry[3][-1] != ordinal:
+                entry[3].append(ordinal)
+
+    sorted_lemmas = sorted(entries)
+    arrays = {}
+    add_strings(arrays, "lemma", sorted_lemmas)
+
+    lemma_total = typed_array('I')
+    book_ptr, book_ids, book_counts = typed_array('I', [0]), typed_array('B'), typed_array('I')
+    chapter_ptr, chapter_ids, chapter_counts = typed_array('I', [0]), typed_array('H'), typed_array('I')
+    verse_ptr, verse_ords = typed_array('I', [0]), typed_array('I')
+
+    for lemma in sorted_lemmas:
+        total, books, chapters, verses = entries[lemma]
+        lemma_total.append(total)
+        for book_idx in sorted(books):
+            book_ids.append(book_idx)
+            book_counts.append(books[book_idx])
+        book_ptr.append(len(book_ids))
+        for chapter_ordinal in sorted(chapters):
+            chapter_ids.append(chapter_ordinal)
+            chapter_counts.append(chapters[chapter_ordinal])
+        chapter_ptr.append(len(chapter_ids))
+        verse_ords.extend(verses)
+        verse_ptr.append(len(verse_ords))
+
+    arrays.update({
+        "lemma_total": lemma_total,
+        "book_ptr": book_ptr, "book_ids": book_ids, "book_counts": book_counts,
+        "chapter_ptr": chapter_ptr, "chapter_ids": chapter_ids, "chapter_counts": chapter_counts,
+        "verse_ptr": verse_ptr, "verse_ords": verse_ords,
+        "chapter_book": chapter_book, "chapter_number": chapter_number,
+        "chapter_first_verse": chapter_first_verse,
+    })
+    arrays.update(verse_table)
+
+    stats = {
+        "tokens": tokens,
+        "lemmas": len(sorted_lemmas),
+        "verses": len(verse_table["verse_book"]),
+        "chapters": len(chapter_book),
+    }
+    return arrays, stats
+
+
+class Concordance:
+    """Lookups over a concordance file; every query is a binary search plus slicing"""
+
+    def __init__(self, path):
+        self.packed = PackedFile(path)
+        self.meta = self.packed.meta
+        self.lemmas = self.packed.strings("lemma")
+
+    def _index(self, word):
+        found = lemmas(word)
+        return self.lemmas.find(found[0]) if found else -1
+
+    def _slice(self, ptr_name, name, index):
+        ptr = self.packed.array(ptr_name)
+        return self.packed.array(name)[ptr[index]:ptr[index + 1]]
+
+    def lookup(self, word):
+        """Return word statistics for a word, or None if it does not occur"""
+        index = self._index(word)
+        if index < 0:
+            return None
+        book_ids = self._slice("book_ptr", "book_ids", index)
+        book_counts = self._slice("book_ptr", "book_counts", index)
+        return {
+            "lemma": self.lemmas[index],
+            "total": self.packed.array("lemma_total")[index],
+            "verses": len(self._slice("verse_ptr", "verse_ords", index)),
+            "chapters": len(self._slice("chapter_ptr", "chapter_ids", index)),
+            "books": {bible_canon.BOOKS[b]: c for b, c in zip(book_ids, book_counts)},
+        }
+
+    def verse_ordinals(self, word):
+        """Return the sorted verse ordinals a word occurs in"""
+        index = self._index(word)
+        return self._slice("verse_ptr", "verse_ords", index) if index >= 0 else []
+
+    def chapter_counts(self, word):
+        """Return [(reference, count)] for the chapters a word occurs in"""
+        index = self._index(word)
+        if index < 0:
+            return []
+        chapter_book = self.packed.array("chapter_book")
+        chapter_number = self.packed.array("chapter_number")
+        return [
+            (bible_canon.format_reference(chapter_book[c], chapter_number[c]), count)
+            for c, count in zip(self._slice("chapter_ptr", "chapter_ids", index),
+                                self._slice("chapter_ptr", "chapter_counts", index))
+        ]
+
+    def references(self, word, limit=None):
+        """Return verse references for a word in canonical order"""
+        ordinals = self.verse_ordinals(word)
+        if limit is not None:
+            ordinals = ordinals[:limit]
+        return [bible_canon.verse_reference(self.packed, ordinal) for ordinal in ordinals]
+
+    def close(self):
+        self.packed.close()
+
+
+def write_concordance(bible_data, translation, output_path):
+    """Build and write a translation's concordance, returning its stats"""
+    arrays, stats = build_concordance(bible_data)
+    meta = dict(stats, translation=translation, format=CONCORDANCE_VERSION,
+                source_version=manifest_version(build_manifest(bible_data)))
+    stats["bytes"] = write_packed(output_path, arrays, meta)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build concordance and word-frequency tables")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--lookup", metavar="WORD", help="look a word up in an existing concordance")
+    args = parser.parse_args()
+
+    output_path = args.output or concordance_path(args.translation)
+
+    if args.lookup:
+        concordance = Concordance(output_path)
+        result = concordance.lookup(args.lookup)
+        if result is None:
+            print(f"'{args.lookup}' does not occur in {args.translation}")
+            return 1
+        print(f"{result['lemma']}: {result['total']} occurrences in {result['verses']} verses, {result['chapters']} chapters")
+        for book_name, count in result["books"].items():
+            print(f"  {book_name}: {count}")
+        print("  First verses: " + ", ".join(concordance.references(args.lookup, limit=5)))
+        return 0
+
+    with pipeline_profile.stage("load"):
+        bible_data = load_json_file(data_paths.translation_path(args.translation))
+    if bible_data is None:
+        return 1
+
+    with pipeline_profile.stage("build"):
+        stats = write_concordance(bible_data, args.translation, output_path)
+
+    print(f"{stats['lemmas']} lemmas from {stats['tokens']} words in {stats['verses']} verses")
+    print(f"Concordance saved to {output_path} ({stats['bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "build_concordance")
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Script to build a typo-tolerant (SymSpell) verse search index for a translation
+
+Every distinct word of the translation is stored with its frequency and the
+ordinals of the verses it appears in. A SymSpell deletion dictionary maps each
+string obtained by deleting up to MAX_EDIT_DISTANCE characters from a word's
+prefix to the words that produce it. A query generates the same deletes,
+collects candidate words with binary searches, verifies them with an
+edit-distance check and ranks verses by how closely they match every term.
+
+Usage:
+    python build_fuzzy_index.py --translation KJV
+    python build_fuzzy_index.py --translation KJV --search "Nebuchadnezar dream"
+"""
+
+import argparse
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, load_json_file, manifest_version
+from bible_text import words
+from packed_arrays import PackedFile, add_strings, typed_array, write_packed
+
+FUZZY_INDEX_VERSION = 1
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+
+def fuzzy_index_path(translation):
+    """Return the default output path of a translation's fuzzy index"""
+    return data_paths.build_path(f"fuzzy_{translation.lower()}.bin")
+
+
+def deletes(word, max_distance=MAX_EDIT_DISTANCE):
+    """Return every string made by deleting up to max_distance characters from word"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for value in frontier:
+            if len(value) <= 1:
+                continue
+            for i in range(len(value)):
+                next_frontier.add(value[:i] + value[i + 1:])
+        next_frontier -= result
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance between a and b, or limit + 1 if above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def max_distance_for(word):
+    """Allow fewer typos in short words"""
+    return 1 if len(word) <= 4 else MAX_EDIT_DISTANCE
+
+
+def build_fuzzy_index(bible_data):
+    """Stream a translation once and return (arrays, stats) for its fuzzy index"""
+    verse_table = bible_canon.new_verse_table()
+    postings = {}
+    frequency = {}
+
+    for ordinal, book_idx, chapter, verse, text in bible_canon.iter_verses(bible_data):
+        bible_canon.add_verse(verse_table, book_idx, chapter, verse)
+        for word in words(text):
+            frequency[word] = frequency.get(word, 0) + 1
+            verse_list = postings.setdefault(word, [])
+            if not verse_list or verse_list[-1] != ordinal:
+                verse_list.append(ordinal)
+
+    vocabulary = sorted(frequency)
+    delete_map = {}
+    for word_id, word in enumerate(vocabulary):
+        for key in deletes(word[:PREFIX_LENGTH]):
+            delete_map.setdefault(key, []).append(word_id)
+
+    arrays = {}
+    add_strings(arrays, "word", vocabulary)
+    arrays["word_frequency"] = typed_array('I', (frequency[word] for word in vocabulary))
+
+    verse_ptr, verse_ords = typed_array('I', [0]), typed_array('I')
+    for word in vocabulary:
+        verse_ords.extend(postings[word])
+        verse_ptr.append(len(verse_ords))
+    arrays["verse_ptr"], arrays["verse_ords"] = verse_ptr, verse_ords
+
+    delete_keys = sorted(delete_map)
+    add_strings(arrays, "delete", delete_keys)
+    delete_ptr, delete_words = typed_array('I', [0]), typed_array('I')
+    for key in delete_keys:
+        delete_words.extend(delete_map[key])
+        delete_ptr.append(len(delete_words))
+    arrays["delete_ptr"], arrays["delete_words"] = delete_ptr, delete_words
+    arrays.update(verse_table)
+
+    stats = {
+        "words": len(vocabulary),
+        "deletes": len(delete_keys),
+        "verses": len(verse_table["verse_book"]),
+    }
+    return arrays, stats
+
+
+class FuzzyIndex:
+    """Typo-tolerant verse search over a fuzzy index file"""
+
+    def __init__(self, path):
+        self.packed = PackedFile(path)
+        self.meta = self.packed.meta
+        self.words = self.packed.strings("word")
+        self.delete_keys = self.packed.strings("delete")
+        self.frequency = self.packed.array("word_frequency")
+
+    def _slice(self, ptr_name, name, index):
+        ptr = self.packed.array(ptr_name)
+        return self.packed.array(name)[ptr[index]:ptr[index + 1]]
+
+    def candidates(self, term):
+        """Return [(word_id, distance)] for words within edit distance of term"""
+        term = term.lower()
+        max_distance = max_distance_for(term)
+        word_ids = set()
+        for key in deletes(term[:PREFIX_LENGTH], max_distance):
+            index = self.delete_keys.find(key)
+            if index >= 0:
+                word_ids.update(self._slice("delete_ptr", "delete_words", index))
+
+        matches = []
+        for word_id in word_ids:
+            distance = edit_distance(term, self.words[word_id], max_distance)
+            if distance <= max_distance:
+                matches.append((word_id, distance))
+        return matches
+
+    def suggest(self, term, limit=5):
+        """Return [(word, distance, frequency)] for the closest, most frequent words"""
+        ranked = sorted(self.candidates(term), key=lambda m: (m[1], -self.frequency[m[0]]))
+        return [(self.words[word_id], distance, self.frequency[word_id]) for word_id, distance in ranked[:limit]]
+
+    def _term_scores(self, term):
+        """Map verse ordinal -> best score for one query term"""
+        scores = {}
+        for word_id, distance in self.candidates(term):
+            score = 1.0 / (1 + distance)
+            for ordinal in self._slice("verse_ptr", "verse_ords", word_id):
+                if scores.get(ordinal, 0) < score:
+                    scores[ordinal] = score
+        return scores
+
+    def search(self, query, limit=10):
+        """Return [(reference, ordinal, score)] for verses matching every query term"""
+        terms = words(query)
+        if not terms:
+            return []
+        combined = None
+        for term in sorted(terms, key=len, reverse=True):
+            scores = self._term_scores(term)
+            if combined is None:
+                combined = scores
+            else:
+                combined = {o: s + scores[o] for o, s in combined.items() if o in scores}
+            if not combined:
+                return []
+        ranked = sorted(combined.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(bible_canon.verse_reference(self.packed, o), o, round(s / len(terms), 3)) for o, s in ranked]
+
+    def close(self):
+        self.packed.close()
+
+
+def write_fuzzy_index(bible_data, translation, output_path):
+    """Build and write a translation's fuzzy index, returning its stats"""
+    arrays, stats = build_fuzzy_index(bible_data)
+    meta = dict(stats, translation=translation, format=FUZZY_INDEX_VERSION,
+                max_edit_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH,
+                source_version=manifest_version(build_manifest(bible_data)))
+    stats["bytes"] = write_packed(output_path, arrays, meta)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the typo-tolerant verse search index")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--search", metavar="QUERY", help="search an existing index")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    output_path = args.output or fuzzy_index_path(args.translation)
+
+    if args.search:
+        import time
+        index = FuzzyIndex(output_path)
+        started = time.perf_counter()
+        results = index.search(args.search, args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for term in words(args.search):
+            suggestions = ", ".join(f"{w} ({d})" for w, d, _ in index.suggest(term, 3))
+            print(f"{term}: {suggestions or 'no matches'}")
+        for reference, _, score in results:
+            print(f"  {score:.3f}  {reference}")
+        print(f"{len(results)} verses in {elapsed:.1f} ms")
+        return 0 if results else 1
+
+    with pipeline_profile.stage("load"):
+        bible_data = load_json_file(data_paths.translation_path(args.translation))
+    if bible_data is None:
+        return 1
+
+    with pipeline_profile.stage("build"):
+        stats = write_fuzzy_index(bible_data, args.translation, output_path)
+
+    print(f"{stats['words']} words, {stats['deletes']} delete keys, {stats['verses']} verses")
+    print(f"Fuzzy index saved to {output_path} ({stats['bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "build_fuzzy_index")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Script to precompute "related verses" for every verse from TF-IDF similarity
+
+Every verse becomes a sparse, L2-normalized TF-IDF vector over normalized
+lemmas (SciPy CSR). Cosine similarities are computed one block of rows at a
+time (block x N), so the full N x N matrix never exists, and only the top-k
+neighbours of each verse are kept. The result is an N x k table of neighbour
+ordinals with uint16-quantized scores in a packed file.
+
+Requires numpy and scipy.
+
+Usage:
+    python build_related_verses.py --translation KJV --top-k 10
+    python build_related_verses.py --translation KJV --related "John 1:1"
+"""
+
+import argparse
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, load_json_file, manifest_version
+from bible_text import lemmas
+from packed_arrays import PackedFile, typed_array, write_packed
+
+RELATED_INDEX_VERSION = 2
+DEFAULT_TOP_K = 10
+DEFAULT_BLOCK_SIZE = 512
+SCORE_SCALE = 65535
+
+
+def related_index_path(translation):
+    """Return the default output path of a translation's related-verse index"""
+    return data_paths.build_path(f"related_{translation.lower()}.bin")
+
+
+def build_tfidf_matrix(bible_data):
+    """Return (L2-normalized TF-IDF CSR matrix, verse table) for a translation"""
+    import numpy as np
+    from scipy import sparse
+
+    verse_table = bible_canon.new_verse_table()
+    vocabulary = {}
+    indptr = typed_array('Q', [0])
+    indices = typed_array('I')
+    counts = typed_array('f')
+
+    for _, book_idx, chapter, verse, text in bible_canon.iter_verses(bible_data):
+        bible_canon.add_verse(verse_table, book_idx, chapter, verse)
+        term_counts = {}
+        for lemma in lemmas(text):
+            term_id = vocabulary.setdefault(lemma, len(vocabulary))
+            term_counts[term_id] = term_counts.get(term_id, 0) + 1
+        indices.extend(term_counts.keys())
+        counts.extend(term_counts.values())
+        indptr.append(len(indices))
+
+    num_verses = len(indptr) - 1
+    matrix = sparse.csr_matrix(
+        (np.frombuffer(counts, dtype=np.float32).copy(),
+         np.frombuffer(indices, dtype=np.uint32).astype(np.int32),
+         np.frombuffer(indptr, dtype=np.uint64).astype(np.int64)),
+        shape=(num_verses, len(vocabulary)),
+    )
+
+    # Sublinear term frequency and smoothed inverse document frequency
+    matrix.data = 1.0 + np.log(matrix.data)
+    document_frequency = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = np.log((1.0 + num_verses) / (1.0 + document_frequency)) + 1.0
+    matrix = (matrix @ sparse.diags(idf.astype(np.float32))).tocsr()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix = (sparse.diags((1.0 / norms).astype(np.float32)) @ matrix).tocsr()
+    return matrix.astype(np.float32), verse_table
+
+
+def top_k_neighbors(matrix, top_k, block_size=DEFAULT_BLOCK_SIZE):
+    """Return (neighbors, scores) arrays of shape (N, k) using blocked products"""
+    import numpy as np
+
+    num_verses = matrix.shape[0]
+    k = max(0, min(top_k, num_verses - 1))
+    neighbors = np.zeros((num_verses, top_k), dtype=np.uint32)
+    scores = np.zeros((num_verses, top_k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+
+    transposed = matrix.T.tocsr()
+    for start in range(0, num_verses, block_size):
+        stop = min(start + block_size, num_verses)
+        block = (matrix[start:stop] @ transposed).toarray()
+        rows = np.arange(stop - start)
+        block[rows, rows + start] = -1.0
+
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        neighbors[start:stop, :k] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:stop, :k] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    return neighbors, scores
+
+
+def build_related_verses(bible_data, top_k=DEFAULT_TOP_K, block_size=DEFAULT_BLOCK_SIZE):
+    """Return (arrays, stats) for a translation's related-verse index"""
+    import numpy as np
+
+    with pipeline_profile.stage("tfidf"):
+        matrix, verse_table = build_tfidf_matrix(bible_data)
+    with pipeline_profile.stage("top-k"):
+        neighbors, scores = top_k_neighbors(matrix, top_k, block_size)
+
+    quantized = np.round(np.clip(scores, 0.0, 1.0) * SCORE_SCALE).astype(np.uint16)
+    arrays = {
+        "neighbors": typed_array('I', neighbors.astype(np.uint32).tobytes()),
+        "scores": typed_array('H', quantized.tobytes()),
+    }
+    arrays.update(verse_table)
+
+    stats = {
+        "verses": matrix.shape[0],
+        "terms": matrix.shape[1],
+        "top_k": top_k,
+        # Rows past this count are zero padding when there are too few verses
+        "neighbor_count": max(0, min(top_k, matrix.shape[0] - 1)),
+    }
+    return arrays, stats
+
+
+class RelatedVerses:
+    """Related-verse lookups over a precomputed index file"""
+
+    def __init__(self, path):
+        self.packed = PackedFile(path)
+        self.meta = self.packed.meta
+        self.top_k = self.meta["top_k"]
+        self.neighbor_count = self.meta["neighbor_count"]
+        self.neighbors = self.packed.array("neighbors")
+        self.scores = self.packed.array("scores")
+
+    def related(self, ordinal, limit=None, min_score=0.05):
+        """Return [(ordinal, score)] for the verses most similar to a verse ordinal"""
+        start = ordinal * self.top_k
+        result = []
+        # Each verse owns top_k rows; a larger limit must not run into the next verse's
+        for position in range(start, start + min(limit or self.top_k, self.neighbor_count)):
+            score = self.scores[position] / SCORE_SCALE
+            if score < min_score:
+                break
+            result.append((self.neighbors[position], round(score, 3)))
+        return result
+
+    def related_references(self, reference, limit=None):
+        """Return [(reference, score)] for the verses related to a reference"""
+        book_idx, chapter, verse = bible_canon.parse_reference(reference)
+        ordinal = bible_canon.verse_ordinal(self.packed, book_idx, chapter, verse or 1)
+        if ordinal < 0:
+            return []
+        return [(bible_canon.verse_reference(self.packed, o), s) for o, s in self.related(ordinal, limit)]
+
+    def close(self):
+        self.packed.close()
+
+
+def write_related_verses(bible_data, translation, output_path, top_k=DEFAULT_TOP_K, block_size=DEFAULT_BLOCK_SIZE):
+    """Build and write a translation's related-verse index, returning its stats"""
+    arrays, stats = build_related_verses(bible_data, top_k, block_size)
+    meta = dict(stats, translation=translation, format=RELATED_INDEX_VERSION,
+                source_version=manifest_version(build_manifest(bible_data)))
+    stats["bytes"] = write_packed(output_path, arrays, meta)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute related verses from TF-IDF similarity")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="rows per similarity block")
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--related", metavar="REFERENCE", help="show related verses from an existing index")
+    args = parser.parse_args()
+
+    output_path = args.output or related_index_path(args.translation)
+
+    if args.related:
+        index = RelatedVerses(output_path)
+        results = index.related_references(args.related)
+        for reference, score in results:
+            print(f"  {score:.3f}  {reference}")
+        return 0 if results else 1
+
+    with pipeline_profile.stage("load"):
+        bible_data = load_json_file(data_paths.translation_path(args.translation))
+    if bible_data is None:
+        return 1
+
+    try:
+        stats = write_related_verses(bible_data, args.translation, output_path, args.top_k, args.block_size)
+    except ImportError as e:
+        print(f"Error: numpy and scipy are required ({e})")
+        return 1
+
+    print(f"Top {stats['top_k']} related verses for {stats['verses']} verses over {stats['terms']} terms")
+    print(f"Related-verse index saved to {output_path} ({stats['bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "build_related_verses")
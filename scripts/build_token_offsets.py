@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Script to build per-verse token offset tables for search-hit highlighting and snippets
+
+For every verse of a translation the index stores where each word (as
+bible_text.tokenize() sees it) starts and ends, as packed uint16 arrays in
+CSR form aligned with the verse ordinals of the other indexes:
+
+    verse_token_ptr[ordinal] .. verse_token_ptr[ordinal + 1]   tokens of one verse
+    token_start[i], token_end[i]                               offsets into the verse text
+
+Offsets count UTF-16 code units so the app can slice Dart strings with them
+directly; for the Basic Multilingual Plane they equal Python string indexes.
+A search hit plus its token index is enough to highlight the word or cut a
+snippet around it without tokenizing again.
+
+Usage:
+    python build_token_offsets.py --translation KJV
+    python build_token_offsets.py --translation KJV --show "Hosea 1:2" --word whoredom
+"""
+
+import argparse
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, load_json_file, manifest_version
+from bible_text import lemmas, tokenize
+from packed_arrays import PackedFile, typed_array, write_packed
+
+TOKEN_OFFSETS_VERSION = 1
+MAX_OFFSET = 0xFFFF
+
+
+def token_offsets_path(translation):
+    """Return the default output path of a translation's token offset tables"""
+    return data_paths.build_path(f"offsets_{translation.lower()}.bin")
+
+
+def _utf16_positions(text):
+    """Return the UTF-16 offset of every code point index of text (and of its end)"""
+    positions = [0]
+    for char in text:
+        positions.append(positions[-1] + (2 if ord(char) > 0xFFFF else 1))
+    return positions
+
+
+def _needs_utf16(text):
+    return bool(text) and max(text) > "\uffff"
+
+
+def build_token_offsets(bible_data):
+    """Stream a translation once and return (arrays, stats) for its token offsets"""
+    verse_table = bible_canon.new_verse_table()
+    verse_token_ptr = typed_array('I', [0])
+    token_start = typed_array('H')
+    token_end = typed_array('H')
+
+    for ordinal, book_idx, chapter, verse, text in bible_canon.iter_verses(bible_data):
+        bible_canon.add_verse(verse_table, book_idx, chapter, verse)
+        positions = _utf16_positions(text) if _needs_utf16(text) else None
+        for start, end, _ in tokenize(text):
+            if positions is not None:
+                start, end = positions[start], positions[end]
+            if end > MAX_OFFSET:
+                raise ValueError(f"{bible_canon.format_reference(book_idx, chapter, verse)} is too long for uint16 offsets")
+            token_start.append(start)
+            token_end.append(end)
+        verse_token_ptr.append(len(token_start))
+
+    arrays = {
+        "verse_token_ptr": verse_token_ptr,
+        "token_start": token_start,
+        "token_end": token_end,
+    }
+    arrays.update(verse_table)
+
+    stats = {
+        "tokens": len(token_start),
+        "verses": len(verse_token_ptr) - 1,
+    }
+    return arrays, stats
+
+
+class TokenOffsets:
+    """Token spans of every verse, and highlighting and snippets built from them"""
+
+    def __init__(self, path=None, buffer=None):
+        self.packed = PackedFile(path, buffer)
+        self.meta = self.packed.meta
+        self.ptr = self.packed.array("verse_token_ptr")
+        self.starts = self.packed.array("token_start")
+        self.ends = self.packed.array("token_end")
+
+    def __len__(self):
+        return len(self.ptr) - 1
+
+    def spans(self, ordinal):
+        """Return [(start, end)] of every token of a verse"""
+        first, last = self.ptr[ordinal], self.ptr[ordinal + 1]
+        return list(zip(self.starts[first:last], self.ends[first:last]))
+
+    def _python_spans(self, ordinal, text):
+        """Return spans as Python string indexes for a verse's text"""
+        spans = self.spans(ordinal)
+        if not _needs_utf16(text):
+            return spans
+        index = {offset: i for i, offset in enumerate(_utf16_positions(text))}
+        return [(index[start], index[end]) for start, end in spans]
+
+    def highlight(self, ordinal, text, tokens, before="[", after="]"):
+        """Return text with the given token indexes wrapped in before/after markers"""
+        spans = self._python_spans(ordinal, text)
+        parts = []
+        position = 0
+        for token in sorted(set(tokens)):
+            start, end = spans[token]
+            parts += [text[position:start], before, text[start:end], after]
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def snippet(self, ordinal, text, token, radius=6, before="[", after="]"):
+        """Return up to radius words either side of a hit, with the hit marked"""
+        spans = self._python_spans(ordinal, text)
+        first = max(0, token - radius)
+        last = min(len(spans) - 1, token + radius)
+        start, end = spans[token]
+        return "".join([
+            "..." if first > 0 else "",
+            text[spans[first][0]:start], before, text[start:end], after, text[end:spans[last][1]],
+            "..." if last < len(spans) - 1 else "",
+        ])
+
+    def close(self):
+        self.packed.close()
+
+
+def write_token_offsets(bible_data, translation, output_path):
+    """Build and write a translation's token offsets, returning their stats"""
+    arrays, stats = build_token_offsets(bible_data)
+    meta = dict(stats, translation=translation, format=TOKEN_OFFSETS_VERSION, units="utf-16",
+                source_version=manifest_version(build_manifest(bible_data)))
+    stats["bytes"] = write_packed(output_path, arrays, meta)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-verse token offset tables for highlighting")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--show", metavar="REFERENCE", help="print a verse from an existing table")
+    parser.add_argument("--word", help="with --show, highlight this word (matched by lemma)")
+    args = parser.parse_args()
+
+    output_path = args.output or token_offsets_path(args.translation)
+
+    with pipeline_profile.stage("load"):
+        bible_data = load_json_file(data_paths.translation_path(args.translation))
+    if bible_data is None:
+        return 1
+
+    if args.show:
+        offsets = TokenOffsets(output_path)
+        book_idx, chapter, verse = bible_canon.parse_reference(args.show)
+        ordinal = bible_canon.verse_ordinal(offsets.packed, book_idx, chapter, verse or 1)
+        if ordinal < 0:
+            print(f"{args.show} is not in {args.translation}")
+            return 1
+        text = next(t for o, _, _, _, t in bible_canon.iter_verses(bible_data) if o == ordinal)
+        wanted = set(lemmas(args.word)) if args.word else set()
+        spans = offsets.spans(ordinal)
+        hits = [i for i, (start, end) in enumerate(spans) if set(lemmas(text[start:end])) & wanted]
+        print(offsets.highlight(ordinal, text, hits))
+        for hit in hits:
+            print("  " + offsets.snippet(ordinal, text, hit))
+        return 0
+
+    with pipeline_profile.stage("build"):
+        stats = write_token_offsets(bible_data, args.translation, output_path)
+
+    print(f"{stats['tokens']} token spans in {stats['verses']} verses")
+    print(f"Token offsets saved to {output_path} ({stats['bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "build_token_offsets")
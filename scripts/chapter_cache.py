@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Chapter reader that loads chapters on demand behind an LRU cache bounded in bytes
+
+Tools that read the Bible assets either load a whole translation
+(load_json_file) or nothing. ChapterReader loads single chapters from
+per-chapter storage instead and keeps the decoded verses in an LRU cache
+whose bound is the memory the cached chapters take (Python object sizes),
+not their number, since Psalm 119 is sixty times the size of Psalm 117.
+
+Sources:
+    StoreSource    the packed chapter store (build_chapter_store.py)
+    StaticSource   the per-chapter JSON files of the web build (render_static_chapters.py)
+
+With prefetch enabled, reading a chapter also loads the next one on a
+background thread, which is what sequential readers (reading plans, the
+chapter pager) ask for next. Hits, misses, evictions and prefetches are
+counted so the capacity can be tuned against the hit rate; --simulate
+replays a reading-plan or hot-chapter workload at several capacities.
+
+Usage:
+    python chapter_cache.py --translation KJV --show "John 3"
+    python chapter_cache.py --translation KJV --simulate plan --capacity 256KB --capacity 1MB --prefetch
+    python chapter_cache.py --translation KJV --source static --simulate hot
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from build_chapter_store import ChapterStore, chapter_store_path
+from pipeline_profile import format_bytes
+from render_static_chapters import chapter_url
+
+DEFAULT_CAPACITY = 4 * 1024 * 1024
+SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*$", re.I)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value):
+    """Parse a byte size such as 512KB, 4MB or 1048576"""
+    match = SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def chapter_bytes(verses):
+    """Return the memory taken by a chapter's list of verse strings"""
+    return sys.getsizeof(verses) + sum(sys.getsizeof(verse) for verse in verses)
+
+
+class StoreSource:
+    """Chapters from a packed chapter store"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def chapters(self):
+        return [self.store.chapter(index) for index in range(len(self.store))]
+
+    def load(self, book_idx, chapter):
+        index = self.store.chapter_index(book_idx, chapter)
+        if index < 0:
+            return None
+        return [text for _, text in self.store.verses(index)]
+
+    def next_chapter(self, book_idx, chapter):
+        index = self.store.chapter_index(book_idx, chapter)
+        if index < 0 or index + 1 >= len(self.store):
+            return None
+        return self.store.chapter(index + 1)
+
+
+class StaticSource:
+    """Chapters from the per-chapter JSON files of the web build"""
+
+    def __init__(self, translation, output_dir=None):
+        self.translation = translation
+        self.output_dir = output_dir or data_paths.WEB_BUILD_DIR
+
+    def _path(self, book_idx, chapter):
+        return self.output_dir + chapter_url(self.translation, book_idx, chapter, "json")
+
+    def load(self, book_idx, chapter):
+        try:
+            with open(self._path(book_idx, chapter), 'r', encoding='utf-8') as f:
+                return [verse["text"] for verse in json.load(f)["verses"]]
+        except FileNotFoundError:
+            return None
+
+    def chapters(self):
+        found = []
+        for book_idx in range(len(bible_canon.BOOKS)):
+            chapter = 1
+            while self.load(book_idx, chapter) is not None:
+                found.append((book_idx, chapter))
+                chapter += 1
+        return found
+
+    def next_chapter(self, book_idx, chapter):
+        # Without a table of contents, guess the next chapter and then the next book
+        for candidate in [(book_idx, chapter + 1)] + [(b, 1) for b in range(book_idx + 1, len(bible_canon.BOOKS))]:
+            try:
+                with open(self._path(*candidate), 'rb'):
+                    return candidate
+            except FileNotFoundError:
+                continue
+        return None
+
+
+class ChapterReader:
+    """On-demand chapter loading through a byte-bounded LRU cache"""
+
+    def __init__(self, source, capacity=DEFAULT_CAPACITY, prefetch=False):
+        self.source = source
+        self.capacity = capacity
+        self.cache = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetches = 0
+        self.prefetch_hits = 0
+        self._prefetched = set()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def _store(self, key, verses, prefetched=False):
+        """Insert a chapter and evict the least recently used ones beyond the capacity"""
+        size = chapter_bytes(verses)
+        if size > self.capacity:
+            return
+        with self._lock:
+            if key in self.cache:
+                return
+            self.cache[key] = (verses, size)
+            self.size += size
+            if prefetched:
+                self._prefetched.add(key)
+            while self.size > self.capacity:
+                evicted, (_, evicted_size) = self.cache.popitem(last=False)
+                self.size -= evicted_size
+                self._prefetched.discard(evicted)
+                self.evictions += 1
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                self.prefetch_hits += 1
+            return entry[0]
+
+    def _prefetch(self, key):
+        verses = self.source.load(*key)
+        if verses is not None:
+            self._store(key, verses, prefetched=True)
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _schedule_prefetch(self, book_idx, chapter):
+        following = self.source.next_chapter(book_idx, chapter)
+        if following is None:
+            return
+        with self._lock:
+            if following in self.cache or following in self._pending:
+                return
+            self.prefetches += 1
+            self._pending[following] = self._executor.submit(self._prefetch, following)
+
+    def chapter(self, book_idx, chapter):
+        """Return a chapter's verses, or None if the source lacks it"""
+        key = (book_idx, chapter)
+        verses = self._lookup(key)
+        if verses is None:
+            with self._lock:
+                pending = self._pending.get(key)
+            if pending is not None:
+                pending.result()
+                verses = self._lookup(key)
+        if verses is None:
+            with self._lock:
+                self.misses += 1
+            verses = self.source.load(book_idx, chapter)
+            if verses is None:
+                return None
+            self._store(key, verses)
+        if self._executor is not None:
+            self._schedule_prefetch(book_idx, chapter)
+        return verses
+
+    def verse(self, book_idx, chapter, verse):
+        """Return one verse's text, or None"""
+        verses = self.chapter(book_idx, chapter)
+        if verses is None or not 0 < verse <= len(verses):
+            return None
+        return verses[verse - 1]
+
+    def stats(self):
+        """Return the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "prefetches": self.prefetches,
+                "prefetch_hits": self.prefetch_hits,
+                "entries": len(self.cache),
+                "bytes": self.size,
+                "capacity": self.capacity,
+            }
+
+    def clear(self):
+        """Drop every cached chapter (counters are kept)"""
+        with self._lock:
+            self.cache.clear()
+            self._prefetched.clear()
+            self.size = 0
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+def simulate(reader, chapters, workload, requests, readers=20, seed=0):
+    """Replay a workload against a reader; return elapsed seconds
+
+    plan: readers interleaved, each reading chapters in canonical order from a
+    random starting point. hot: chapters chosen with a Zipf-like popularity.
+    """
+    rng = random.Random(seed)
+    if workload == "plan":
+        positions = [rng.randrange(len(chapters)) for _ in range(readers)]
+        keys = []
+        for step in range(requests):
+            reader_idx = step % readers
+            keys.append(chapters[positions[reader_idx] % len(chapters)])
+            positions[reader_idx] += 1
+    else:
+        popularity = list(chapters)
+        rng.shuffle(popularity)
+        weights = [1 / rank for rank in range(1, len(popularity) + 1)]
+        keys = rng.choices(popularity, weights, k=requests)
+
+    started = time.perf_counter()
+    for key in keys:
+        reader.chapter(*key)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read chapters on demand through a byte-bounded LRU cache")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("--source", default="store", choices=["store", "static"],
+                        help="packed chapter store or the web build's per-chapter JSON")
+    parser.add_argument("--capacity", action="append", help="cache bound, e.g. 512KB or 4MB (repeatable)")
+    parser.add_argument("--prefetch", action="store_true", help="load the next chapter in the background")
+    parser.add_argument("--show", metavar="REFERENCE", help="print a chapter or verse")
+    parser.add_argument("--simulate", choices=["plan", "hot"], help="replay a workload and print the counters")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    try:
+        capacities = [parse_size(value) for value in args.capacity or [str(DEFAULT_CAPACITY)]]
+    except ValueError as e:
+        parser.error(str(e))
+
+    store = None
+    if args.source == "store":
+        try:
+            store = ChapterStore(chapter_store_path(args.translation))
+        except FileNotFoundError:
+            print(f"Error: no chapter store for {args.translation}; run build_chapter_store.py first")
+            return 1
+        source = StoreSource(store)
+    else:
+        source = StaticSource(args.translation)
+
+    if args.show:
+        reader = ChapterReader(source, capacities[0], args.prefetch)
+        book_idx, chapter, verse = bible_canon.parse_reference(args.show)
+        verses = reader.chapter(book_idx, chapter)
+        reader.close()
+        if verses is None or (verse is not None and not 0 < verse <= len(verses)):
+            print(f"{args.show} is not in {args.translation}")
+            return 1
+        for number, text in enumerate(verses, 1):
+            if verse is None or number == verse:
+                print(f"{number} {text}")
+        return 0
+
+    if not args.simulate:
+        parser.error("pass --show or --simulate")
+    chapters = source.chapters()
+    if not chapters:
+        print(f"Error: no chapters found for {args.translation}")
+        return 1
+    print(f"{args.simulate} workload: {args.requests} requests over {len(chapters)} chapters"
+          f"{' with prefetch' if args.prefetch else ''}")
+    for capacity in capacities:
+        reader = ChapterReader(source, capacity, args.prefetch)
+        with pipeline_profile.stage(f"simulate {format_bytes(capacity)}"):
+            elapsed = simulate(reader, chapters, args.simulate, args.requests)
+        reader.close()
+        stats = reader.stats()
+        print(f"  {format_bytes(capacity):>9}: hit rate {stats['hit_rate']:6.1%}, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions, {stats['prefetch_hits']}/{stats['prefetches']} prefetches used, "
+              f"{stats['entries']} chapters in {format_bytes(stats['bytes'])}, "
+              f"{elapsed / args.requests * 1e6:.1f} us/request")
+    if store is not None:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "chapter_cache")
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+churchlink-data: single entry point for the Bible data pipeline
+
+Usage:
+    python churchlink_data.py --help
+    python churchlink_data.py paths
+    python churchlink_data.py fetch kjv
+    python churchlink_data.py parse
+    python churchlink_data.py fix verses + fix complete + validate + export pool
+    python churchlink_data.py watch
+
+Stages separated by "+" run in one process and share loaded assets, which are
+written back once when the chain ends, or earlier when a stage that works on
+the asset files directly (pages, ingest, convert, watch) runs next. If a stage
+fails, the edits not yet written are discarded. Each subcommand imports its pipeline
+module (and requests, PIL, ...) only when it runs. The --timings, --profile
+and --trace-malloc flags from pipeline_profile apply to the whole chain.
+"""
+
+import argparse
+import os
+import sys
+
+import data_paths
+import pipeline_profile
+
+CHAIN_SEPARATOR = "+"
+
+
+class Workspace:
+    """Assets loaded by one invocation, shared by every stage of a chain"""
+
+    def __init__(self):
+        self._assets = {}
+        self._dirty = set()
+        self._kjv_source = None
+
+    def load(self, filename):
+        """Return an asset's data, reading it from disk on first use"""
+        if filename not in self._assets:
+            import json
+            path = data_paths.asset_path(filename)
+            try:
+                with open(path, 'r', encoding='utf-8-sig') as f:
+                    self._assets[filename] = json.load(f)
+            except Exception as e:
+                print(f"Error loading {path}: {e}")
+                self._assets[filename] = None
+        return self._assets[filename]
+
+    def translation(self, translation):
+        """Return a translation's data"""
+        return self.load(data_paths.translation_filename(translation))
+
+    def store(self, filename, data):
+        """Replace an asset's data and mark it for saving"""
+        self._assets[filename] = data
+        self._dirty.add(filename)
+
+    def store_translation(self, translation, data):
+        """Replace a translation's data and mark it for saving"""
+        self.store(data_paths.translation_filename(translation), data)
+
+    def kjv_source(self):
+        """Return the KJV source text"""
+        if self._kjv_source is None:
+            with open(data_paths.KJV_SOURCE, 'r', encoding='utf-8') as f:
+                self._kjv_source = f.read()
+        return self._kjv_source
+
+    def set_kjv_source(self, text):
+        """Replace the KJV source text and write it to disk"""
+        with open(data_paths.KJV_SOURCE, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self._kjv_source = text
+
+    def flush(self):
+        """Write every modified asset back to disk"""
+        import json
+        ok = True
+        for filename in sorted(self._dirty):
+            path = data_paths.asset_path(filename)
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(self._assets[filename], f, indent=2, ensure_ascii=False)
+                print(f"Successfully saved {path}")
+            except Exception as e:
+                print(f"Error saving {path}: {e}")
+                ok = False
+        self._dirty.clear()
+        return ok
+
+    def forget(self):
+        """Drop every loaded asset so later stages read the files again"""
+        self._assets.clear()
+        self._kjv_source = None
+
+
+def cmd_paths(args, workspace):
+    """Print the shared path configuration"""
+    for name in ("ROOT_DIR", "SCRIPTS_DIR", "ASSETS_DIR", "BUILD_DIR", "WEB_BUILD_DIR", "MEDIA_BUILD_DIR", "KJV_SOURCE"):
+        print(f"{name:<16} {getattr(data_paths, name)}")
+    return 0
+
+
+def cmd_fetch(args, workspace):
+    """Fetch or create translation source data"""
+    if args.source == "kjv":
+        import fetch_bible_kjv
+        import source_ir
+        print("Downloading KJV text...")
+        workspace.set_kjv_source(fetch_bible_kjv.download_text(fetch_bible_kjv.KJV_URL))
+        workspace.store_translation("KJV", source_ir.cached_parse_text(
+            workspace.kjv_source(), "fetch_bible_kjv", fetch_bible_kjv.PARSER_VERSION, fetch_bible_kjv.parse_kjv))
+    elif args.source == "niv-api":
+        import fetch_niv_api
+        workspace.store_translation("NIV", fetch_niv_api.fetch_bible())
+    else:
+        import copy
+        translation = args.source.upper()
+        kjv_data = workspace.translation("KJV")
+        if kjv_data is None:
+            return 1
+        print(f"Copying KJV data as {translation} placeholder...")
+        workspace.store_translation(translation, copy.deepcopy(kjv_data))
+    return 0
+
+
+def cmd_parse(args, workspace):
+    """Parse the KJV source text into bible_kjv.json"""
+    import parse_kjv
+    import source_ir
+    if not os.path.exists(data_paths.KJV_SOURCE):
+        print(f"Error: {data_paths.KJV_SOURCE} not found")
+        return 1
+    workspace.store_translation("KJV", source_ir.cached_parse_text(
+        workspace.kjv_source(), "parse_kjv", parse_kjv.PARSER_VERSION, parse_kjv.parse_kjv))
+    return 0
+
+
+def cmd_fix(args, workspace):
+    """Run one of the Bible data fix steps"""
+    if args.step == "verses":
+        import fix_bible_verses
+        import source_ir
+        kjv_data = source_ir.cached_parse_text(
+            workspace.kjv_source(), "fix_bible_verses", fix_bible_verses.PARSER_VERSION, fix_bible_verses.parse_kjv_text)
+        for translation in data_paths.TRANSLATIONS:
+            bible_data = workspace.translation(translation)
+            if bible_data is None:
+                continue
+            updated = fix_bible_verses.update_bible_data(kjv_data, bible_data)
+            print(f"Updated {updated} verses in {translation}")
+            if updated:
+                workspace.store_translation(translation, bible_data)
+
+    elif args.step == "data":
+        import fix_bible_data
+        kjv_data = workspace.load('bible_kjv_fixed.json')
+        niv_data = workspace.translation("NIV")
+        if not kjv_data or not niv_data:
+            return 1
+        workspace.store_translation("NIV", fix_bible_data.fix_niv_file(kjv_data, niv_data))
+        workspace.store_translation("ESV", fix_bible_data.fix_esv_file(kjv_data))
+
+    elif args.step == "complete":
+        import complete_bible_fix
+        for translation in data_paths.TRANSLATIONS:
+            bible_data = workspace.translation(translation) or {"books": {}}
+            fixed_data = complete_bible_fix.fix_bible_data(bible_data)
+            complete_bible_fix.verify_bible_structure(fixed_data)
+            workspace.store_translation(translation, fixed_data)
+
+    elif args.step == "structure":
+        import copy
+        import complete_bible_structure
+        complete_bible = complete_bible_structure.create_complete_bible()
+        for translation in data_paths.TRANSLATIONS:
+            workspace.store_translation(translation, copy.deepcopy(complete_bible))
+
+    return 0
+
+
+def cmd_validate(args, workspace):
+    """Check every translation for missing books, chapters and placeholders"""
+    import verify_bible_data
+    failed = False
+    for translation in data_paths.TRANSLATIONS:
+        bible_data = workspace.translation(translation)
+        problems = ["File could not be loaded"] if bible_data is None else verify_bible_data.validate_bible_data(bible_data)
+        if problems:
+            failed = True
+            print(f"✗ {translation}: {len(problems)} problems")
+            for problem in problems[:args.limit]:
+                print(f"  {problem}")
+        else:
+            print(f"✓ {translation} Bible data is complete")
+    return 1 if failed else 0
+
+
+def cmd_export(args, workspace):
+    """Export derived assets from the current translations"""
+    import json
+
+    if args.target == "pool":
+        import bible_pool
+        translations = [(t, workspace.translation(t)) for t in data_paths.TRANSLATIONS if workspace.translation(t)]
+        pool_data = bible_pool.build_pool(translations)
+        if not bible_pool.verify_pool(pool_data):
+            return 1
+        output = args.output or data_paths.asset_path('bible_pool.json')
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(pool_data, f, ensure_ascii=False, separators=(',', ':'))
+        print(f"Pool saved to {output} ({os.path.getsize(output)} bytes)")
+        return 0
+
+    if args.target == "arrow":
+        import export_arrow
+        for translation in data_paths.TRANSLATIONS:
+            bible_data = workspace.translation(translation)
+            if bible_data is None:
+                continue
+            table = export_arrow.verse_table(translation, bible_data)
+            parquet_bytes, arrow_bytes = export_arrow.write_table(table, f"verses_{translation.lower()}")
+            print(f"{translation}: {table.num_rows} verses, parquet {parquet_bytes} bytes, arrow {arrow_bytes} bytes")
+        plans_data = workspace.load('reading_plans.json')
+        if plans_data is not None:
+            export_arrow.write_table(export_arrow.reading_plan_table(plans_data)[0], "reading_plans")
+        cross_references = workspace.load('cross_references.json')
+        if cross_references is not None:
+            export_arrow.write_table(export_arrow.cross_reference_table(cross_references)[0], "cross_references")
+        return 0
+
+    import bible_delta
+    bible_data = workspace.translation(args.translation)
+    if bible_data is None:
+        return 1
+
+    if args.target == "manifest":
+        manifest = bible_delta.build_manifest(bible_data)
+        output = args.output or data_paths.build_path(f"{args.translation.lower()}_manifest.json")
+        return 0 if bible_delta.save_json_file(output, {"version": bible_delta.manifest_version(manifest), "books": manifest}) else 1
+
+    if not args.base:
+        print("Error: export delta needs --base")
+        return 1
+    key = bible_delta.get_signing_key()
+    old_data = bible_delta.load_json_file(args.base)
+    if key is None or old_data is None:
+        return 1
+    bundle = bible_delta.create_delta(old_data, bible_data, key, args.translation)
+    output = args.output or data_paths.build_path(f"{args.translation.lower()}_delta.json")
+    print(f"{len(bundle['changes'])} changed and {len(bundle['removed'])} removed chapters")
+    return 0 if bible_delta.save_json_file(output, bundle, compact=True) else 1
+
+
+def cmd_index(args, workspace):
+    """Build a lookup index for a translation"""
+    bible_data = workspace.translation(args.translation)
+    if bible_data is None:
+        return 1
+
+    if args.target == "concordance":
+        import build_concordance
+        output = args.output or build_concordance.concordance_path(args.translation)
+        stats = build_concordance.write_concordance(bible_data, args.translation, output)
+        print(f"{stats['lemmas']} lemmas from {stats['tokens']} words in {stats['verses']} verses")
+    elif args.target == "fuzzy":
+        import build_fuzzy_index
+        output = args.output or build_fuzzy_index.fuzzy_index_path(args.translation)
+        stats = build_fuzzy_index.write_fuzzy_index(bible_data, args.translation, output)
+        print(f"{stats['words']} words, {stats['deletes']} delete keys, {stats['verses']} verses")
+    elif args.target == "related":
+        import build_related_verses
+        output = args.output or build_related_verses.related_index_path(args.translation)
+        stats = build_related_verses.write_related_verses(bible_data, args.translation, output)
+        print(f"Top {stats['top_k']} related verses for {stats['verses']} verses over {stats['terms']} terms")
+    elif args.target == "offsets":
+        import build_token_offsets
+        output = args.output or build_token_offsets.token_offsets_path(args.translation)
+        stats = build_token_offsets.write_token_offsets(bible_data, args.translation, output)
+        print(f"{stats['tokens']} token spans in {stats['verses']} verses")
+    elif args.target == "chapters":
+        import build_chapter_store
+        output = args.output or build_chapter_store.chapter_store_path(args.translation)
+        stats = build_chapter_store.write_chapter_store(bible_data, args.translation, output)
+        print(f"{stats['chapters']} chapters, {stats['verses']} verses")
+
+    print(f"Index saved to {output} ({os.path.getsize(output)} bytes)")
+    return 0
+
+
+def cmd_plan(args, workspace):
+    """Generate a balanced reading plan and add it to reading_plans.json"""
+    import generate_reading_plan
+    bible_data = workspace.translation(args.translation)
+    plans_data = workspace.load('reading_plans.json')
+    if bible_data is None or plans_data is None:
+        return 1
+    weights, _ = generate_reading_plan.chapter_weights(bible_data)
+    try:
+        plan, day_words = generate_reading_plan.generate_plan(weights, args.scope, args.days, args.plan_id, args.name)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    plans_data["plans"] = [p for p in plans_data.get("plans", []) if p.get("id") != plan["id"]] + [plan]
+    workspace.store('reading_plans.json', plans_data)
+    print(f"{plan['name']}: {min(day_words):,}-{max(day_words):,} words per day")
+    return 0
+
+
+def cmd_notify(args, workspace):
+    """Build the day's reading-plan notifications as FCM multicast NDJSON"""
+    import plan_notifications
+    plans_data = workspace.load('reading_plans.json')
+    if plans_data is None:
+        return 1
+    with open(args.subscriptions, 'r', encoding='utf-8-sig') as f:
+        groups, stats = plan_notifications.group_subscriptions(plan_notifications.iter_subscriptions(f))
+    resolver = plan_notifications.PlanResolver(plans_data, workspace.translation)
+    messages = plan_notifications.build_messages(groups, resolver)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        count, tokens = plan_notifications.write_ndjson(messages, f)
+    print(f"{resolver.resolved} plan days resolved into {count} messages for {tokens} devices in {args.output}")
+    return 0
+
+
+def cmd_icons(args, workspace):
+    """Generate the web app icons"""
+    sys.path.insert(0, data_paths.ROOT_DIR)
+    import generate_icons
+    generate_icons.main()
+    return 0
+
+
+def cmd_pages(args, workspace):
+    """Pre-render static chapter pages into the web build"""
+    import render_static_chapters
+    stats = render_static_chapters.render_static_chapters(args.translation or data_paths.TRANSLATIONS,
+                                                          args.output, args.base_url, args.workers)
+    print(f"{stats['chapters']} chapters rendered ({stats['written']} pages written) into {args.output}")
+    return 0 if stats["chapters"] else 1
+
+
+def cmd_ingest(args, workspace):
+    """Stream a Gutenberg, OSIS or USFM source into a translation asset"""
+    import source_parsers
+    output = args.output or data_paths.translation_path(args.translation)
+    stats = source_parsers.ingest_source(args.source, output, args.source_format)
+    print(f"{args.translation}: {stats['chapters']} chapters, {stats['verses']} verses saved to {output}")
+    return 0
+
+
+def cmd_convert(args, workspace):
+    """Stream a Bible file into the array or object layout"""
+    import stream_layout
+    stats = stream_layout.convert_layout(args.input, args.output, args.layout, args.compact)
+    print(f"{stats['chapters']} chapters converted to the {args.layout} layout in {args.output}")
+    return 0
+
+
+def cmd_watch(args, workspace):
+    """Rebuild translations incrementally while source files change"""
+    import pipeline_watch
+    return pipeline_watch.watch(args.source, args.debounce, args.poll)
+
+
+def cmd_media(args, workspace):
+    """Generate resized derivatives of uploaded images"""
+    import image_derivatives
+    generated = failed = 0
+    sources = image_derivatives.iter_sources(args.paths, args.output)
+    for entry in image_derivatives.process_images(sources, args.output, args.workers, args.force):
+        if 'error' in entry:
+            print(f"Error processing {entry['source']}: {entry['error']}")
+            failed += 1
+        elif not entry['cached']:
+            generated += 1
+    print(f"{generated} images generated into {args.output}")
+    return 1 if failed else 0
+
+
+def build_parser():
+    """Build the argument parser for one stage of a chain"""
+    parser = argparse.ArgumentParser(
+        prog="churchlink-data",
+        description="ChurchLink Bible data pipeline",
+        epilog='Chain stages with "+", e.g. churchlink-data fix verses + validate. '
+               'Profiling flags: --timings, --profile DIR, --trace-malloc N.',
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    paths_parser = subparsers.add_parser("paths", help="show the shared path configuration")
+    paths_parser.set_defaults(handler=cmd_paths)
+
+    fetch_parser = subparsers.add_parser("fetch", help="fetch or create translation data")
+    fetch_parser.add_argument("source", choices=["kjv", "niv", "esv", "niv-api"])
+    fetch_parser.set_defaults(handler=cmd_fetch)
+
+    parse_parser = subparsers.add_parser("parse", help="parse KJV.txt into bible_kjv.json")
+    parse_parser.set_defaults(handler=cmd_parse)
+
+    fix_parser = subparsers.add_parser("fix", help="fill in missing or placeholder data")
+    fix_parser.add_argument("step", choices=["verses", "data", "complete", "structure"])
+    fix_parser.set_defaults(handler=cmd_fix)
+
+    validate_parser = subparsers.add_parser("validate", help="check translations for missing data")
+    validate_parser.add_argument("--limit", type=int, default=10, help="problems to list per translation")
+    validate_parser.set_defaults(handler=cmd_validate)
+
+    export_parser = subparsers.add_parser("export", help="export derived assets")
+    export_parser.add_argument("target", choices=["pool", "manifest", "delta", "arrow"])
+    export_parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    export_parser.add_argument("--base", help="previous build to diff against (delta)")
+    export_parser.add_argument("-o", "--output")
+    export_parser.set_defaults(handler=cmd_export)
+
+    index_parser = subparsers.add_parser("index", help="build lookup indexes")
+    index_parser.add_argument("target", choices=["concordance", "fuzzy", "related", "chapters", "offsets"])
+    index_parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    index_parser.add_argument("-o", "--output")
+    index_parser.set_defaults(handler=cmd_index)
+
+    plan_parser = subparsers.add_parser("plan", help="generate a balanced reading plan into reading_plans.json")
+    plan_parser.add_argument("--scope", default="bible", help="bible, ot, nt, a book or 'Book-Book'")
+    plan_parser.add_argument("--days", type=int, required=True)
+    plan_parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    plan_parser.add_argument("--id", dest="plan_id")
+    plan_parser.add_argument("--name")
+    plan_parser.set_defaults(handler=cmd_plan)
+
+    notify_parser = subparsers.add_parser("notify", help="build reading-plan notifications for FCM multicast")
+    notify_parser.add_argument("subscriptions", help="NDJSON or JSON subscription records")
+    notify_parser.add_argument("-o", "--output", required=True)
+    notify_parser.set_defaults(handler=cmd_notify)
+
+    icons_parser = subparsers.add_parser("icons", help="generate web app icons")
+    icons_parser.set_defaults(handler=cmd_icons)
+
+    ingest_parser = subparsers.add_parser("ingest", help="ingest an OSIS, USFM or Gutenberg source")
+    ingest_parser.add_argument("source", help="source file, or a directory of USFM files")
+    ingest_parser.add_argument("--translation", required=True)
+    ingest_parser.add_argument("--format", dest="source_format", choices=["gutenberg", "osis", "usfm"])
+    ingest_parser.add_argument("-o", "--output")
+    ingest_parser.set_defaults(handler=cmd_ingest, uses_files=True)
+
+    convert_parser = subparsers.add_parser("convert", help="stream a Bible file into another layout")
+    convert_parser.add_argument("input")
+    convert_parser.add_argument("output")
+    convert_parser.add_argument("--to", dest="layout", required=True, choices=["array", "object"])
+    convert_parser.add_argument("--compact", action="store_true")
+    convert_parser.set_defaults(handler=cmd_convert, uses_files=True)
+
+    pages_parser = subparsers.add_parser("pages", help="pre-render static chapter pages for the web build")
+    pages_parser.add_argument("--translation", action="append", choices=data_paths.TRANSLATIONS)
+    pages_parser.add_argument("-o", "--output", default=data_paths.WEB_BUILD_DIR)
+    pages_parser.add_argument("--base-url", help="site origin for the sitemap (default: the Firebase Hosting site)")
+    pages_parser.add_argument("--workers", type=int)
+    pages_parser.set_defaults(handler=cmd_pages, uses_files=True)
+
+    watch_parser = subparsers.add_parser("watch", help="rebuild translations as KJV.txt and assets change")
+    watch_parser.add_argument("--source", default=data_paths.KJV_SOURCE)
+    watch_parser.add_argument("--debounce", type=int, default=150, help="quiet period in milliseconds")
+    watch_parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    watch_parser.set_defaults(handler=cmd_watch, uses_files=True)
+
+    media_parser = subparsers.add_parser("media", help="generate image derivatives")
+    media_parser.add_argument("paths", nargs="+", help="image files or directories")
+    media_parser.add_argument("-o", "--output", default=data_paths.MEDIA_BUILD_DIR)
+    media_parser.add_argument("--workers", type=int)
+    media_parser.add_argument("--force", action="store_true")
+    media_parser.set_defaults(handler=cmd_media)
+
+    return parser
+
+
+def split_chain(argv):
+    """Split argv into the argument lists of each chained stage"""
+    stages = [[]]
+    for arg in argv:
+        if arg == CHAIN_SEPARATOR:
+            stages.append([])
+        else:
+            stages[-1].append(arg)
+    return [stage for stage in stages if stage] or [[]]
+
+
+def main():
+    parser = build_parser()
+    stages = [parser.parse_args(stage_argv) for stage_argv in split_chain(sys.argv[1:])]
+
+    workspace = Workspace()
+    for args in stages:
+        uses_files = getattr(args, "uses_files", False)
+        if uses_files:
+            # The stage reads (or rewrites) the asset files itself, so they must be current
+            with pipeline_profile.stage("save"):
+                if not workspace.flush():
+                    return 1
+        with pipeline_profile.stage(args.command):
+            result = args.handler(args, workspace)
+        if uses_files:
+            workspace.forget()
+        if result:
+            print(f"Stage '{args.command}' failed, stopping without saving")
+            return result
+
+    with pipeline_profile.stage("save"):
+        return 0 if workspace.flush() else 1
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "churchlink-data")
@@ -5,7 +5,9 @@ Adds all missing books, chapters, and verses to the Bible navigator
 """
 
 import json
-import os
+
+import data_paths
+import pipeline_profile
 
 # Complete Bible structure with canonical chapter counts
 BIBLE_STRUCTURE = {
@@ -133,8 +135,8 @@ def estimate_verses_for_chapter(book_name, chapter_num, total_chapters):
     else:
         return verse_counts["medium"]
 
-def fix_bible_data(bible_data):
-    """Fix Bible data by adding missing books, chapters, and verses"""
+def fix_bible_data(bible_data, books=None):
+    """Fix Bible data by adding missing books, chapters, and verses (optionally only for some books)"""
     print("Fixing Bible data...")
     
     if "books" not in bible_data:
@@ -144,6 +146,9 @@ def fix_bible_data(bible_data):
     chapters_added = 0
     
     for book_name, book_info in BIBLE_STRUCTURE.items():
+        if books is not None and book_name not in books:
+            continue
+
         if book_name not in bible_data["books"]:
             print(f"Adding missing book: {book_name}")
             bible_data["books"][book_name] = {
@@ -216,34 +221,31 @@ def verify_bible_structure(bible_data):
     return False
 
 def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    assets_dir = os.path.join(script_dir, '..', 'assets')
-    
-    # File paths
-    kjv_file = os.path.join(assets_dir, 'bible_kjv.json')
-    niv_file = os.path.join(assets_dir, 'bible_niv.json')
-    esv_file = os.path.join(assets_dir, 'bible_esv.json')
-    
     # Process each Bible translation
-    for file_path, translation in [(kjv_file, 'KJV'), (niv_file, 'NIV'), (esv_file, 'ESV')]:
+    for translation in data_paths.TRANSLATIONS:
+        file_path = data_paths.translation_path(translation)
         print(f"\n{'='*50}")
         print(f"Processing {translation} Bible")
         print(f"{'='*50}")
         
         # Load existing data
-        bible_data = load_json_file(file_path)
+        with pipeline_profile.stage(f"load {translation}"):
+            bible_data = load_json_file(file_path)
         if bible_data is None:
             print(f"Creating new {translation} Bible data...")
             bible_data = {"books": {}}
         
         # Fix the data
-        fixed_data = fix_bible_data(bible_data)
+        with pipeline_profile.stage(f"fix {translation}"):
+            fixed_data = fix_bible_data(bible_data)
         
         # Verify structure
         is_complete = verify_bible_structure(fixed_data)
         
         # Save the fixed data
-        if save_json_file(file_path, fixed_data):
+        with pipeline_profile.stage(f"save {translation}"):
+            saved = save_json_file(file_path, fixed_data)
+        if saved:
             print(f"✓ {translation} Bible data updated successfully")
         else:
             print(f"✗ Failed to save {translation} Bible data")
@@ -256,4 +258,4 @@ def main():
     print(f"{'='*50}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    pipeline_profile.run(main, "complete_bible_fix")
\ No newline at end of file
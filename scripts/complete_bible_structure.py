@@ -5,7 +5,9 @@ Creates a complete Bible with all 66 books, proper chapter counts, and placehold
 """
 
 import json
-import os
+
+import data_paths
+import pipeline_profile
 
 # Complete Bible structure with exact canonical chapter counts
 COMPLETE_BIBLE_STRUCTURE = {
@@ -202,25 +204,22 @@ def create_complete_bible():
 
 def save_bible_files():
     """Save complete Bible files for all translations"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    assets_dir = os.path.join(script_dir, '..', 'assets')
-    
     # Create complete Bible data
     print("Creating complete Bible structure...")
-    complete_bible = create_complete_bible()
+    with pipeline_profile.stage("create"):
+        complete_bible = create_complete_bible()
     
     # Save for each translation
-    translations = ['kjv', 'niv', 'esv']
-    
-    for translation in translations:
-        filename = f'bible_{translation}.json'
-        filepath = os.path.join(assets_dir, filename)
+    for translation in data_paths.TRANSLATIONS:
+        filename = data_paths.translation_filename(translation)
+        filepath = data_paths.translation_path(translation)
         
-        print(f"Saving {translation.upper()} Bible to {filename}...")
+        print(f"Saving {translation} Bible to {filename}...")
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(complete_bible, f, indent=2, ensure_ascii=False)
+            with pipeline_profile.stage(f"save {translation}"):
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(complete_bible, f, indent=2, ensure_ascii=False)
             print(f"✓ Successfully saved {filename}")
         except Exception as e:
             print(f"✗ Error saving {filename}: {e}")
@@ -275,9 +274,7 @@ def main():
     save_bible_files()
     
     # Verify one of the created files
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    assets_dir = os.path.join(script_dir, '..', 'assets')
-    kjv_file = os.path.join(assets_dir, 'bible_kjv.json')
+    kjv_file = data_paths.translation_path('KJV')
     
     try:
         with open(kjv_file, 'r', encoding='utf-8') as f:
@@ -294,4 +291,4 @@ def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    pipeline_profile.run(main, "complete_bible_structure")
\ No newline at end of file
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Shared path configuration for the Bible data pipeline
+
+All paths are resolved from this file's location so scripts behave the same
+whatever the current directory is. CHURCHLINK_ASSETS_DIR and
+CHURCHLINK_BUILD_DIR override the asset and build output directories,
+CHURCHLINK_WEB_DIR the web build and CHURCHLINK_MEDIA_DIR the image
+derivative cache.
+"""
+
+import os
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+ASSETS_DIR = os.environ.get("CHURCHLINK_ASSETS_DIR", os.path.join(ROOT_DIR, "assets"))
+BUILD_DIR = os.environ.get("CHURCHLINK_BUILD_DIR", os.path.join(ROOT_DIR, "build", "data"))
+WEB_BUILD_DIR = os.environ.get("CHURCHLINK_WEB_DIR", os.path.join(ROOT_DIR, "build", "web"))
+MEDIA_BUILD_DIR = os.environ.get("CHURCHLINK_MEDIA_DIR", os.path.join(ROOT_DIR, "build", "media"))
+
+KJV_SOURCE = os.path.join(SCRIPTS_DIR, "KJV.txt")
+APP_ICON = os.path.join(ASSETS_DIR, "Enhanced app icon fo.png")
+
+TRANSLATIONS = ["KJV", "NIV", "ESV"]
+
+
+def asset_path(filename):
+    """Return the path of a file in the assets directory"""
+    return os.path.join(ASSETS_DIR, filename)
+
+
+def translation_filename(translation):
+    """Return the asset filename of a translation, e.g. bible_kjv.json"""
+    return f"bible_{translation.lower()}.json"
+
+
+def translation_path(translation):
+    """Return the asset path of a translation"""
+    return asset_path(translation_filename(translation))
+
+
+def build_path(*parts):
+    """Return a path in the build output directory, creating its parent"""
+    path = os.path.join(BUILD_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Script to export translations, reading plans and cross references as Arrow and Parquet
+
+Each translation becomes one verse table:
+
+    translation  dictionary<int8, string>   data_paths.TRANSLATIONS, shared by every file
+    book         dictionary<int8, string>   canonical book list, shared by every file
+    testament    dictionary<int8, string>
+    chapter      int16
+    verse        int16
+    ordinal      int32                      position in the translation's verse stream
+    text         string
+
+Reading plans become one row per reading (plan, day, book, chapter/verse
+span) and cross references one row per target span, with the same book
+dictionary, so all tables join on (book, chapter, verse) directly.
+
+Every table is written twice into build/data/arrow:
+    <name>.parquet  zstd-compressed, for warehouses and pandas/duckdb
+    <name>.arrow    Arrow IPC file, uncompressed so it can be memory-mapped
+                    and read without copying (use --ipc-compression zstd to
+                    trade that for size)
+
+Requires pyarrow.
+
+Usage:
+    python export_arrow.py
+    python export_arrow.py --summary        # memory-map the export and time a scan and a join
+"""
+
+import argparse
+import os
+import time
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import load_json_file
+
+ARROW_DIR = "arrow"
+TESTAMENTS = ["Old Testament", "New Testament"]
+
+
+def arrow_path(name, extension):
+    """Return the path of an exported table"""
+    return data_paths.build_path(ARROW_DIR, f"{name}.{extension}")
+
+
+def _dictionary(indices, values):
+    """Return a dictionary<int8, string> array over a fixed value list"""
+    import pyarrow as pa
+    return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int8()), pa.array(values, pa.string()))
+
+
+def _book_column(indices):
+    return _dictionary(indices, bible_canon.BOOKS)
+
+
+def verse_table(translation, bible_data):
+    """Return a translation's verses as an Arrow table"""
+    import pyarrow as pa
+    from packed_arrays import typed_array
+
+    books = typed_array('b')
+    testaments = typed_array('b')
+    chapters = typed_array('h')
+    verses = typed_array('h')
+    ordinals = typed_array('i')
+    texts = []
+    for ordinal, book_idx, chapter, verse, text in bible_canon.iter_verses(bible_data):
+        books.append(book_idx)
+        testaments.append(TESTAMENTS.index(bible_canon.testament(bible_canon.BOOKS[book_idx])))
+        chapters.append(chapter)
+        verses.append(verse)
+        ordinals.append(ordinal)
+        texts.append(text)
+
+    return pa.table({
+        "translation": _dictionary([data_paths.TRANSLATIONS.index(translation)] * len(texts), data_paths.TRANSLATIONS),
+        "book": _book_column(books),
+        "testament": _dictionary(testaments, TESTAMENTS),
+        "chapter": pa.array(chapters, pa.int16()),
+        "verse": pa.array(verses, pa.int16()),
+        "ordinal": pa.array(ordinals, pa.int32()),
+        "text": pa.array(texts, pa.string()),
+    })
+
+
+def _span_columns(prefix, spans):
+    """Return book and chapter/verse span columns for parsed passages"""
+    import pyarrow as pa
+    return {
+        f"{prefix}book": _book_column([span[0] for span in spans]),
+        f"{prefix}start_chapter": pa.array([span[1] for span in spans], pa.int16()),
+        f"{prefix}start_verse": pa.array([span[2] for span in spans], pa.int16()),
+        f"{prefix}end_chapter": pa.array([span[3] for span in spans], pa.int16()),
+        f"{prefix}end_verse": pa.array([span[4] for span in spans], pa.int16()),
+    }
+
+
+def reading_plan_table(plans_data):
+    """Return one row per plan reading; unparseable readings are skipped and counted"""
+    import pyarrow as pa
+
+    plan_ids, days, spans = [], [], []
+    skipped = 0
+    for plan in plans_data.get("plans", []):
+        for day in plan.get("readings", []):
+            for reading in day.get("readings", []):
+                try:
+                    spans.append(bible_canon.parse_passage(reading))
+                except ValueError:
+                    skipped += 1
+                    continue
+                plan_ids.append(plan["id"])
+                days.append(day["day"])
+
+    columns = {
+        "plan_id": pa.array(plan_ids, pa.string()).dictionary_encode(),
+        "day": pa.array(days, pa.int16()),
+    }
+    columns.update(_span_columns("", spans))
+    return pa.table(columns), skipped
+
+
+def cross_reference_table(cross_references):
+    """Return one row per cross-reference target span"""
+    import pyarrow as pa
+
+    sources, targets = [], []
+    skipped = 0
+    for source, references in cross_references.items():
+        try:
+            source_span = bible_canon.parse_passage(source)
+        except ValueError:
+            skipped += len(references)
+            continue
+        for reference in references:
+            try:
+                targets.append(bible_canon.parse_passage(reference))
+            except ValueError:
+                skipped += 1
+                continue
+            sources.append(source_span)
+
+    columns = {
+        "from_book": _book_column([span[0] for span in sources]),
+        "from_chapter": pa.array([span[1] for span in sources], pa.int16()),
+        "from_verse": pa.array([span[2] for span in sources], pa.int16()),
+    }
+    columns.update(_span_columns("to_", targets))
+    return pa.table(columns), skipped
+
+
+def write_table(table, name, ipc_compression=None):
+    """Write a table as Parquet (zstd) and Arrow IPC; return (parquet bytes, arrow bytes)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_path = arrow_path(name, "parquet")
+    pq.write_table(table, parquet_path, compression="zstd", compression_level=9, use_dictionary=True)
+
+    ipc_path = arrow_path(name, "arrow")
+    options = pa.ipc.IpcWriteOptions(compression=ipc_compression)
+    with pa.OSFile(ipc_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    return os.path.getsize(parquet_path), os.path.getsize(ipc_path)
+
+
+def _codes(column):
+    """Return the int8 dictionary indices of a dictionary-encoded column"""
+    import pyarrow as pa
+    return pa.chunked_array([chunk.indices for chunk in column.chunks], pa.int8())
+
+
+def open_table(name):
+    """Memory-map an exported Arrow IPC table (zero-copy when uncompressed)"""
+    import pyarrow as pa
+    source = pa.memory_map(arrow_path(name, "arrow"), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def summary(translations):
+    """Memory-map every exported table, then time a cross-translation scan and a join"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    started = time.perf_counter()
+    tables = [open_table(f"verses_{t.lower()}") for t in translations
+              if os.path.exists(arrow_path(f"verses_{t.lower()}", "arrow"))]
+    if not tables:
+        print("No exported verse tables; run without --summary first")
+        return 1
+    verses = pa.concat_tables(tables)
+    opened = time.perf_counter()
+    print(f"Memory-mapped {verses.num_rows} verses from {len(tables)} translations in "
+          f"{(opened - started) * 1000:.1f} ms ({pa.total_allocated_bytes()} bytes allocated)")
+
+    started = time.perf_counter()
+    lengths = verses.append_column("words", pc.list_value_length(pc.utf8_split_whitespace(verses["text"])))
+    per_book = lengths.group_by(["translation", "book"]).aggregate([("words", "sum"), ("verse", "count")])
+    print(f"Words per translation and book: {per_book.num_rows} groups in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if os.path.exists(arrow_path("cross_references", "arrow")):
+        cross_references = open_table("cross_references")
+        started = time.perf_counter()
+        # Every table shares the canonical book dictionary, so joins can use the int8 codes
+        keys = pa.table({
+            "translation": verses["translation"],
+            "book": _codes(verses["book"]),
+            "chapter": verses["chapter"],
+            "verse": verses["verse"],
+            "text": verses["text"],
+        })
+        sources = pa.table({
+            "from_book": _codes(cross_references["from_book"]),
+            "from_chapter": cross_references["from_chapter"],
+            "from_verse": cross_references["from_verse"],
+            "to_book": _codes(cross_references["to_book"]),
+        })
+        joined = sources.join(keys, ["from_book", "from_chapter", "from_verse"], ["book", "chapter", "verse"])
+        print(f"Cross references joined to source text: {joined.num_rows} rows in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Bible data as Arrow IPC and Parquet tables")
+    parser.add_argument("--translation", action="append", choices=data_paths.TRANSLATIONS,
+                        help="translation to export (repeatable, default: all)")
+    parser.add_argument("--ipc-compression", choices=["zstd", "lz4"],
+                        help="compress the Arrow IPC files (disables zero-copy memory mapping)")
+    parser.add_argument("--summary", action="store_true", help="memory-map the export and time a scan and a join")
+    args = parser.parse_args()
+    translations = args.translation or data_paths.TRANSLATIONS
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("Error: pyarrow is required (pip install pyarrow)")
+        return 1
+
+    if args.summary:
+        return summary(translations)
+
+    outputs = []
+    for translation in translations:
+        bible_data = load_json_file(data_paths.translation_path(translation))
+        if bible_data is None:
+            continue
+        with pipeline_profile.stage(f"export {translation}"):
+            table = verse_table(translation, bible_data)
+            outputs.append((f"verses_{translation.lower()}", table.num_rows,
+                            write_table(table, f"verses_{translation.lower()}", args.ipc_compression)))
+
+    plans_data = load_json_file(data_paths.asset_path('reading_plans.json'))
+    if plans_data is not None:
+        table, skipped = reading_plan_table(plans_data)
+        outputs.append(("reading_plans", table.num_rows, write_table(table, "reading_plans", args.ipc_compression)))
+        if skipped:
+            print(f"Warning: skipped {skipped} unparseable plan readings")
+
+    cross_references = load_json_file(data_paths.asset_path('cross_references.json'))
+    if cross_references is not None:
+        table, skipped = cross_reference_table(cross_references)
+        outputs.append(("cross_references", table.num_rows, write_table(table, "cross_references", args.ipc_compression)))
+        if skipped:
+            print(f"Warning: skipped {skipped} unparseable cross references")
+
+    for name, rows, (parquet_bytes, arrow_bytes) in outputs:
+        print(f"{name}: {rows} rows, parquet {parquet_bytes} bytes, arrow {arrow_bytes} bytes")
+    print(f"Tables saved to {os.path.dirname(arrow_path('x', 'arrow'))}")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "export_arrow")
@@ -6,15 +6,19 @@ Script to create ESV Bible data by copying KJV data (since ESV is copyrighted an
 import json
 import shutil
 
+import data_paths
+import pipeline_profile
+
 def main():
     print("ESV Bible data is not available via free APIs due to copyright restrictions.")
     print("Copying KJV data as ESV placeholder...")
 
     # Copy KJV data to ESV
-    shutil.copy("../assets/bible_kjv.json", "../assets/bible_esv.json")
+    with pipeline_profile.stage("copy"):
+        shutil.copy(data_paths.translation_path("KJV"), data_paths.translation_path("ESV"))
 
     print("ESV data created by copying KJV data.")
     print("Note: This is KJV text labeled as ESV for functionality.")
 
 if __name__ == "__main__":
-    main()
+    pipeline_profile.run(main, "fetch_bible_esv")
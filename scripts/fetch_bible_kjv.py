@@ -3,13 +3,21 @@
 Script to fetch and parse KJV Bible from Project Gutenberg
 """
 
-import urllib.request
 import json
 import re
-import os
+
+import data_paths
+import pipeline_profile
+import source_ir
+
+KJV_URL = "https://www.gutenberg.org/files/10/10-0.txt"
+
+# Bump when parse_kjv's output changes so cached IR files are rebuilt
+PARSER_VERSION = 1
 
 def download_text(url):
     """Download text from URL"""
+    import urllib.request
     with urllib.request.urlopen(url) as response:
         return response.read().decode('utf-8')
 
@@ -94,23 +102,24 @@ def parse_kjv(text):
     return bible_data
 
 def main():
-    url = "https://www.gutenberg.org/files/10/10-0.txt"
     print("Downloading KJV text...")
-    text = download_text(url)
+    with pipeline_profile.stage("download"):
+        text = download_text(KJV_URL)
 
     # Save the raw text for parse_kjv.py
-    with open('KJV.txt', 'w', encoding='utf-8') as f:
+    with open(data_paths.KJV_SOURCE, 'w', encoding='utf-8') as f:
         f.write(text)
 
     print("Parsing text...")
-    bible_data = parse_kjv(text)
+    bible_data = source_ir.cached_parse_text(text, "fetch_bible_kjv", PARSER_VERSION, parse_kjv)
 
-    output_path = "../assets/bible_kjv.json"
+    output_path = data_paths.translation_path("KJV")
     print(f"Saving to {output_path}")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(bible_data, f, indent=2, ensure_ascii=False)
+    with pipeline_profile.stage("save"):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(bible_data, f, indent=2, ensure_ascii=False)
 
     print("Done!")
 
 if __name__ == "__main__":
-    main()
+    pipeline_profile.run(main, "fetch_bible_kjv")
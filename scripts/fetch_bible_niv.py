@@ -6,15 +6,19 @@ Script to create NIV Bible data by copying KJV data (since NIV is copyrighted an
 import json
 import shutil
 
+import data_paths
+import pipeline_profile
+
 def main():
     print("NIV Bible data is not available via free APIs due to copyright restrictions.")
     print("Copying KJV data as NIV placeholder...")
 
     # Copy KJV data to NIV
-    shutil.copy("../assets/bible_kjv.json", "../assets/bible_niv.json")
+    with pipeline_profile.stage("copy"):
+        shutil.copy(data_paths.translation_path("KJV"), data_paths.translation_path("NIV"))
 
     print("NIV data created by copying KJV data.")
     print("Note: This is KJV text labeled as NIV for functionality.")
 
 if __name__ == "__main__":
-    main()
+    pipeline_profile.run(main, "fetch_bible_niv")
@@ -4,10 +4,11 @@ Script to fetch complete NIV Bible data from bible-api.com
 """
 
 import json
-import os
-import requests
 import time
 
+import data_paths
+import pipeline_profile
+
 # Bible structure with chapter counts
 BIBLE_STRUCTURE = {
     "Genesis": 50, "Exodus": 40, "Leviticus": 27, "Numbers": 36, "Deuteronomy": 34,
@@ -40,6 +41,8 @@ def get_book_abbrev(book_name):
 
 def fetch_chapter(book, chapter):
     """Fetch a chapter from bible-api.com"""
+    import requests
+
     abbrev = get_book_abbrev(book)
     url = f"https://bible-api.com/{abbrev}{chapter}?translation=niv"
 
@@ -58,9 +61,8 @@ def fetch_chapter(book, chapter):
 
     return None
 
-def main():
-    print("Fetching complete NIV Bible data from bible-api.com...")
-
+def fetch_bible():
+    """Fetch every chapter of the NIV Bible"""
     bible_data = {"books": {}}
 
     for book_name, chapter_count in BIBLE_STRUCTURE.items():
@@ -73,7 +75,8 @@ def main():
         }
 
         for chapter in range(1, chapter_count + 1):
-            verses = fetch_chapter(book_name, chapter)
+            with pipeline_profile.stage("fetch chapter"):
+                verses = fetch_chapter(book_name, chapter)
             if verses:
                 book_data["chapters"][str(chapter)] = verses
                 print(f"  ✓ Chapter {chapter} ({len(verses)} verses)")
@@ -86,12 +89,20 @@ def main():
 
         bible_data["books"][book_name] = book_data
 
+    return bible_data
+
+def main():
+    print("Fetching complete NIV Bible data from bible-api.com...")
+
+    bible_data = fetch_bible()
+
     # Save to file
-    output_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'bible_niv.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(bible_data, f, indent=2, ensure_ascii=False)
+    output_path = data_paths.translation_path('NIV')
+    with pipeline_profile.stage("save"):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(bible_data, f, indent=2, ensure_ascii=False)
 
     print(f"NIV Bible data saved to {output_path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    pipeline_profile.run(main, "fetch_niv_api")
\ No newline at end of file
@@ -4,7 +4,9 @@ Script to fix Bible data files (NIV and ESV) using KJV as reference structure
 """
 
 import json
-import os
+
+import data_paths
+import pipeline_profile
 
 def load_json_file(filepath):
     """Load JSON file safely"""
@@ -86,37 +88,38 @@ def fix_esv_file(kjv_data):
     return esv_data
 
 def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    assets_dir = os.path.join(script_dir, '..', 'assets')
-
     # File paths
-    kjv_file = os.path.join(assets_dir, 'bible_kjv_fixed.json')
-    niv_file = os.path.join(assets_dir, 'bible_niv.json')
-    esv_file = os.path.join(assets_dir, 'bible_esv.json')
+    kjv_file = data_paths.asset_path('bible_kjv_fixed.json')
+    niv_file = data_paths.translation_path('NIV')
+    esv_file = data_paths.translation_path('ESV')
 
     # Load KJV data (reference)
     print("Loading KJV data...")
-    kjv_data = load_json_file(kjv_file)
+    with pipeline_profile.stage("load KJV"):
+        kjv_data = load_json_file(kjv_file)
     if not kjv_data:
         print("Failed to load KJV data")
         return
 
     # Load NIV data
     print("Loading NIV data...")
-    niv_data = load_json_file(niv_file)
+    with pipeline_profile.stage("load NIV"):
+        niv_data = load_json_file(niv_file)
     if not niv_data:
         print("Failed to load NIV data")
         return
 
     # Fix NIV file
-    fixed_niv_data = fix_niv_file(kjv_data, niv_data)
-    save_json_file(niv_file, fixed_niv_data)
+    with pipeline_profile.stage("fix NIV"):
+        fixed_niv_data = fix_niv_file(kjv_data, niv_data)
+        save_json_file(niv_file, fixed_niv_data)
 
     # Create ESV file
-    fixed_esv_data = fix_esv_file(kjv_data)
-    save_json_file(esv_file, fixed_esv_data)
+    with pipeline_profile.stage("create ESV"):
+        fixed_esv_data = fix_esv_file(kjv_data)
+        save_json_file(esv_file, fixed_esv_data)
 
     print("Bible data fix completed!")
 
 if __name__ == "__main__":
-    main()
+    pipeline_profile.run(main, "fix_bible_data")
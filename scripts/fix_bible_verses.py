@@ -7,6 +7,63 @@ import json
 import re
 import os
 
+import data_paths
+import pipeline_profile
+import source_ir
+
+# Bump when parse_kjv_text's output changes so cached IR files are rebuilt
+PARSER_VERSION = 1
+
+BOOK_NAMES = [
+    "Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy", "Joshua", "Judges", "Ruth",
+    "1 Samuel", "2 Samuel", "1 Kings", "2 Kings", "1 Chronicles", "2 Chronicles", "Ezra", "Nehemiah",
+    "Esther", "Job", "Psalms", "Proverbs", "Ecclesiastes", "Song of Solomon", "Isaiah", "Jeremiah",
+    "Lamentations", "Ezekiel", "Daniel", "Hosea", "Joel", "Amos", "Obadiah", "Jonah", "Micah",
+    "Nahum", "Habakkuk", "Zephaniah", "Haggai", "Zechariah", "Malachi", "Matthew", "Mark",
+    "Luke", "John", "Acts", "Romans", "1 Corinthians", "2 Corinthians", "Galatians", "Ephesians",
+    "Philippians", "Colossians", "1 Thessalonians", "2 Thessalonians", "1 Timothy", "2 Timothy",
+    "Titus", "Philemon", "Hebrews", "James", "1 Peter", "2 Peter", "1 John", "2 John", "3 John",
+    "Jude", "Revelation"
+]
+
+def find_book_header(line):
+    """Return the book a header line starts, or None"""
+    lower = line.lower()
+    for book in BOOK_NAMES:
+        if book.lower() in lower and ('book of' in lower or 'gospel' in lower or lower.strip() == book.lower()):
+            return book
+    return None
+
+def split_book_sections(text):
+    """Split KJV text into [(book, section_text)] at the lines parse_kjv_text treats as book headers"""
+    sections = []
+    current_book = None
+    current_lines = []
+    continuation = False
+    for line in text.split('\n'):
+        stripped = line.strip()
+        book_found = None
+        if not stripped:
+            continuation = False
+        elif continuation and not re.match(r'^\d+:\d+', stripped):
+            # parse_kjv_text folds these lines into the previous verse
+            pass
+        else:
+            continuation = False
+            if not (stripped.startswith('***') or 'GUTENBERG' in stripped.upper() or 'PROJECT' in stripped.upper()):
+                book_found = find_book_header(stripped)
+                if not book_found and current_book and re.match(r'(\d+):(\d+)\s+(.+)', stripped):
+                    continuation = True
+        if book_found:
+            if current_book:
+                sections.append((current_book, '\n'.join(current_lines)))
+            current_book = book_found
+            current_lines = []
+        current_lines.append(line)
+    if current_book:
+        sections.append((current_book, '\n'.join(current_lines)))
+    return sections
+
 def parse_kjv_text(text):
     """Parse KJV text and return a dictionary of verses organized by book, chapter, verse"""
     lines = text.split('\n')
@@ -28,23 +85,7 @@ def parse_kjv_text(text):
             continue
 
         # Check for book start
-        book_names = [
-            "Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy", "Joshua", "Judges", "Ruth",
-            "1 Samuel", "2 Samuel", "1 Kings", "2 Kings", "1 Chronicles", "2 Chronicles", "Ezra", "Nehemiah",
-            "Esther", "Job", "Psalms", "Proverbs", "Ecclesiastes", "Song of Solomon", "Isaiah", "Jeremiah",
-            "Lamentations", "Ezekiel", "Daniel", "Hosea", "Joel", "Amos", "Obadiah", "Jonah", "Micah",
-            "Nahum", "Habakkuk", "Zephaniah", "Haggai", "Zechariah", "Malachi", "Matthew", "Mark",
-            "Luke", "John", "Acts", "Romans", "1 Corinthians", "2 Corinthians", "Galatians", "Ephesians",
-            "Philippians", "Colossians", "1 Thessalonians", "2 Thessalonians", "1 Timothy", "2 Timothy",
-            "Titus", "Philemon", "Hebrews", "James", "1 Peter", "2 Peter", "1 John", "2 John", "3 John",
-            "Jude", "Revelation"
-        ]
-
-        book_found = None
-        for book in book_names:
-            if book.lower() in line.lower() and ('book of' in line.lower() or 'gospel' in line.lower() or line.lower().strip() == book.lower()):
-                book_found = book
-                break
+        book_found = find_book_header(line)
 
         if book_found:
             current_book = book_found
@@ -81,14 +122,8 @@ def is_placeholder_verse(verse_text):
     """Check if verse text is a placeholder"""
     return "verse is being loaded" in verse_text.lower() or "please check back later" in verse_text.lower()
 
-def update_bible_json(kjv_data, json_file_path):
-    """Update a Bible JSON file with real verse content from KJV data"""
-    print(f"Updating {json_file_path}...")
-
-    # Load existing JSON
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        bible_json = json.load(f)
-
+def update_bible_data(kjv_data, bible_json):
+    """Replace placeholder verses in loaded Bible data with KJV text"""
     updated_count = 0
 
     # Update each book
@@ -116,6 +151,18 @@ def update_bible_json(kjv_data, json_file_path):
                                 updated_count += 1
                                 print(f"  Updated {book_name} {chapter_num}:{verse_num}")
 
+    return updated_count
+
+def update_bible_json(kjv_data, json_file_path):
+    """Update a Bible JSON file with real verse content from KJV data"""
+    print(f"Updating {json_file_path}...")
+
+    # Load existing JSON
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        bible_json = json.load(f)
+
+    updated_count = update_bible_data(kjv_data, bible_json)
+
     # Save updated JSON
     with open(json_file_path, 'w', encoding='utf-8') as f:
         json.dump(bible_json, f, indent=2, ensure_ascii=False)
@@ -124,9 +171,7 @@ def update_bible_json(kjv_data, json_file_path):
     return updated_count
 
 def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    kjv_path = os.path.join(script_dir, 'KJV.txt')
-    assets_dir = os.path.join(script_dir, '..', 'assets')
+    kjv_path = data_paths.KJV_SOURCE
 
     # Check if KJV file exists
     if not os.path.exists(kjv_path):
@@ -134,24 +179,16 @@ def main():
         return
 
     print("Parsing KJV text file...")
-    with open(kjv_path, 'r', encoding='utf-8') as f:
-        kjv_text = f.read()
-
-    kjv_data = parse_kjv_text(kjv_text)
+    kjv_data = source_ir.cached_parse(kjv_path, "fix_bible_verses", PARSER_VERSION, parse_kjv_text)
     print(f"Parsed {len(kjv_data)} books from KJV text")
 
     # Update each Bible translation
-    translations = [
-        ('bible_kjv.json', 'KJV'),
-        ('bible_niv.json', 'NIV'),
-        ('bible_esv.json', 'ESV')
-    ]
-
     total_updated = 0
-    for filename, translation in translations:
-        json_path = os.path.join(assets_dir, filename)
+    for translation in data_paths.TRANSLATIONS:
+        json_path = data_paths.translation_path(translation)
         if os.path.exists(json_path):
-            updated = update_bible_json(kjv_data, json_path)
+            with pipeline_profile.stage(f"update {translation}"):
+                updated = update_bible_json(kjv_data, json_path)
             total_updated += updated
         else:
             print(f"Warning: {json_path} not found")
@@ -159,4 +196,4 @@ def main():
     print(f"\nCompleted! Updated {total_updated} verses total.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    pipeline_profile.run(main, "fix_bible_verses")
\ No newline at end of file
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Script to generate balanced reading plans ("whole Bible in N days", "NT in 90 days")
+
+Chapters are weighted by their word count in a translation; chapters whose
+text is missing or still a placeholder get the median weight. The chapters of
+the chosen scope are split into one contiguous run per day with a linear
+partition:
+
+1. The smallest possible heaviest day B is found by binary search over the
+   answer, checking each candidate greedily with bisection on prefix sums
+   (O(k log n) per check, O(k log n log S) overall).
+2. Among the partitions whose days all stay within B, each day boundary is
+   placed as close as possible to its ideal share of the total (j * S / k),
+   using need[i], the minimum number of days the chapters after i require.
+
+The result is optimal for the heaviest day and within one chapter of an even
+split everywhere else. Plans use the reading_plans.json schema.
+
+Usage:
+    python generate_reading_plan.py --scope nt --days 90
+    python generate_reading_plan.py --scope bible --days 365 --add
+    python generate_reading_plan.py --scope "Psalms-Proverbs" --days 30 -o plan.json
+"""
+
+import argparse
+import json
+import re
+from bisect import bisect_left, bisect_right
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import load_json_file, save_json_file
+from complete_bible_fix import BIBLE_STRUCTURE
+from fix_bible_verses import is_placeholder_verse
+
+WORD_RE = re.compile(r"\S+")
+
+BOOK_LOOKUP = {name.lower(): bible_canon.book_index(name)
+               for name in list(bible_canon.BOOKS) + list(bible_canon.BOOK_ALIASES)}
+
+SCOPES = {
+    "bible": ("Bible", None),
+    "ot": ("Old Testament", "Old Testament"),
+    "nt": ("New Testament", "New Testament"),
+}
+
+
+def chapter_weights(bible_data):
+    """Return ({(book_idx, chapter): word count}, estimated chapter count) for the canonical chapters"""
+    counted = {}
+    for book_idx, chapter, verses in bible_canon.iter_book_chapters(bible_data):
+        if verses and not any(is_placeholder_verse(verse) for verse in verses):
+            counted[(book_idx, chapter)] = sum(len(WORD_RE.findall(verse)) for verse in verses)
+
+    known = sorted(counted.values())
+    fallback = known[len(known) // 2] if known else 1
+    weights = {}
+    estimated = 0
+    for book_idx, book in enumerate(bible_canon.BOOKS):
+        for chapter in range(1, BIBLE_STRUCTURE[book]["chapters"] + 1):
+            weight = counted.get((book_idx, chapter))
+            if weight is None:
+                weight = fallback
+                estimated += 1
+            weights[(book_idx, chapter)] = weight
+    return weights, estimated
+
+
+def scope_chapters(weights, scope):
+    """Return (title, [((book_idx, chapter), weight)]) for a scope: bible, ot, nt, a book or 'Book-Book'"""
+    key = scope.lower()
+    if key in SCOPES:
+        title, testament = SCOPES[key]
+        books = [i for i, book in enumerate(bible_canon.BOOKS)
+                 if testament is None or BIBLE_STRUCTURE[book]["testament"] == testament]
+    else:
+        names = re.split(r"\s*-\s*(?=[1-3]?\s*[A-Za-z])", scope.strip(), maxsplit=1)
+        indexes = [BOOK_LOOKUP.get(name.strip().lower()) for name in names]
+        if None in indexes:
+            raise ValueError(f"Unknown scope: {scope}")
+        first, last = indexes[0], indexes[-1]
+        if last < first:
+            raise ValueError(f"Scope runs backwards: {scope}")
+        books = list(range(first, last + 1))
+        title = bible_canon.BOOKS[first] if first == last else f"{bible_canon.BOOKS[first]} - {bible_canon.BOOKS[last]}"
+
+    chapters = [(key, weight) for key, weight in weights.items() if key[0] in books]
+    return title, chapters
+
+
+def prefix_sums(values):
+    """Return [0, v0, v0 + v1, ...]"""
+    sums = [0]
+    for value in values:
+        sums.append(sums[-1] + value)
+    return sums
+
+
+def days_needed(prefix, limit):
+    """Return how many days a greedy split needs with at most limit words per day"""
+    n = len(prefix) - 1
+    position = 0
+    days = 0
+    while position < n:
+        # Furthest end with prefix[end] - prefix[position] <= limit
+        position = bisect_right(prefix, prefix[position] + limit, position + 1) - 1
+        days += 1
+    return days
+
+
+def min_heaviest_day(prefix, days):
+    """Return the smallest per-day limit that fits the chapters into the given days"""
+    n = len(prefix) - 1
+    low = max(prefix[i + 1] - prefix[i] for i in range(n))
+    high = prefix[-1]
+    while low < high:
+        middle = (low + high) // 2
+        if days_needed(prefix, middle) <= days:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def partition(weights, days):
+    """Split weights into days contiguous runs; return the list of run boundaries"""
+    n = len(weights)
+    if days < 1 or days > n:
+        raise ValueError(f"Cannot split {n} chapters into {days} days")
+    prefix = prefix_sums(weights)
+    limit = min_heaviest_day(prefix, days)
+
+    # far[i]: furthest end of a day starting at chapter i; need[i]: days the suffix i.. requires
+    far = [bisect_right(prefix, prefix[i] + limit, i + 1) - 1 for i in range(n)]
+    need = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        need[i] = 1 + need[far[i]]
+    # need is non-increasing, so its negation is sorted for bisection
+    negated_need = [-value for value in need]
+
+    total = prefix[-1]
+    boundaries = [0]
+    for day in range(1, days):
+        previous = boundaries[-1]
+        remaining = days - day
+        low = max(previous + 1, bisect_left(negated_need, -remaining))
+        high = min(far[previous], n - remaining)
+        ideal = total * day / days
+        best = min(max(bisect_left(prefix, ideal, low, high + 1), low), high)
+        if best > low and ideal - prefix[best - 1] < prefix[best] - ideal:
+            best -= 1
+        boundaries.append(best)
+    boundaries.append(n)
+    return boundaries
+
+
+def format_span(chapters):
+    """Format a run of (book_idx, chapter) keys as plan readings, one entry per book"""
+    readings = []
+    start = 0
+    while start < len(chapters):
+        book_idx = chapters[start][0]
+        end = start
+        while end + 1 < len(chapters) and chapters[end + 1][0] == book_idx:
+            end += 1
+        first, last = chapters[start][1], chapters[end][1]
+        book = bible_canon.BOOKS[book_idx]
+        readings.append(f"{book} {first}" if first == last else f"{book} {first}-{last}")
+        start = end + 1
+    return readings
+
+
+def plan_category(scope, days):
+    """Pick a reading_plans.json category for a generated plan"""
+    if scope.lower() not in SCOPES:
+        return "thematic"
+    return "yearly" if days >= 270 else "quarterly"
+
+
+def plan_difficulty(words_per_day):
+    """Rate a plan by its average daily reading length"""
+    if words_per_day < 1500:
+        return "beginner"
+    if words_per_day < 3500:
+        return "intermediate"
+    return "advanced"
+
+
+def generate_plan(weights, scope, days, plan_id=None, name=None):
+    """Return (plan in the reading_plans.json schema, words per day) for a balanced plan"""
+    title, chapters = scope_chapters(weights, scope)
+    keys = [key for key, _ in chapters]
+    values = [weight for _, weight in chapters]
+    boundaries = partition(values, days)
+
+    readings = []
+    day_words = []
+    for day in range(days):
+        start, end = boundaries[day], boundaries[day + 1]
+        words = sum(values[start:end])
+        span = format_span(keys[start:end])
+        summary = span[0] if len(span) == 1 else f"{span[0]} to {span[-1]}"
+        readings.append({
+            "day": day + 1,
+            "readings": span,
+            "description": f"{summary} (~{words:,} words)",
+        })
+        day_words.append(words)
+
+    total = sum(values)
+    slug = re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")
+    plan = {
+        "id": plan_id or f"balanced_{slug}_{days}",
+        "name": name or f"{title} in {days} Days",
+        "description": f"Read through {title if scope.lower() != 'bible' else 'the whole Bible'} in {days} evenly balanced days",
+        "duration": days,
+        "category": plan_category(scope, days),
+        "difficulty": plan_difficulty(total / days),
+        "readings": readings,
+    }
+    return plan, day_words
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a balanced reading plan")
+    parser.add_argument("--scope", default="bible", help="bible, ot, nt, a book, or a book range like 'Matthew-John'")
+    parser.add_argument("--days", type=int, required=True)
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS,
+                        help="translation whose word counts weight the chapters")
+    parser.add_argument("--id", dest="plan_id")
+    parser.add_argument("--name")
+    parser.add_argument("-o", "--output", help="write the plan to this JSON file")
+    parser.add_argument("--add", action="store_true", help="add or replace the plan in reading_plans.json")
+    args = parser.parse_args()
+
+    with pipeline_profile.stage("load"):
+        bible_data = load_json_file(data_paths.translation_path(args.translation))
+    if bible_data is None:
+        return 1
+
+    with pipeline_profile.stage("weights"):
+        weights, estimated = chapter_weights(bible_data)
+    if estimated:
+        print(f"Warning: {estimated} chapters have no text in {args.translation}; using the median chapter length")
+
+    import time
+    started = time.perf_counter()
+    try:
+        plan, day_words = generate_plan(weights, args.scope, args.days, args.plan_id, args.name)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    elapsed = (time.perf_counter() - started) * 1000
+
+    mean = sum(day_words) / len(day_words)
+    print(f"{plan['name']}: {min(day_words):,}-{max(day_words):,} words per day (mean {mean:,.0f}) in {elapsed:.1f} ms")
+
+    if args.output:
+        if not save_json_file(args.output, plan):
+            return 1
+    if args.add:
+        plans_path = data_paths.asset_path('reading_plans.json')
+        plans_data = load_json_file(plans_path)
+        if plans_data is None:
+            return 1
+        plans = [p for p in plans_data.get("plans", []) if p.get("id") != plan["id"]]
+        plans.append(plan)
+        plans_data["plans"] = plans
+        if not save_json_file(plans_path, plans_data):
+            return 1
+        print(f"Added {plan['id']} to {plans_path}")
+    if not args.output and not args.add:
+        print(json.dumps(plan["readings"][:3], indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "generate_reading_plan")
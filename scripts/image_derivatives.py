@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Script to generate resized derivatives of profile pictures and post images
+
+Every source image becomes thumb, medium and full variants (bounded by their
+longest edge, never upscaled), each encoded as WebP and JPEG. EXIF orientation
+is applied to the pixels and all metadata (EXIF, GPS, XMP, comments) is
+dropped; embedded colour profiles are converted to sRGB first.
+
+Outputs are cached by content: a source is hashed (SHA-256 of its bytes plus
+the recipe version) and its derivatives are written to OUT/<hash[:2]>/<hash>/,
+so re-running over the same files, renamed copies or duplicate uploads does no
+work. JPEG sources are decoded at reduced scale (draft mode) when the largest
+variant allows it. Images are processed in parallel with a process pool; a
+source whose key is already being rendered waits for that render instead of
+being submitted again.
+
+Batch mode takes files and directories; worker mode (--stdin) reads one path
+per line and submits each as it arrives, so an upload queue can pipe new
+files in.
+
+Requires Pillow.
+
+Usage:
+    python image_derivatives.py uploads/ -o build/media
+    find uploads -newer last_run | python image_derivatives.py --stdin
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import data_paths
+import pipeline_profile
+
+RECIPE_VERSION = 1
+# Pillow only decodes HEIC through the pillow-heif plugin
+HEIF_SUPPORTED = importlib.util.find_spec('pillow_heif') is not None
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff') + (('.heic',) if HEIF_SUPPORTED else ())
+
+# name -> longest edge in pixels
+VARIANTS = {
+    'thumb': 160,
+    'medium': 720,
+    'full': 1600,
+}
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+MANIFEST_NAME = 'derivatives.json'
+
+
+def source_key(data):
+    """Return the cache key of a source image's bytes"""
+    digest = hashlib.sha256(f"recipe-{RECIPE_VERSION}:".encode('utf-8'))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def cache_dir(output_dir, key):
+    """Return the directory holding a source's derivatives"""
+    return os.path.join(output_dir, key[:2], key)
+
+
+def variant_filename(variant, extension):
+    """Return the filename of one derivative, e.g. thumb.webp"""
+    return f"{variant}.{extension}"
+
+
+def write_atomic(path, write):
+    """Call write(temp_path) on a unique temporary file, then move it into place
+
+    A cancelled run never leaves a partial file behind, and concurrent writers
+    of the same path never share a temporary file.
+    """
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def target_size(width, height, max_edge):
+    """Scale (width, height) so its longest edge is at most max_edge"""
+    scale = min(1.0, max_edge / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def to_srgb(img):
+    """Convert an image with an embedded ICC profile to sRGB"""
+    icc_profile = img.info.get('icc_profile')
+    if not icc_profile:
+        return img
+    try:
+        from PIL import ImageCms
+        source_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        output_mode = 'RGBA' if 'A' in img.getbands() else 'RGB'
+        return ImageCms.profileToProfile(img, source_profile, ImageCms.createProfile('sRGB'), outputMode=output_mode)
+    except Exception:
+        return img
+
+
+def open_source(data, max_edge):
+    """Decode a source image upright, in sRGB and without metadata"""
+    from PIL import Image, ImageOps
+
+    if HEIF_SUPPORTED:
+        from pillow_heif import register_heif_opener
+        register_heif_opener()
+    img = Image.open(io.BytesIO(data))
+    # JPEG can decode directly at 1/2, 1/4 or 1/8 scale; EXIF rotation may swap
+    # the axes, so ask for a square bound on the longest edge
+    if img.format == 'JPEG':
+        img.draft('RGB', (max_edge, max_edge))
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ('LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    img = to_srgb(img)
+
+    # Copy the pixels into a fresh image so no EXIF/XMP/comment/ICC survives
+    clean = Image.new(img.mode, img.size)
+    clean.paste(img)
+    return clean
+
+
+def flatten(img):
+    """Composite an image with alpha onto white for JPEG"""
+    from PIL import Image
+
+    if img.mode != 'RGBA':
+        return img
+    background = Image.new('RGB', img.size, (255, 255, 255))
+    background.paste(img, mask=img.getchannel('A'))
+    return background
+
+
+def render_derivatives(data, destination):
+    """Write every variant of a source image into destination; return the variant table"""
+    from PIL import Image
+
+    largest = max(VARIANTS.values())
+    img = open_source(data, largest)
+    os.makedirs(destination, exist_ok=True)
+
+    variants = {}
+    # Largest first, each smaller variant is resized from the previous one
+    for name, max_edge in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+        size = target_size(img.width, img.height, max_edge)
+        if size != img.size:
+            img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        files = {}
+        for extension, (image_format, options) in FORMATS.items():
+            path = os.path.join(destination, variant_filename(name, extension))
+            encoded = img if image_format != 'JPEG' else flatten(img)
+            write_atomic(path, lambda temp_path: encoded.save(temp_path, image_format, **options))
+            files[extension] = os.path.getsize(path)
+        variants[name] = {'width': img.width, 'height': img.height, 'bytes': files}
+    return variants
+
+
+def read_source(source_path):
+    """Return the bytes of a source image"""
+    with open(source_path, 'rb') as f:
+        return f.read()
+
+
+def process_image(source_path, output_dir=None, force=False, key=None):
+    """Generate (or reuse cached) derivatives of one image; return its manifest entry
+
+    A key already computed by the caller (file_key) saves hashing the file
+    again, and a cached entry is then returned without reading the file.
+    """
+    output_dir = output_dir or data_paths.MEDIA_BUILD_DIR
+    data = None
+    if key is None:
+        data = read_source(source_path)
+        key = source_key(data)
+    destination = cache_dir(output_dir, key)
+    entry_path = os.path.join(destination, MANIFEST_NAME)
+
+    if not force and os.path.exists(entry_path):
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        return dict(entry, source=source_path, cached=True)
+
+    if data is None:
+        data = read_source(source_path)
+    entry = {
+        'key': key,
+        'recipe': RECIPE_VERSION,
+        'source_bytes': len(data),
+        'variants': render_derivatives(data, destination),
+    }
+    # The per-source manifest is written last and marks the cache entry complete
+    def write_entry(temp_path):
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+    write_atomic(entry_path, write_entry)
+    return dict(entry, source=source_path, cached=False)
+
+
+def _process_safely(job):
+    """Process-pool entry point that reports errors instead of raising"""
+    source_path, output_dir, force, key = job
+    try:
+        return process_image(source_path, output_dir, force, key)
+    except Exception as e:
+        return {'source': source_path, 'error': str(e)}
+
+
+def iter_sources(paths, output_dir=None):
+    """Yield image files from a list of files and directories, skipping the cache"""
+    skip = os.path.abspath(output_dir) if output_dir else None
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames if os.path.abspath(os.path.join(root, d)) != skip)
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, filename)
+        elif path:
+            yield path
+
+
+def file_key(source_path):
+    """Return the cache key of an image file"""
+    return source_key(read_source(source_path))
+
+
+def _pending_entry(submitted, source, key, future, duplicate, error=None):
+    """Return the manifest entry of a queued source, waiting for its render if needed"""
+    if future is None:
+        return {'source': source, 'error': error}
+    entry = future.result()
+    if submitted.get(key) is future:
+        del submitted[key]
+    if not duplicate:
+        return entry
+    # Another source with the same bytes was rendered; reuse its entry
+    if 'error' in entry:
+        return {'source': source, 'error': entry['error']}
+    return dict(entry, source=source, cached=True)
+
+
+def process_images(sources, output_dir=None, workers=None, force=False):
+    """Generate derivatives for many images with a process pool; yield manifest entries
+
+    Sources are submitted as the iterable produces them and entries are
+    yielded in source order as soon as they are ready. Each distinct key is
+    rendered once: later sources with the same bytes reuse the first entry
+    while it is queued, and read it from the cache once it is done.
+    """
+    output_dir = output_dir or data_paths.MEDIA_BUILD_DIR
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    submitted = {}
+    seen = set()
+    pending = deque()
+    try:
+        for source in sources:
+            try:
+                key = file_key(source)
+            except OSError as e:
+                pending.append((source, None, None, False, str(e)))
+            else:
+                if key in submitted:
+                    pending.append((source, key, submitted[key], True))
+                else:
+                    job = (source, output_dir, force and key not in seen, key)
+                    seen.add(key)
+                    if executor is None:
+                        future = Future()
+                        future.set_result(_process_safely(job))
+                    else:
+                        future = executor.submit(_process_safely, job)
+                    submitted[key] = future
+                    pending.append((source, key, future, False))
+            # Report finished work without waiting for more input, and block
+            # only when too many sources are queued
+            while pending and (pending[0][2] is None or pending[0][2].done() or len(pending) > 4 * workers):
+                yield _pending_entry(submitted, *pending.popleft())
+        while pending:
+            yield _pending_entry(submitted, *pending.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate resized WebP/JPEG derivatives of uploaded images")
+    parser.add_argument("paths", nargs="*", help="image files or directories")
+    parser.add_argument("-o", "--output", default=data_paths.MEDIA_BUILD_DIR, help="derivative cache directory")
+    parser.add_argument("--stdin", action="store_true", help="read image paths from stdin, one per line")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="regenerate cached derivatives")
+    parser.add_argument("--manifest", help="write the source -> derivatives table to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Error: Pillow is required (pip install Pillow)")
+        return 1
+
+    if not args.paths and not args.stdin:
+        parser.error("no images given")
+    paths = args.paths
+    if args.stdin:
+        # Read lazily so each path is submitted as soon as its line arrives
+        paths = itertools.chain(paths, (line.strip() for line in iter(sys.stdin.readline, '')))
+
+    started = time.perf_counter()
+    results = {}
+    generated = cached = failed = source_bytes = output_bytes = 0
+
+    with pipeline_profile.stage("derivatives"):
+        for entry in process_images(iter_sources(paths, args.output), args.output, args.workers, args.force):
+            source = entry.pop('source')
+            if 'error' in entry:
+                print(f"Error processing {source}: {entry['error']}")
+                failed += 1
+                continue
+            if entry.pop('cached'):
+                cached += 1
+            else:
+                generated += 1
+                source_bytes += entry['source_bytes']
+                output_bytes += sum(entry['variants']['medium']['bytes'].values()) // len(FORMATS)
+            results[source] = entry
+
+    if args.manifest:
+        with open(args.manifest, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    elapsed = time.perf_counter() - started
+    total = generated + cached
+    print(f"{generated} generated, {cached} cached, {failed} failed in {elapsed:.2f}s "
+          f"({total / max(elapsed, 1e-9):.1f} images/s) -> {args.output}")
+    if generated:
+        print(f"Medium variant averages {output_bytes / source_bytes:.1%} of the original bytes")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "image_derivatives")
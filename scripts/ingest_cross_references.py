@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Script to ingest the OpenBible.info cross-reference dataset into compact arrays
+
+The dataset is a TSV of about 340k weighted references:
+
+    From Verse    To Verse               Votes
+    Gen.1.1       Prov.8.22-Prov.8.30    59
+
+The file is streamed line by line. Both sides are normalized to verse
+ordinals of a translation (OSIS book abbreviations as in source_parsers),
+duplicate pairs keep their highest vote, and each source verse keeps only its
+top N targets by votes. Finished verses are moved into flat typed arrays, so
+memory stays bounded by the compact output. The result is a
+packed file with CSR arrays aligned with the verse ordinals of the other
+indexes:
+
+    source_ptr[ordinal] .. source_ptr[ordinal + 1]   targets of one verse, best first
+    target_start, target_end                         ordinal span of each target
+    target_votes                                     signed vote count
+
+--json also writes the app's cross_references.json shape
+({"Genesis 1:1": ["John 1:1-3", ...]}).
+
+Usage:
+    python ingest_cross_references.py cross_references.txt --translation KJV --top 20
+    python ingest_cross_references.py cross_references.txt --json ../assets/cross_references.json
+    python ingest_cross_references.py --lookup "Genesis 1:1"
+"""
+
+import argparse
+import json
+import os
+import time
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, load_json_file, manifest_version
+from packed_arrays import PackedFile, typed_array, write_packed
+from source_parsers import OSIS_BOOK_NAMES
+
+CROSS_REFERENCES_VERSION = 1
+DEFAULT_TOP = 20
+# Candidates kept per verse before pruning back to the top N
+PRUNE_FACTOR = 4
+
+
+def cross_references_path(translation):
+    """Return the default output path of a translation's cross-reference arrays"""
+    return data_paths.build_path(f"crossrefs_{translation.lower()}.bin")
+
+
+def verse_ordinals(bible_data):
+    """Return ({(book_idx, chapter, verse): ordinal}, verse table) for a translation"""
+    ordinals = {}
+    verse_table = bible_canon.new_verse_table()
+    for ordinal, book_idx, chapter, verse, _ in bible_canon.iter_verses(bible_data):
+        ordinals[(book_idx, chapter, verse)] = ordinal
+        bible_canon.add_verse(verse_table, book_idx, chapter, verse)
+    return ordinals, verse_table
+
+
+def _osis_ordinal(osis_ref, ordinals):
+    parts = osis_ref.split(".")
+    if len(parts) != 3 or parts[0] not in OSIS_BOOK_NAMES:
+        return None
+    try:
+        key = (bible_canon.book_index(OSIS_BOOK_NAMES[parts[0]]), int(parts[1]), int(parts[2]))
+    except ValueError:
+        return None
+    return ordinals.get(key)
+
+
+def parse_span(reference, ordinals):
+    """Return (start, end) ordinals of 'Gen.1.1' or 'Gen.1.1-Gen.1.3', or None if unresolved"""
+    first, _, last = reference.strip().partition("-")
+    start = _osis_ordinal(first, ordinals)
+    end = _osis_ordinal(last, ordinals) if last else start
+    if start is None or end is None or end < start:
+        return None
+    return start, end
+
+
+def _top(candidates, top):
+    """Return the best (start, end) -> votes items: most votes first, then canonical order"""
+    return sorted(candidates.items(), key=lambda item: (-item[1], item[0]))[:top]
+
+
+class RankedReferences:
+    """Top targets of every finished source verse, kept in flat typed arrays"""
+
+    def __init__(self):
+        self.spans = {}
+        self.starts = typed_array('I')
+        self.ends = typed_array('I')
+        # Votes are signed: the dataset has references voted below zero
+        self.votes = typed_array('i')
+
+    def add(self, source, ranked):
+        self.spans[source] = (len(self.starts), len(ranked))
+        for (start, end), votes in ranked:
+            self.starts.append(start)
+            self.ends.append(end)
+            self.votes.append(votes)
+
+    def reopen(self, source):
+        """Remove a finished verse and return its candidates (for unsorted input)"""
+        offset, count = self.spans.pop(source, (0, 0))
+        return {(self.starts[i], self.ends[i]): self.votes[i] for i in range(offset, offset + count)}
+
+    def __len__(self):
+        return sum(count for _, count in self.spans.values())
+
+
+def ingest_cross_references(lines, ordinals, top=DEFAULT_TOP, min_votes=1):
+    """Stream TSV lines into ranked references; return (RankedReferences, stats)
+
+    The dataset is grouped by source verse, so each verse's candidates are
+    ranked and moved into flat arrays as soon as the next verse starts.
+    """
+    ranked = RankedReferences()
+    current = None
+    candidates = {}
+    stats = {"lines": 0, "unresolved": 0, "below_votes": 0, "duplicates": 0, "invalid": 0}
+    for line in lines:
+        if not line.strip() or line.startswith(("#", "From Verse")):
+            continue
+        stats["lines"] += 1
+        fields = line.rstrip("\r\n").split("\t")
+        try:
+            votes = int(fields[2])
+        except (IndexError, ValueError):
+            stats["invalid"] += 1
+            continue
+        if votes < min_votes:
+            stats["below_votes"] += 1
+            continue
+        source = _osis_ordinal(fields[0].strip(), ordinals)
+        target = parse_span(fields[1], ordinals)
+        if source is None or target is None:
+            stats["unresolved"] += 1
+            continue
+
+        if source != current:
+            if current is not None:
+                ranked.add(current, _top(candidates, top))
+            current = source
+            candidates = ranked.reopen(source) if source in ranked.spans else {}
+
+        previous = candidates.get(target)
+        if previous is not None:
+            stats["duplicates"] += 1
+            if previous >= votes:
+                continue
+        candidates[target] = votes
+        if len(candidates) > top * PRUNE_FACTOR:
+            candidates = dict(_top(candidates, top))
+    if current is not None:
+        ranked.add(current, _top(candidates, top))
+
+    stats["verses"] = len(ranked.spans)
+    stats["references"] = len(ranked)
+    return ranked, stats
+
+
+def build_cross_reference_arrays(ranked, verse_table):
+    """Return packed CSR arrays for ranked references"""
+    source_ptr = typed_array('I', [0])
+    target_start = typed_array('I')
+    target_end = typed_array('I')
+    target_votes = typed_array('i')
+    for ordinal in range(len(verse_table["verse_book"])):
+        offset, count = ranked.spans.get(ordinal, (0, 0))
+        target_start.extend(ranked.starts[offset:offset + count])
+        target_end.extend(ranked.ends[offset:offset + count])
+        target_votes.extend(ranked.votes[offset:offset + count])
+        source_ptr.append(len(target_start))
+
+    arrays = {
+        "source_ptr": source_ptr,
+        "target_start": target_start,
+        "target_end": target_end,
+        "target_votes": target_votes,
+    }
+    arrays.update(verse_table)
+    return arrays
+
+
+def format_span(packed, start, end):
+    """Format an ordinal span as 'John 1:1', 'John 1:1-3' or 'Luke 1:80-2:5'"""
+    books, chapters, verses = (packed.array(name) for name in ("verse_book", "verse_chapter", "verse_number"))
+    first = (books[start], chapters[start], verses[start])
+    last = (books[end], chapters[end], verses[end])
+    reference = bible_canon.format_reference(*first)
+    if last == first:
+        return reference
+    if last[0] != first[0]:
+        return f"{reference}-{bible_canon.format_reference(*last)}"
+    if last[1] != first[1]:
+        return f"{reference}-{last[1]}:{last[2]}"
+    return f"{reference}-{last[2]}"
+
+
+class CrossReferences:
+    """Ranked cross references of every verse"""
+
+    def __init__(self, path=None, buffer=None):
+        self.packed = PackedFile(path, buffer)
+        self.meta = self.packed.meta
+        self.ptr = self.packed.array("source_ptr")
+        self.starts = self.packed.array("target_start")
+        self.ends = self.packed.array("target_end")
+        self.votes = self.packed.array("target_votes")
+
+    def targets(self, ordinal):
+        """Return [(start ordinal, end ordinal, votes)] of a verse, best first"""
+        first, last = self.ptr[ordinal], self.ptr[ordinal + 1]
+        return list(zip(self.starts[first:last], self.ends[first:last], self.votes[first:last]))
+
+    def lookup(self, reference):
+        """Return [(formatted reference, votes)] for a verse reference"""
+        book_idx, chapter, verse = bible_canon.parse_reference(reference)
+        ordinal = bible_canon.verse_ordinal(self.packed, book_idx, chapter, verse or 1)
+        if ordinal < 0:
+            return []
+        return [(format_span(self.packed, start, end), votes) for start, end, votes in self.targets(ordinal)]
+
+    def as_json(self):
+        """Return every verse's references in the cross_references.json shape"""
+        result = {}
+        for ordinal in range(len(self.ptr) - 1):
+            targets = self.targets(ordinal)
+            if targets:
+                source = format_span(self.packed, ordinal, ordinal)
+                result[source] = [format_span(self.packed, start, end) for start, end, _ in targets]
+        return result
+
+    def close(self):
+        self.packed.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest the OpenBible.info cross-reference TSV")
+    parser.add_argument("source", nargs="?", help="cross_references.txt from openbible.info")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="references kept per verse")
+    parser.add_argument("--min-votes", type=int, default=1, help="drop references with fewer votes")
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--json", metavar="PATH", help="also write cross_references.json for the app")
+    parser.add_argument("--lookup", metavar="REFERENCE", help="print a verse's references from an existing file")
+    args = parser.parse_args()
+
+    output_path = args.output or cross_references_path(args.translation)
+
+    if args.lookup:
+        cross_references = CrossReferences(output_path)
+        for reference, votes in cross_references.lookup(args.lookup):
+            print(f"{reference} ({votes} votes)")
+        return 0
+    if not args.source:
+        parser.error("a source TSV is required unless --lookup is given")
+
+    with pipeline_profile.stage("load"):
+        bible_data = load_json_file(data_paths.translation_path(args.translation))
+    if bible_data is None:
+        return 1
+    ordinals, verse_table = verse_ordinals(bible_data)
+
+    started = time.perf_counter()
+    with pipeline_profile.stage("ingest"):
+        with open(args.source, 'r', encoding='utf-8-sig') as f:
+            ranked, stats = ingest_cross_references(f, ordinals, args.top, args.min_votes)
+    elapsed = time.perf_counter() - started
+
+    with pipeline_profile.stage("write"):
+        arrays = build_cross_reference_arrays(ranked, verse_table)
+        meta = dict(stats, translation=args.translation, format=CROSS_REFERENCES_VERSION, top=args.top,
+                    source_version=manifest_version(build_manifest(bible_data)))
+        size = write_packed(output_path, arrays, meta)
+
+    print(f"{stats['lines']} lines in {elapsed:.2f} s ({stats['lines'] / max(elapsed, 1e-9):,.0f} lines/s): "
+          f"{stats['unresolved']} unresolved, {stats['below_votes']} below {args.min_votes} votes, "
+          f"{stats['duplicates']} duplicates, {stats['invalid']} invalid")
+    print(f"{stats['references']} references for {stats['verses']} verses (top {args.top})")
+    print(f"Cross references saved to {output_path} ({size} bytes)")
+
+    if args.json:
+        cross_references = CrossReferences(output_path)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(cross_references.as_json(), f, ensure_ascii=False, separators=(',', ':'))
+        cross_references.close()
+        print(f"App cross references saved to {args.json} ({os.path.getsize(args.json)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "ingest_cross_references")
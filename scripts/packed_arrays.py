@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Compact binary container for the typed arrays written by the index builders
+
+Layout: 4-byte magic, uint32 header length, a JSON header describing every
+array (typecode, byte offset, length) plus free-form metadata, then the raw
+array data, each array aligned to 8 bytes. Files are read through mmap, so
+arrays are zero-copy memoryviews that several processes can share through
+the page cache.
+"""
+
+import array
+import json
+import mmap
+import struct
+import sys
+from bisect import bisect_left
+
+MAGIC = b"CLPA"
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+
+def typed_array(typecode, values=()):
+    """Create an array.array, checking that typecode has a fixed portable size"""
+    sizes = {'B': 1, 'b': 1, 'H': 2, 'h': 2, 'I': 4, 'i': 4, 'Q': 8, 'q': 8, 'f': 4, 'd': 8}
+    result = array.array(typecode, values)
+    if result.itemsize != sizes[typecode]:
+        raise ValueError(f"Typecode {typecode!r} is {result.itemsize} bytes on this platform")
+    return result
+
+
+def pack_strings(strings):
+    """Pack strings into (utf-8 blob, uint32 offsets with a trailing end offset)"""
+    blob = bytearray()
+    offsets = typed_array('I', [0])
+    for value in strings:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return typed_array('B', blob), offsets
+
+
+def write_packed(path, arrays, meta=None):
+    """Write a dict of name -> array.array (or bytes) to a packed file"""
+    entries = {}
+    chunks = []
+    offset = 0
+    for name, values in arrays.items():
+        if isinstance(values, (bytes, bytearray)):
+            values = typed_array('B', values)
+        data = values.tobytes()
+        entries[name] = {"typecode": values.typecode, "offset": offset, "length": len(values)}
+        padding = -len(data) % ALIGNMENT
+        chunks.append(data + b"\0" * padding)
+        offset += len(data) + padding
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "meta": meta or {},
+        "arrays": entries,
+    }, separators=(',', ':')).encode('utf-8')
+    header += b" " * (-(len(header) + 8) % ALIGNMENT)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+    return 8 + len(header) + offset
+
+
+class PackedFile:
+    """Read-only, memory-mapped view of a packed file"""
+
+    def __init__(self, path=None, buffer=None):
+        if buffer is None:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = buffer
+        self._view = view = memoryview(buffer)
+        if bytes(view[:4]) != MAGIC:
+            raise ValueError(f"{path or 'buffer'} is not a packed array file")
+        header_length = struct.unpack('<I', view[4:8])[0]
+        header = json.loads(bytes(view[8:8 + header_length]))
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported packed array version {header['version']}")
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"Packed file is {header['byteorder']}-endian")
+        self.meta = header["meta"]
+        self._entries = header["arrays"]
+        self._data = view[8 + header_length:]
+        self._views = {}
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        """Return the names of the stored arrays"""
+        return list(self._entries)
+
+    def array(self, name):
+        """Return a zero-copy typed memoryview of a stored array"""
+        if name not in self._views:
+            entry = self._entries[name]
+            itemsize = typed_array(entry["typecode"]).itemsize
+            start = entry["offset"]
+            raw = self._data[start:start + entry["length"] * itemsize]
+            self._views[name] = raw.cast(entry["typecode"])
+        return self._views[name]
+
+    def strings(self, name):
+        """Return a StringTable over the <name>_blob / <name>_offsets arrays"""
+        return StringTable(self.array(name + "_blob"), self.array(name + "_offsets"))
+
+    def close(self):
+        """Release views and unmap the file"""
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        self._data.release()
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+class StringTable:
+    """Indexable view over strings stored by pack_strings()"""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]]).decode('utf-8')
+
+    def find(self, value):
+        """Binary search a sorted table; return the index of value or -1"""
+        index = bisect_left(self, value)
+        if index < len(self) and self[index] == value:
+            return index
+        return -1
+
+
+def add_strings(arrays, name, strings):
+    """Store strings in arrays under <name>_blob and <name>_offsets"""
+    arrays[name + "_blob"], arrays[name + "_offsets"] = pack_strings(strings)
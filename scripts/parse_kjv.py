@@ -7,6 +7,13 @@ import json
 import re
 import os
 
+import data_paths
+import pipeline_profile
+import source_ir
+
+# Bump when parse_kjv's output changes so cached IR files are rebuilt
+PARSER_VERSION = 1
+
 def parse_kjv(text):
     """Parse KJV text into structured data"""
     lines = text.split('\n')
@@ -113,24 +120,21 @@ def parse_kjv(text):
     return bible_data
 
 def main():
-    kjv_path = "KJV.txt"
+    kjv_path = data_paths.KJV_SOURCE
     if not os.path.exists(kjv_path):
         print(f"Error: {kjv_path} not found")
         return
 
-    print("Reading KJV text...")
-    with open(kjv_path, 'r', encoding='utf-8') as f:
-        text = f.read()
-
-    print("Parsing text...")
-    bible_data = parse_kjv(text)
+    print("Parsing KJV text...")
+    bible_data = source_ir.cached_parse(kjv_path, "parse_kjv", PARSER_VERSION, parse_kjv)
 
-    output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../assets/bible_kjv.json")
+    output_path = data_paths.translation_path("KJV")
     print(f"Saving to {output_path}")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(bible_data, f, indent=2, ensure_ascii=False)
+    with pipeline_profile.stage("save"):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(bible_data, f, indent=2, ensure_ascii=False)
 
     print("Done!")
 
 if __name__ == "__main__":
-    main()
+    pipeline_profile.run(main, "parse_kjv")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Script to resolve many references and ranges against a chapter store in one pass
+
+Sermon notes, reading plans and cross-reference panels look up dozens of
+passages at once. A batch is resolved as follows:
+
+1. Each distinct reference ("John 3:16", "Genesis 1-3", "Luke 1:80-2:5",
+   "Psalm 23") is parsed once and mapped to a span of verse ordinals with
+   the chapter table of the store (build_chapter_store.py).
+2. The spans are sorted and overlapping or adjacent ones are merged, so a
+   verse requested several times is read once.
+3. The merged runs are read in canonical order, one contiguous slice of the
+   memory-mapped text each.
+4. Results are cut out of the runs and returned in request order. References
+   that cannot be resolved get an error entry instead of failing the batch.
+
+The verse API serves the same over HTTP at /v1/{translation}/passages.
+
+Usage:
+    python passage_batch.py --translation KJV "John 3:16" "Genesis 1:1-3" "Psalm 23"
+    python passage_batch.py --translation KJV --file references.txt
+"""
+
+import argparse
+import json
+import sys
+from bisect import bisect_right
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from build_chapter_store import ChapterStore, chapter_store_path
+from ingest_cross_references import format_span
+
+MAX_BATCH_REFERENCES = 500
+
+
+def passage_span(store, reference):
+    """Return the (start, end) verse ordinals of a reference or range in a chapter store
+
+    Raises ValueError for references that do not parse or are not in the store.
+    """
+    book_idx, start_chapter, start_verse, end_chapter, end_verse = bible_canon.parse_passage(reference)
+    if start_verse == 0 or end_verse == 0:
+        raise ValueError(f"Invalid verse number in passage: {reference!r}")
+    first = store.chapter_index(book_idx, start_chapter)
+    last = store.chapter_index(book_idx, end_chapter)
+    if first < 0 or last < 0:
+        missing = start_chapter if first < 0 else end_chapter
+        raise ValueError(f"{bible_canon.BOOKS[book_idx]} {missing} is not in {store.translation}")
+    start_verse = 1 if start_verse is None else start_verse
+    if start_verse > store.verse_count(first):
+        raise ValueError(f"{reference} is not in {store.translation}")
+    end_verse = store.verse_count(last) if end_verse is None else min(end_verse, store.verse_count(last))
+    start = store.first_verse[first] + start_verse - 1
+    end = store.first_verse[last] + end_verse - 1
+    if end < start:
+        raise ValueError(f"Passage runs backwards: {reference!r}")
+    return start, end
+
+
+def merge_spans(spans):
+    """Sort spans and merge overlapping or adjacent ones; return [(start, end)]"""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [tuple(run) for run in merged]
+
+
+def resolve_passages(store, references):
+    """Resolve references against a chapter store; return (results in request order, stats)
+
+    Each result is {"reference", "passage", "verses": [{"book", "chapter",
+    "verse", "text"}]} or {"reference", "error"}.
+    """
+    spans = {}
+    errors = {}
+    for reference in references:
+        if reference in spans or reference in errors:
+            continue
+        try:
+            spans[reference] = passage_span(store, reference)
+        except ValueError as e:
+            errors[reference] = str(e)
+
+    runs = merge_spans(spans.values())
+    run_starts = [start for start, _ in runs]
+    run_texts = [[store.texts[ordinal] for ordinal in range(start, end + 1)] for start, end in runs]
+
+    books = store.packed.array("verse_book")
+    chapters = store.packed.array("verse_chapter")
+    numbers = store.packed.array("verse_number")
+    resolved = {}
+    for reference, (start, end) in spans.items():
+        run = bisect_right(run_starts, start) - 1
+        texts = run_texts[run][start - run_starts[run]:end - run_starts[run] + 1]
+        resolved[reference] = {
+            "reference": reference,
+            "passage": format_span(store.packed, start, end),
+            "verses": [
+                {"book": bible_canon.BOOKS[books[o]], "chapter": chapters[o], "verse": numbers[o], "text": text}
+                for o, text in zip(range(start, end + 1), texts)
+            ],
+        }
+
+    results = [resolved.get(r) or {"reference": r, "error": errors[r]} for r in references]
+    stats = {
+        "references": len(references),
+        "distinct": len(spans) + len(errors),
+        "errors": len(errors),
+        "runs": len(runs),
+        "verses_read": sum(end - start + 1 for start, end in runs),
+    }
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve a batch of references and ranges in one pass")
+    parser.add_argument("references", nargs="*")
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS)
+    parser.add_argument("--file", help="file with one reference per line ('-' for stdin)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    references = list(args.references)
+    if args.file:
+        with (sys.stdin if args.file == "-" else open(args.file, 'r', encoding='utf-8-sig')) as f:
+            references += [line.strip() for line in f if line.strip()]
+    if not references:
+        parser.error("no references given")
+
+    try:
+        store = ChapterStore(chapter_store_path(args.translation))
+    except FileNotFoundError:
+        print(f"Error: no chapter store for {args.translation}; run build_chapter_store.py first")
+        return 1
+
+    with pipeline_profile.stage("resolve"):
+        results, stats = resolve_passages(store, references)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            if "error" in result:
+                print(f"{result['reference']}: {result['error']}")
+                continue
+            print(result["passage"])
+            for verse in result["verses"]:
+                print(f"  {verse['chapter']}:{verse['verse']} {verse['text']}")
+    print(f"{stats['references']} references ({stats['distinct']} distinct, {stats['errors']} errors) "
+          f"read as {stats['runs']} runs of {stats['verses_read']} verses", file=sys.stderr)
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "passage_batch")
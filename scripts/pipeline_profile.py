@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Shared instrumentation for the Bible data pipeline scripts
+
+Every script runs its main() through run(), which understands these flags:
+
+    --timings              print wall time and peak RSS for each stage
+    --profile DIR          also write cProfile output to DIR (<name>.pstats and
+                           <name>.collapsed for flamegraph.pl / speedscope)
+    --trace-malloc N       also trace allocations and print the top N allocators
+
+Scripts mark their stages with:
+
+    with pipeline_profile.stage("parse"):
+        ...
+
+When no flag is given stage() returns a shared no-op context manager and
+nothing else is imported or started.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+_NULL_STAGE = contextlib.nullcontext()
+_active = None
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of this process, or None if unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_bytes(num_bytes):
+    """Format a byte count for the stage report"""
+    if num_bytes is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+
+def collapsed_stacks(stats):
+    """Convert pstats caller data into collapsed stack lines (microseconds)"""
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+
+    def label(func):
+        filename, lineno, name = func
+        return f"{os.path.basename(filename)}:{lineno}:{name}" if lineno else name
+
+    totals = {}
+
+    def walk(func, stack, cumulative):
+        _, _, self_time, total_time, _ = entries[func]
+        if total_time <= 0 or len(stack) > 64:
+            return
+        ratio = min(cumulative / total_time, 1.0)
+        stack = stack + [label(func)]
+        key = ";".join(stack)
+        totals[key] = totals.get(key, 0.0) + self_time * ratio
+        for callee in callees.get(func, []):
+            if label(callee) in stack:
+                continue
+            edge_time = entries[callee][4][func][3]
+            walk(callee, stack, edge_time * ratio)
+
+    for func, (_, _, _, total_time, callers) in entries.items():
+        if not callers:
+            walk(func, [], total_time)
+
+    return [f"{key} {int(value * 1e6)}" for key, value in totals.items() if value * 1e6 >= 1]
+
+
+class Profiler:
+    """Collects stage timings, cProfile data and allocation snapshots for one run"""
+
+    def __init__(self, name, profile_dir=None, trace_malloc=0):
+        self.name = name
+        self.profile_dir = profile_dir
+        self.trace_malloc = trace_malloc
+        self.stages = []
+        self._profile = None
+        self._started = None
+
+    def start(self):
+        """Start the enabled collectors"""
+        if self.trace_malloc:
+            import tracemalloc
+            tracemalloc.start(25)
+        if self.profile_dir:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, stage_name):
+        """Time a named stage and record peak memory when it ends"""
+        if self.trace_malloc:
+            import tracemalloc
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {
+                "stage": stage_name,
+                "seconds": time.perf_counter() - started,
+                "peak_rss": peak_rss_bytes(),
+            }
+            if self.trace_malloc:
+                import tracemalloc
+                record["traced_peak"] = tracemalloc.get_traced_memory()[1]
+            self.stages.append(record)
+
+    def finish(self):
+        """Stop collectors and write the report"""
+        total = time.perf_counter() - self._started
+        snapshot = self._take_snapshot() if self.trace_malloc else None
+        if self._profile:
+            self._profile.disable()
+            self._write_profile()
+
+        print(f"\n[profile] {self.name}: {total:.3f}s total, peak RSS {format_bytes(peak_rss_bytes())}")
+        for record in self.stages:
+            line = f"[profile]   {record['stage']:<24} {record['seconds']:8.3f}s  rss {format_bytes(record['peak_rss'])}"
+            if "traced_peak" in record:
+                line += f"  traced peak {format_bytes(record['traced_peak'])}"
+            print(line)
+
+        if snapshot:
+            self._report_allocations(snapshot)
+
+    def _write_profile(self):
+        import pstats
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, self.name)
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(base + ".pstats")
+        with open(base + ".collapsed", 'w', encoding='utf-8') as f:
+            f.write("\n".join(collapsed_stacks(stats)) + "\n")
+        print(f"[profile] wrote {base}.pstats and {base}.collapsed")
+
+    def _take_snapshot(self):
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        return snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+
+    def _report_allocations(self, snapshot):
+        print(f"[profile] top {self.trace_malloc} allocators:")
+        for stat in snapshot.statistics('lineno')[:self.trace_malloc]:
+            frame = stat.traceback[0]
+            print(f"[profile]   {format_bytes(stat.size):>10}  {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+
+
+def stage(stage_name):
+    """Return a context manager timing stage_name in the active run"""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(stage_name)
+
+
+def add_profile_arguments(parser):
+    """Add the instrumentation flags to an argument parser"""
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--timings", action="store_true", help="report wall time and peak RSS per stage")
+    group.add_argument("--profile", metavar="DIR", help="write cProfile pstats and collapsed stacks to DIR")
+    group.add_argument("--trace-malloc", metavar="N", type=int, default=0, help="report the top N allocators")
+    return parser
+
+
+def activate(name, args):
+    """Install a profiler for this process if any instrumentation flag is set"""
+    global _active
+    if not (args.timings or args.profile or args.trace_malloc):
+        return None
+    _active = Profiler(name, args.profile, args.trace_malloc)
+    _active.start()
+    return _active
+
+
+def deactivate():
+    """Finish and remove the active profiler"""
+    global _active
+    profiler, _active = _active, None
+    if profiler:
+        profiler.finish()
+
+
+def run(main, name):
+    """Run a script's main() with the instrumentation flags stripped from sys.argv"""
+    parser = add_profile_arguments(argparse.ArgumentParser(add_help=False, allow_abbrev=False))
+    args, remaining = parser.parse_known_args(sys.argv[1:])
+    sys.argv[1:] = remaining
+    activate(name, args)
+    try:
+        result = main()
+    finally:
+        deactivate()
+    sys.exit(result or 0)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Script to keep the Bible translations up to date while source files are edited
+
+The daemon parses KJV.txt once, keeps the parsed books and every translation
+in memory, and watches the source file and the assets directory (inotify on
+Linux, mtime polling elsewhere). Events are debounced, then only the affected
+stages are rerun for the affected books:
+
+    KJV.txt edited          -> reparse changed book sections, then the verse
+                               fix and completion stages for those books in
+                               every translation
+    bible_<t>.json edited   -> verse fix and completion for the books whose
+                               content changed in that translation
+
+Translations are rewritten only when a stage changed them. Files the daemon
+writes itself, and saves that leave a file's content unchanged, are ignored.
+
+Usage:
+    python pipeline_watch.py
+    python pipeline_watch.py --source /path/to/KJV.txt --debounce 100
+    python churchlink_data.py watch
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+import complete_bible_fix
+import data_paths
+import fix_bible_verses
+import pipeline_profile
+from bible_delta import canonical_json, to_object_layout
+
+DEFAULT_DEBOUNCE_MS = 150
+DEFAULT_POLL_INTERVAL = 0.25
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def file_digest(path):
+    """Return the SHA-256 of a file's bytes, or None if it does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def book_digest(book_data):
+    """Return a digest of one book's content"""
+    return hashlib.sha256(canonical_json(book_data)).hexdigest()
+
+
+class InotifyWatcher:
+    """Report changed files in a set of directories using Linux inotify"""
+
+    def __init__(self, directories):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        for directory in directories:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+            self.directories[wd] = directory
+
+    def wait(self, timeout=None):
+        """Return the set of paths changed within timeout seconds (None blocks)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, _, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset:offset + name_length].rstrip(b'\0')
+                offset += name_length
+                if wd in self.directories and name:
+                    changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Report changed files in a set of directories by polling their mtimes"""
+
+    def __init__(self, directories, interval=DEFAULT_POLL_INTERVAL):
+        self.directories = list(directories)
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                entries = os.scandir(directory)
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Return the set of paths changed within timeout seconds (None blocks)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            remaining = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(remaining)
+
+    def close(self):
+        pass
+
+
+def create_watcher(directories, poll=False, interval=DEFAULT_POLL_INTERVAL):
+    """Return an inotify watcher, falling back to polling where inotify is unavailable"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling every {interval}s")
+    return PollingWatcher(directories, interval)
+
+
+class BuildDaemon:
+    """Parsed source and translations held in memory, rebuilt incrementally"""
+
+    def __init__(self, source_path=None, translations=None):
+        self.source_path = os.path.abspath(source_path or data_paths.KJV_SOURCE)
+        self.translations = list(translations or data_paths.TRANSLATIONS)
+        self.translation_paths = {
+            os.path.abspath(data_paths.translation_path(t)): t for t in self.translations
+        }
+        self.sections = {}       # book -> source section digest
+        self.kjv_books = {}      # book -> {chapter: {verse: text}}
+        self.bibles = {}         # translation -> object-layout data
+        self.book_digests = {}   # translation -> {book: digest}
+        self.file_digests = {}   # path -> digest of the content last seen or written
+
+    def directories(self):
+        """Return the directories to watch"""
+        return sorted({os.path.dirname(self.source_path)} | {os.path.dirname(p) for p in self.translation_paths})
+
+    def load_source(self):
+        """Parse changed book sections of the source text; return the books that changed"""
+        try:
+            with open(self.source_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            print(f"Warning: {self.source_path} not found")
+            text = ''
+        self.file_digests[self.source_path] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+        sections = {}
+        for book, section_text in fix_bible_verses.split_book_sections(text):
+            # A book repeated in the source replaces its earlier section, as in a full parse
+            sections[book] = section_text
+
+        changed = set(self.sections) - set(sections)
+        for book in changed:
+            del self.sections[book]
+            self.kjv_books.pop(book, None)
+        for book, section_text in sections.items():
+            digest = hashlib.sha256(section_text.encode('utf-8')).hexdigest()
+            if self.sections.get(book) == digest:
+                continue
+            self.sections[book] = digest
+            self.kjv_books.update(fix_bible_verses.parse_kjv_text(section_text))
+            changed.add(book)
+        return changed
+
+    def load_translation(self, translation):
+        """Load a translation from disk; return the books whose content changed"""
+        path = data_paths.translation_path(translation)
+        try:
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                bible_data = json.load(f)
+        except FileNotFoundError:
+            bible_data = {"books": {}}
+        except ValueError as e:
+            print(f"Error loading {path}: {e}")
+            return set()
+        self.file_digests[os.path.abspath(path)] = file_digest(path)
+
+        if isinstance(bible_data.get("books"), list):
+            bible_data = to_object_layout(bible_data)
+        bible_data.setdefault("books", {})
+        previous = self.book_digests.get(translation, {})
+        digests = {book: book_digest(data) for book, data in bible_data["books"].items()}
+        self.bibles[translation] = bible_data
+        self.book_digests[translation] = digests
+        return {book for book in digests.keys() | previous.keys() if digests.get(book) != previous.get(book)}
+
+    def run_stages(self, translation, books):
+        """Run the verse fix and completion stages for some books; return True if anything changed"""
+        bible_data = self.bibles[translation]
+        before = {book: self.book_digests[translation].get(book) for book in books}
+
+        kjv_subset = {book: self.kjv_books[book] for book in books if book in self.kjv_books}
+        if kjv_subset:
+            fix_bible_verses.update_bible_data(kjv_subset, bible_data)
+        complete_bible_fix.fix_bible_data(bible_data, books)
+
+        changed = False
+        for book in books:
+            digest = book_digest(bible_data["books"][book]) if book in bible_data["books"] else None
+            if digest != before[book]:
+                self.book_digests[translation][book] = digest
+                changed = True
+        return changed
+
+    def save_translation(self, translation):
+        """Write a translation atomically and remember its digest so the write is not reprocessed"""
+        path = data_paths.translation_path(translation)
+        data = json.dumps(self.bibles[translation], indent=2, ensure_ascii=False).encode('utf-8')
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        self.file_digests[os.path.abspath(path)] = hashlib.sha256(data).hexdigest()
+        os.replace(temp_path, path)
+        print(f"Successfully saved {path}")
+
+    def rebuild(self, plan):
+        """Run the stages for {translation: books} and save what changed"""
+        for translation, books in plan.items():
+            if books and self.run_stages(translation, sorted(books)):
+                self.save_translation(translation)
+
+    def start(self):
+        """Load everything and bring every translation up to date"""
+        self.load_source()
+        plan = {}
+        for translation in self.translations:
+            self.load_translation(translation)
+            plan[translation] = set(complete_bible_fix.BIBLE_STRUCTURE) | set(self.bibles[translation]["books"])
+        self.rebuild(plan)
+
+    def handle(self, paths):
+        """Rebuild after a batch of changed paths; return {translation: books} that were rerun"""
+        plan = {}
+        for path in sorted(os.path.abspath(p) for p in paths):
+            if path != self.source_path and path not in self.translation_paths:
+                continue
+            if file_digest(path) == self.file_digests.get(path):
+                continue
+            if path == self.source_path:
+                books = self.load_source()
+                for translation in self.translations:
+                    plan.setdefault(translation, set()).update(books)
+            else:
+                translation = self.translation_paths[path]
+                plan.setdefault(translation, set()).update(self.load_translation(translation))
+        plan = {translation: books for translation, books in plan.items() if books}
+        self.rebuild(plan)
+        return plan
+
+
+def watch(source_path=None, debounce_ms=DEFAULT_DEBOUNCE_MS, poll=False, interval=DEFAULT_POLL_INTERVAL):
+    """Run the build daemon until interrupted"""
+    daemon = BuildDaemon(source_path)
+    with pipeline_profile.stage("initial build"):
+        daemon.start()
+
+    watcher = create_watcher(daemon.directories(), poll, interval)
+    print(f"Watching {', '.join(daemon.directories())} ({type(watcher).__name__}); press Ctrl+C to stop")
+    try:
+        while True:
+            changed = watcher.wait()
+            # Debounce: keep collecting until the directories have been quiet for a while
+            while True:
+                more = watcher.wait(debounce_ms / 1000)
+                if not more:
+                    break
+                changed |= more
+
+            started = time.perf_counter()
+            plan = daemon.handle(changed)
+            if plan:
+                elapsed = (time.perf_counter() - started) * 1000
+                summary = "; ".join(f"{t}: {', '.join(sorted(books))}" for t, books in sorted(plan.items()))
+                print(f"Rebuilt {summary} in {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        watcher.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild Bible translations incrementally as source files change")
+    parser.add_argument("--source", default=data_paths.KJV_SOURCE, help="KJV source text to watch")
+    parser.add_argument("--debounce", type=int, default=DEFAULT_DEBOUNCE_MS, help="quiet period in milliseconds")
+    parser.add_argument("--poll", action="store_true", help="poll file mtimes instead of using inotify")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL, help="polling interval in seconds")
+    args = parser.parse_args()
+    return watch(args.source, args.debounce, args.poll, args.interval)
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "pipeline_watch")
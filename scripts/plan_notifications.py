@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Script to build the daily reading-plan push notifications as FCM multicast batches
+
+Subscribers are grouped by (plan, day, translation) and each distinct group
+is resolved once: the day's readings come from reading_plans.json, the
+excerpt is the opening of the first reading in that translation, and the
+deep link points at the pre-rendered chapter page (render_static_chapters.py).
+The work therefore grows with the number of distinct plan-days, not with the
+number of subscribers.
+
+Subscriptions are read from an NDJSON or JSON file with one record per user,
+the fields of the app's reading_plans/{uid} progress documents plus a device
+token and translation:
+
+    {"userId": "abc", "token": "<fcm token>", "planId": "chronological",
+     "currentDay": 12, "translation": "KJV", "isPaused": false}
+
+or straight from Firestore with --firestore (tokens in the fcmToken field).
+Paused and completed plans are skipped. The output is NDJSON with one
+multicast message of at most MAX_MULTICAST_TOKENS tokens per line, in the
+shape taken by firebase-admin's sendEachForMulticast().
+
+--send local passes every message through LocalSender, a stand-in that
+checks them against the FCM limits without sending anything; --send fcm
+sends them with firebase-admin.
+
+Usage:
+    python plan_notifications.py subscriptions.ndjson -o notifications.ndjson
+    python plan_notifications.py subscriptions.ndjson --send local
+    python plan_notifications.py --firestore --project allchurches-956e0 --send fcm
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import load_json_file
+from fix_bible_verses import is_placeholder_verse
+from render_static_chapters import DEFAULT_BASE_URL, chapter_url
+
+MAX_MULTICAST_TOKENS = 500
+MAX_PAYLOAD_BYTES = 4000
+EXCERPT_LENGTH = 120
+NOTIFICATION_TYPE = "reading_plan"
+PROGRESS_COLLECTION = 'reading_plans'
+
+
+def iter_subscriptions(lines):
+    """Yield subscription records from NDJSON lines or a JSON array"""
+    lines = iter(lines)
+    for line in lines:
+        if not line.strip():
+            continue
+        if line.lstrip().startswith("["):
+            yield from json.loads(line + "".join(lines))
+            return
+        yield json.loads(line)
+
+
+def iter_firestore_subscriptions(client):
+    """Yield subscription records from the reading_plans/{uid} progress documents"""
+    for document in client.collection(PROGRESS_COLLECTION).stream():
+        progress = document.to_dict()
+        yield dict(progress, userId=progress.get('userId', document.id), token=progress.get('fcmToken'))
+
+
+def group_subscriptions(subscriptions, default_translation="KJV"):
+    """Group device tokens by (plan id, day, translation); return (groups, stats)
+
+    A token subscribed twice to the same plan day is kept once.
+    """
+    groups = {}
+    stats = {"subscriptions": 0, "skipped": 0}
+    for subscription in subscriptions:
+        stats["subscriptions"] += 1
+        token = subscription.get('token')
+        day = subscription.get('currentDay')
+        if (not token or not subscription.get('planId') or not isinstance(day, int)
+                or subscription.get('isPaused') or subscription.get('isCompleted')):
+            stats["skipped"] += 1
+            continue
+        translation = (subscription.get('translation') or default_translation).upper()
+        groups.setdefault((subscription['planId'], day, translation), {})[token] = None
+    stats["groups"] = len(groups)
+    return {key: list(tokens) for key, tokens in groups.items()}, stats
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    """Shorten text to at most length characters at a word boundary"""
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length - 1].rsplit(" ", 1)[0].rstrip(",;:") + "..."
+
+
+class PlanResolver:
+    """Resolve plan days into notification content, loading each translation once"""
+
+    def __init__(self, plans_data, load_translation, base_url=None):
+        self.plans = {plan['id']: plan for plan in plans_data.get('plans', [])}
+        self.days = {
+            plan_id: {reading['day']: reading for reading in plan.get('readings', [])}
+            for plan_id, plan in self.plans.items()
+        }
+        self.load_translation = load_translation
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.chapters = {}
+        self.resolved = 0
+        self.unresolved = 0
+
+    def _chapter(self, translation, book_idx, chapter):
+        if translation not in self.chapters:
+            bible_data = self.load_translation(translation)
+            self.chapters[translation] = {
+                (b, c): verses for b, c, verses in bible_canon.iter_book_chapters(bible_data or {})
+            }
+        return self.chapters[translation].get((book_idx, chapter))
+
+    def resolve(self, plan_id, day, translation):
+        """Return the notification content of a plan day, or None if it has no reading"""
+        reading = self.days.get(plan_id, {}).get(day)
+        if reading is None or not reading.get('readings'):
+            self.unresolved += 1
+            return None
+        self.resolved += 1
+        plan = self.plans[plan_id]
+        passages = reading['readings']
+
+        text = ""
+        link = self.base_url + "/"
+        data = {"type": NOTIFICATION_TYPE, "planId": plan_id, "day": str(day), "translation": translation,
+                "reference": passages[0]}
+        try:
+            book_idx, chapter, verse, _, _ = bible_canon.parse_passage(passages[0])
+        except ValueError:
+            book_idx = None
+        if book_idx is not None:
+            verses = self._chapter(translation, book_idx, chapter) or []
+            if 0 < (verse or 1) <= len(verses) and not is_placeholder_verse(verses[(verse or 1) - 1]):
+                text = verses[(verse or 1) - 1]
+            link = self.base_url + chapter_url(translation, book_idx, chapter) + (f"#v{verse}" if verse else "")
+            data.update(book=bible_canon.BOOKS[book_idx], chapter=str(chapter), verse=str(verse or 1))
+        data["link"] = link
+
+        body = ", ".join(passages)
+        if text:
+            body += ": " + excerpt(text)
+        return {
+            "notification": {"title": f"{plan.get('name', plan_id)}: Day {day}", "body": body},
+            "data": data,
+            "android": {"collapseKey": f"{NOTIFICATION_TYPE}_{plan_id}"},
+            "apns": {"headers": {"apns-collapse-id": f"{NOTIFICATION_TYPE}_{plan_id}"}},
+            "webpush": {"fcmOptions": {"link": link}},
+        }
+
+
+def build_messages(groups, resolver, chunk_size=MAX_MULTICAST_TOKENS):
+    """Yield multicast messages for each resolvable group, chunk_size tokens at a time"""
+    for (plan_id, day, translation), tokens in groups.items():
+        content = resolver.resolve(plan_id, day, translation)
+        if content is None:
+            continue
+        for start in range(0, len(tokens), chunk_size):
+            yield dict(content, tokens=tokens[start:start + chunk_size])
+
+
+def write_ndjson(messages, f):
+    """Write messages as NDJSON; return (messages, tokens)"""
+    count = tokens = 0
+    for message in messages:
+        f.write(json.dumps(message, ensure_ascii=False, separators=(',', ':')) + "\n")
+        count += 1
+        tokens += len(message['tokens'])
+    return count, tokens
+
+
+class LocalSender:
+    """Stand-in for sendEachForMulticast that validates messages against the FCM limits"""
+
+    def __init__(self):
+        self.messages = 0
+        self.sent = 0
+        self.failed = 0
+        self.errors = []
+
+    def check(self, message):
+        """Return the reasons a message would be rejected"""
+        problems = []
+        tokens = message.get('tokens') or []
+        if not tokens or len(tokens) > MAX_MULTICAST_TOKENS:
+            problems.append(f"{len(tokens)} tokens (1-{MAX_MULTICAST_TOKENS} allowed)")
+        if len(set(tokens)) != len(tokens):
+            problems.append("duplicate tokens")
+        data = message.get('data', {})
+        if not all(isinstance(value, str) for value in data.values()):
+            problems.append("data values must be strings")
+        payload = {key: value for key, value in message.items() if key != 'tokens'}
+        size = len(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        if size > MAX_PAYLOAD_BYTES:
+            problems.append(f"payload is {size} bytes (max {MAX_PAYLOAD_BYTES})")
+        if not message.get('notification', {}).get('title'):
+            problems.append("missing notification title")
+        return problems
+
+    def send_each_for_multicast(self, message):
+        """Record a message; return (success count, failure count)"""
+        self.messages += 1
+        problems = self.check(message)
+        if problems:
+            self.failed += len(message.get('tokens') or [])
+            self.errors.append(problems)
+            return 0, len(message.get('tokens') or [])
+        self.sent += len(message['tokens'])
+        return len(message['tokens']), 0
+
+
+class FirebaseSender:
+    """Send messages with firebase-admin"""
+
+    def __init__(self, project=None):
+        import firebase_admin
+        from firebase_admin import messaging
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(options={'projectId': project} if project else None)
+        self.messaging = messaging
+        self.messages = 0
+        self.sent = 0
+        self.failed = 0
+        self.errors = []
+
+    def send_each_for_multicast(self, message):
+        messaging = self.messaging
+        notification = message['notification']
+        multicast = messaging.MulticastMessage(
+            tokens=message['tokens'],
+            notification=messaging.Notification(title=notification['title'], body=notification['body']),
+            data=message['data'],
+            android=messaging.AndroidConfig(collapse_key=message['android']['collapseKey']),
+            apns=messaging.APNSConfig(headers=message['apns']['headers']),
+            webpush=messaging.WebpushConfig(fcm_options=messaging.WebpushFCMOptions(
+                link=message['webpush']['fcmOptions']['link'])),
+        )
+        response = messaging.send_each_for_multicast(multicast)
+        self.messages += 1
+        self.sent += response.success_count
+        self.failed += response.failure_count
+        return response.success_count, response.failure_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build daily reading-plan notifications as FCM multicast batches")
+    parser.add_argument("subscriptions", nargs="?", help="NDJSON or JSON subscription records ('-' for stdin)")
+    parser.add_argument("--firestore", action="store_true", help="read subscriptions from reading_plans/{uid}")
+    parser.add_argument("--project", default=os.environ.get("GCLOUD_PROJECT"))
+    parser.add_argument("--plans", default=data_paths.asset_path('reading_plans.json'))
+    parser.add_argument("--translation", default="KJV", choices=data_paths.TRANSLATIONS,
+                        help="translation of subscriptions that do not name one")
+    parser.add_argument("--base-url", help="site origin of the deep links (default: the Firebase Hosting site)")
+    parser.add_argument("--chunk-size", type=int, default=MAX_MULTICAST_TOKENS, help="tokens per multicast message")
+    parser.add_argument("-o", "--output", help="NDJSON output (default: stdout unless --send is given)")
+    parser.add_argument("--send", choices=["local", "fcm"], help="send through the local stand-in or FCM")
+    args = parser.parse_args()
+
+    if not 0 < args.chunk_size <= MAX_MULTICAST_TOKENS:
+        parser.error(f"--chunk-size must be between 1 and {MAX_MULTICAST_TOKENS}")
+    if not args.subscriptions and not args.firestore:
+        parser.error("a subscriptions file or --firestore is required")
+
+    plans_data = load_json_file(args.plans)
+    if plans_data is None:
+        return 1
+
+    started = time.perf_counter()
+    with pipeline_profile.stage("group"):
+        if args.firestore:
+            try:
+                from google.cloud import firestore
+            except ImportError:
+                print("Error: google-cloud-firestore is required (pip install google-cloud-firestore)")
+                return 1
+            subscriptions = iter_firestore_subscriptions(firestore.Client(project=args.project))
+            groups, stats = group_subscriptions(subscriptions, args.translation)
+        elif args.subscriptions == "-":
+            groups, stats = group_subscriptions(iter_subscriptions(sys.stdin), args.translation)
+        else:
+            with open(args.subscriptions, 'r', encoding='utf-8-sig') as f:
+                groups, stats = group_subscriptions(iter_subscriptions(f), args.translation)
+
+    resolver = PlanResolver(plans_data, lambda t: load_json_file(data_paths.translation_path(t)), args.base_url)
+    with pipeline_profile.stage("resolve"):
+        messages = list(build_messages(groups, resolver, args.chunk_size))
+    recipients = sum(len(m['tokens']) for m in messages)
+    print(f"{stats['subscriptions']} subscriptions ({stats['skipped']} skipped) in {stats['groups']} groups, "
+          f"{resolver.resolved} resolved ({resolver.unresolved} past the end of their plan) into {len(messages)} messages for {recipients} devices "
+          f"in {time.perf_counter() - started:.2f} s", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            write_ndjson(messages, f)
+        print(f"Notifications saved to {args.output} ({os.path.getsize(args.output)} bytes)", file=sys.stderr)
+    elif not args.send:
+        write_ndjson(messages, sys.stdout)
+
+    if args.send:
+        if args.send == "local":
+            sender = LocalSender()
+        else:
+            try:
+                sender = FirebaseSender(args.project)
+            except ImportError:
+                print("Error: firebase-admin is required (pip install firebase-admin)")
+                return 1
+        with pipeline_profile.stage("send"):
+            for message in messages:
+                sender.send_each_for_multicast(message)
+        print(f"Sent {sender.messages} messages: {sender.sent} delivered, {sender.failed} failed", file=sys.stderr)
+        for problems in sender.errors[:10]:
+            print(f"  rejected: {'; '.join(problems)}", file=sys.stderr)
+        return 1 if sender.failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "plan_notifications")
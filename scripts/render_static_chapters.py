@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Script to pre-render every chapter as static HTML and JSON for the web build
+
+Shared verse links on the web app otherwise paint nothing until the Flutter
+runtime has loaded and decoded a whole translation. This stage writes one
+small page per chapter into the web build directory (build/web, next to the
+icons from generate_icons.py):
+
+    bible/<translation>/<book-slug>/<chapter>.html    readable page, verses anchored as #v16
+    bible/<translation>/<book-slug>/<chapter>.json    same shape as the verse API response
+    bible/<translation>/index.html                     table of contents
+    sitemap.xml                                        every chapter page
+
+Each file is also written pre-compressed as <name>.gz (gzip -9, fixed mtime)
+for hosts that serve gzip_static files. Books are rendered in parallel with a
+process pool, and files whose bytes did not change are left untouched so
+their timestamps and hosting caches survive a rebuild.
+
+Usage:
+    python render_static_chapters.py
+    python render_static_chapters.py --translation KJV --base-url https://example.org
+"""
+
+import argparse
+import gzip
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import load_json_file
+
+STATIC_DIR = "bible"
+DEFAULT_BASE_URL = "https://allchurches-956e0.web.app"
+SITEMAP_URL_LIMIT = 50000
+
+PAGE_STYLE = ("body{font:18px/1.6 Georgia,serif;max-width:40em;margin:0 auto;padding:1em;color:#222}"
+              "sup{color:#888;font-size:.6em;margin-right:.3em}nav{display:flex;justify-content:space-between;"
+              "font:15px sans-serif;margin:2em 0}a{color:#1565c0}:target{background:#fff8c4}")
+
+
+def book_slug(book):
+    """Return the URL slug of a book, e.g. 1 John -> 1-john"""
+    return re.sub(r"[^a-z0-9]+", "-", book.lower()).strip("-")
+
+
+def chapter_url(translation, book_idx, chapter, extension="html"):
+    """Return the site-relative URL of a rendered chapter"""
+    return f"/{STATIC_DIR}/{translation.lower()}/{book_slug(bible_canon.BOOKS[book_idx])}/{chapter}.{extension}"
+
+
+def render_chapter_json(translation, book_idx, chapter, verses):
+    """Render a chapter in the verse API's JSON shape"""
+    return json.dumps({
+        "translation": translation,
+        "book": bible_canon.BOOKS[book_idx],
+        "chapter": chapter,
+        "verses": [{"verse": number, "text": text} for number, text in enumerate(verses, 1)],
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def render_chapter_html(translation, book_idx, chapter, verses, previous, following, base_url):
+    """Render a chapter as a small standalone HTML page"""
+    title = f"{bible_canon.BOOKS[book_idx]} {chapter} ({translation})"
+    url = chapter_url(translation, book_idx, chapter)
+    description = verses[0] if verses else title
+    links = []
+    for label, neighbour in (("&larr; ", previous), ("", following)):
+        if neighbour is None:
+            links.append("<span></span>")
+            continue
+        name = html.escape(f"{bible_canon.BOOKS[neighbour[0]]} {neighbour[1]}")
+        text = f"{label}{name}" if label else f"{name} &rarr;"
+        links.append(f'<a href="{chapter_url(translation, *neighbour)}">{text}</a>')
+    nav = f"<nav>{''.join(links)}</nav>"
+
+    parts = [
+        "<!doctype html>",
+        '<html lang="en"><head><meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width,initial-scale=1">',
+        f"<title>{html.escape(title)}</title>",
+        f'<meta name="description" content="{html.escape(description[:160])}">',
+        f'<link rel="canonical" href="{base_url}{url}">',
+        f'<link rel="alternate" type="application/json" href="{chapter_url(translation, book_idx, chapter, "json")}">',
+        f"<style>{PAGE_STYLE}</style></head><body>",
+        f"<h1>{html.escape(title)}</h1>",
+    ]
+    parts.extend(f'<p id="v{number}"><sup>{number}</sup>{html.escape(text)}</p>' for number, text in enumerate(verses, 1))
+    parts.append(nav)
+    parts.append('<p><a href="/">Open in Church-Link</a></p></body></html>')
+    return "\n".join(parts).encode('utf-8')
+
+
+def render_index_html(translation, chapters):
+    """Render a translation's table of contents"""
+    title = f"The Bible ({translation})"
+    books = {}
+    for book_idx, chapter in chapters:
+        books.setdefault(book_idx, []).append(chapter)
+    parts = [
+        "<!doctype html>",
+        '<html lang="en"><head><meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width,initial-scale=1">',
+        f"<title>{title}</title><style>{PAGE_STYLE}</style></head><body><h1>{title}</h1>",
+    ]
+    for book_idx, numbers in books.items():
+        links = " ".join(f'<a href="{chapter_url(translation, book_idx, n)}">{n}</a>' for n in numbers)
+        parts.append(f"<h2>{html.escape(bible_canon.BOOKS[book_idx])}</h2><p>{links}</p>")
+    parts.append("</body></html>")
+    return "\n".join(parts).encode('utf-8')
+
+
+def write_static(path, data):
+    """Write a file and its .gz sibling unless unchanged; return (written, bytes, gzip bytes)"""
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    written = False
+    for target, content in ((path, data), (path + ".gz", compressed)):
+        try:
+            with open(target, 'rb') as f:
+                if f.read() == content:
+                    continue
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+        written = True
+    return written, len(data), len(compressed)
+
+
+def render_book(job):
+    """Render every chapter of one book; return (files written, files unchanged, bytes, gzip bytes)"""
+    translation, book_idx, chapters, previous, following, output_dir, base_url = job
+    totals = [0, 0, 0, 0]
+    for position, (chapter, verses) in enumerate(chapters):
+        before = (book_idx, chapters[position - 1][0]) if position else previous
+        after = (book_idx, chapters[position + 1][0]) if position + 1 < len(chapters) else following
+        pages = (
+            ("html", render_chapter_html(translation, book_idx, chapter, verses, before, after, base_url)),
+            ("json", render_chapter_json(translation, book_idx, chapter, verses)),
+        )
+        for extension, data in pages:
+            path = output_dir + chapter_url(translation, book_idx, chapter, extension)
+            written, size, compressed = write_static(path, data)
+            totals[0 if written else 1] += 1
+            totals[2] += size
+            totals[3] += compressed
+    return totals
+
+
+def book_jobs(translation, bible_data, output_dir, base_url):
+    """Return (render jobs, [(book_idx, chapter)]) for a translation, one job per book"""
+    books = {}
+    for book_idx, chapter, verses in bible_canon.iter_book_chapters(bible_data):
+        books.setdefault(book_idx, []).append((chapter, list(verses)))
+
+    order = list(books)
+    jobs = []
+    for position, book_idx in enumerate(order):
+        previous = following = None
+        if position:
+            previous = (order[position - 1], books[order[position - 1]][-1][0])
+        if position + 1 < len(order):
+            following = (order[position + 1], books[order[position + 1]][0][0])
+        jobs.append((translation, book_idx, books[book_idx], previous, following, output_dir, base_url))
+    chapters = [(book_idx, chapter) for book_idx in order for chapter, _ in books[book_idx]]
+    return jobs, chapters
+
+
+def render_books(jobs, workers=None):
+    """Render books with a process pool; yield each book's totals"""
+    if workers == 1:
+        yield from map(render_book, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(render_book, jobs)
+
+
+def write_sitemap(output_dir, base_url, urls):
+    """Write sitemap.xml (a sitemap index when there are too many URLs for one file)"""
+    def urlset(batch):
+        entries = "".join(f"<url><loc>{html.escape(base_url + url)}</loc></url>\n" for url in batch)
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                f"{entries}</urlset>\n").encode('utf-8')
+
+    if len(urls) <= SITEMAP_URL_LIMIT:
+        write_static(os.path.join(output_dir, "sitemap.xml"), urlset(urls))
+        return 1
+
+    names = []
+    for start in range(0, len(urls), SITEMAP_URL_LIMIT):
+        name = f"sitemap-{len(names) + 1}.xml"
+        write_static(os.path.join(output_dir, name), urlset(urls[start:start + SITEMAP_URL_LIMIT]))
+        names.append(name)
+    entries = "".join(f"<sitemap><loc>{base_url}/{name}</loc></sitemap>\n" for name in names)
+    write_static(os.path.join(output_dir, "sitemap.xml"), (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f"{entries}</sitemapindex>\n").encode('utf-8'))
+    return len(names)
+
+
+def render_static_chapters(translations, output_dir=None, base_url=None, workers=None):
+    """Render every chapter of the given translations; return stats"""
+    output_dir = output_dir or data_paths.WEB_BUILD_DIR
+    base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    stats = {"chapters": 0, "written": 0, "unchanged": 0, "bytes": 0, "gzip_bytes": 0}
+    jobs = []
+    urls = []
+    for translation in translations:
+        bible_data = load_json_file(data_paths.translation_path(translation))
+        if bible_data is None:
+            continue
+        translation_jobs, chapters = book_jobs(translation, bible_data, output_dir, base_url)
+        jobs.extend(translation_jobs)
+        urls.extend(chapter_url(translation, *key) for key in chapters)
+        stats["chapters"] += len(chapters)
+        index_path = os.path.join(output_dir, STATIC_DIR, translation.lower(), "index.html")
+        write_static(index_path, render_index_html(translation, chapters))
+
+    # Larger books first so the pool does not finish on Psalms
+    jobs.sort(key=lambda job: -sum(len(verses) for _, verses in job[2]))
+    for written, unchanged, size, compressed in render_books(jobs, workers):
+        stats["written"] += written
+        stats["unchanged"] += unchanged
+        stats["bytes"] += size
+        stats["gzip_bytes"] += compressed
+
+    stats["sitemaps"] = write_sitemap(output_dir, base_url, urls)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render chapters as static HTML and JSON for the web build")
+    parser.add_argument("--translation", action="append", choices=data_paths.TRANSLATIONS,
+                        help="translation to render (repeatable, default: all)")
+    parser.add_argument("-o", "--output", default=data_paths.WEB_BUILD_DIR, help="web build directory")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="site origin used in the sitemap and canonical links")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with pipeline_profile.stage("render"):
+        stats = render_static_chapters(args.translation or data_paths.TRANSLATIONS, args.output,
+                                       args.base_url, args.workers)
+    if not stats["chapters"]:
+        print("Error: no translations rendered")
+        return 1
+
+    files = stats["written"] + stats["unchanged"]
+    print(f"{stats['chapters']} chapters, {files} pages ({stats['written']} written, {stats['unchanged']} unchanged) "
+          f"in {time.perf_counter() - started:.2f} s")
+    print(f"Average page {stats['bytes'] // files} bytes, {stats['gzip_bytes'] // files} bytes gzipped")
+    print(f"Static chapters saved to {os.path.join(args.output, STATIC_DIR)}")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "render_static_chapters")
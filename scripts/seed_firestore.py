@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Script to seed Firestore with Bible chapters and reading plans
+
+Documents are written through batched writes of up to MAX_BATCH_OPS operations.
+Several batches commit concurrently from a thread pool, with a bounded number
+in flight, and a batch that fails with a contention or transient error
+(ABORTED, UNAVAILABLE, RESOURCE_EXHAUSTED, DEADLINE_EXCEEDED) is rebuilt and
+retried with exponential backoff and jitter.
+
+Collections:
+    bible_chapters/{TRANSLATION}_{Book}_{chapter}   one document per chapter
+    bible_reading_plans/{planId}                   plan metadata
+    bible_reading_plans/{planId}/days/{day}        one document per plan day
+
+The per-user progress documents in reading_plans/{uid} are left alone.
+
+Requires google-cloud-firestore (pip install google-cloud-firestore).
+
+Usage:
+    # Local emulator (firebase emulators:start --only firestore)
+    python seed_firestore.py --emulator localhost:8080
+
+    # Production, with GOOGLE_APPLICATION_CREDENTIALS pointing at a service account
+    python seed_firestore.py --project allchurches-956e0 --translation KJV
+
+    # Count documents and batches without connecting
+    python seed_firestore.py --dry-run
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from bible_delta import build_manifest, iter_chapters, load_json_file, manifest_version
+
+MAX_BATCH_OPS = 500
+DEFAULT_WORKERS = 8
+DEFAULT_RETRIES = 6
+CHAPTERS_COLLECTION = 'bible_chapters'
+PLANS_COLLECTION = 'bible_reading_plans'
+PLAN_DAYS_COLLECTION = 'days'
+
+
+def default_project():
+    """Return the default Firebase project from .firebaserc"""
+    config = load_json_file(os.path.join(data_paths.ROOT_DIR, '.firebaserc')) or {}
+    return config.get('projects', {}).get('default')
+
+
+def chapter_documents(translation, bible_data):
+    """Yield (path, data) for each chapter document of a translation"""
+    version = manifest_version(build_manifest(bible_data))
+    for book, testament, chapter_key, verses in iter_chapters(bible_data):
+        chapter = int(chapter_key)
+        yield (CHAPTERS_COLLECTION, f"{translation}_{book}_{chapter}"), {
+            'translation': translation,
+            'book': book,
+            'bookIndex': bible_canon.book_index(book),
+            'testament': testament,
+            'chapter': chapter,
+            'verses': verses,
+            'verseCount': len(verses),
+            'version': version,
+        }
+
+
+def plan_documents(plans_data):
+    """Yield (path, data) for each reading plan and plan day document"""
+    for plan in plans_data.get('plans', []):
+        days = plan.get('readings', [])
+        metadata = {key: value for key, value in plan.items() if key != 'readings'}
+        metadata['dayCount'] = len(days)
+        yield (PLANS_COLLECTION, plan['id']), metadata
+        for day in days:
+            yield (PLANS_COLLECTION, plan['id'], PLAN_DAYS_COLLECTION, str(day['day'])), dict(day, planId=plan['id'])
+
+
+def chunked(documents, size=MAX_BATCH_OPS):
+    """Group (path, data) pairs into lists of at most size operations"""
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def retryable_errors():
+    """Return the exception types worth retrying a batch commit on"""
+    from google.api_core import exceptions
+    return (
+        exceptions.Aborted,
+        exceptions.DeadlineExceeded,
+        exceptions.InternalServerError,
+        exceptions.ResourceExhausted,
+        exceptions.ServiceUnavailable,
+    )
+
+
+class BatchSeeder:
+    """Commit batched writes from a thread pool with retry on contention"""
+
+    def __init__(self, client, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, merge=False):
+        self.client = client
+        self.retries = retries
+        self.merge = merge
+        self.retryable = retryable_errors()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.in_flight = threading.BoundedSemaphore(workers * 2)
+        self.lock = threading.Lock()
+        self.futures = []
+        self.documents = 0
+        self.batches = 0
+        self.retried = 0
+
+    def _commit(self, operations):
+        """Commit one batch, rebuilding and retrying it on transient errors"""
+        try:
+            for attempt in range(self.retries + 1):
+                batch = self.client.batch()
+                for path, data in operations:
+                    batch.set(self.client.document(*path), data, merge=self.merge)
+                try:
+                    batch.commit(retry=None)
+                    break
+                except self.retryable:
+                    if attempt == self.retries:
+                        raise
+                    with self.lock:
+                        self.retried += 1
+                    time.sleep(min(30.0, 0.25 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            with self.lock:
+                self.documents += len(operations)
+                self.batches += 1
+        finally:
+            self.in_flight.release()
+
+    def submit(self, documents):
+        """Queue documents for writing in batches of up to MAX_BATCH_OPS"""
+        for operations in chunked(documents):
+            self.in_flight.acquire()
+            self.futures.append(self.executor.submit(self._commit, operations))
+
+    def wait(self):
+        """Wait for every queued batch; re-raise the first failure"""
+        try:
+            for future in self.futures:
+                future.result()
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed Firestore with Bible chapters and reading plans")
+    parser.add_argument("--project", default=os.environ.get("GCLOUD_PROJECT") or default_project())
+    parser.add_argument("--emulator", metavar="HOST:PORT",
+                        help="use the Firestore emulator (default: $FIRESTORE_EMULATOR_HOST)")
+    parser.add_argument("--translation", action="append", choices=data_paths.TRANSLATIONS,
+                        help="translation to seed (repeatable, default: all)")
+    parser.add_argument("--skip-plans", action="store_true")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent batch commits")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--merge", action="store_true", help="merge into existing documents instead of replacing them")
+    parser.add_argument("--dry-run", action="store_true", help="count documents and batches without writing")
+    args = parser.parse_args()
+
+    sources = []
+    for translation in args.translation or data_paths.TRANSLATIONS:
+        bible_data = load_json_file(data_paths.translation_path(translation))
+        if bible_data is not None:
+            sources.append((translation, chapter_documents(translation, bible_data)))
+    if not args.skip_plans:
+        plans_data = load_json_file(data_paths.asset_path('reading_plans.json'))
+        if plans_data is not None:
+            sources.append(('reading plans', plan_documents(plans_data)))
+
+    if args.dry_run:
+        for name, documents in sources:
+            documents = list(documents)
+            size = sum(len(json.dumps(data, ensure_ascii=False).encode('utf-8')) for _, data in documents)
+            batches = (len(documents) + MAX_BATCH_OPS - 1) // MAX_BATCH_OPS
+            print(f"{name}: {len(documents)} documents in {batches} batches (~{size // 1024} KB)")
+        return 0
+
+    if args.emulator:
+        os.environ["FIRESTORE_EMULATOR_HOST"] = args.emulator
+    if not args.project:
+        print("Error: pass --project or set GCLOUD_PROJECT")
+        return 1
+
+    try:
+        from google.cloud import firestore
+        seeder = BatchSeeder(firestore.Client(project=args.project), args.workers, args.retries, args.merge)
+    except ImportError:
+        print("Error: google-cloud-firestore is required (pip install google-cloud-firestore)")
+        return 1
+
+    target = os.environ.get("FIRESTORE_EMULATOR_HOST") or args.project
+    print(f"Seeding {target} with {args.workers} concurrent batches")
+
+    started = time.perf_counter()
+    try:
+        for name, documents in sources:
+            with pipeline_profile.stage(f"seed {name}"):
+                seeder.submit(documents)
+    finally:
+        seeder.wait()
+    elapsed = time.perf_counter() - started
+
+    print(f"Wrote {seeder.documents} documents in {seeder.batches} batches "
+          f"({seeder.retried} retries) in {elapsed:.2f}s ({seeder.documents / max(elapsed, 1e-9):.0f} docs/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "seed_firestore")
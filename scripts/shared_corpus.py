@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Script to publish the packed Bible indexes in shared memory for multi-process services
+
+A service with N worker processes that loads the translation JSON in each
+worker holds N private copies of the nested dicts. Instead, one publisher
+copies the packed files (the chapter store with the verse text, token offset
+tables, cross references) into multiprocessing.shared_memory segments once,
+and every worker attaches to them read-only: the readers wrap the segments
+in place, so attaching costs a few system calls and no copying, and the
+pages are shared by every worker.
+
+The publisher describes its segments in a small JSON manifest,
+{kind: {translation: segment name}}, that workers receive as an argument or
+through the CHURCHLINK_CORPUS environment variable:
+
+    corpus = publish_corpus(["KJV", "NIV"], ["chapters", "offsets"])
+    ...start workers with corpus.manifest...
+    corpus.close()                              # unlinks the segments
+
+    corpus = attach_corpus(manifest)            # in each worker
+    store = corpus.readers["chapters"]["KJV"]
+
+Workers that can open the build directory can also open the packed files
+directly (PackedFile maps them, so they share the page cache); shared memory
+also works where the files are not visible or should not be re-read.
+
+Usage:
+    python shared_corpus.py --translation KJV --kind chapters --kind offsets
+    python shared_corpus.py --translation KJV --check 4
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from multiprocessing import get_context, resource_tracker, shared_memory
+
+import data_paths
+import pipeline_profile
+from bible_delta import load_json_file
+from build_chapter_store import ChapterStore, chapter_store_path, write_chapter_store
+from build_token_offsets import TokenOffsets, token_offsets_path, write_token_offsets
+from ingest_cross_references import CrossReferences, cross_references_path
+
+CORPUS_ENV = "CHURCHLINK_CORPUS"
+SEGMENT_PREFIX = "cl"
+
+# kind -> (default path, reader, writer or None when it cannot be built from the assets)
+CORPUS_KINDS = {
+    "chapters": (chapter_store_path, ChapterStore, write_chapter_store),
+    "offsets": (token_offsets_path, TokenOffsets, write_token_offsets),
+    "crossrefs": (cross_references_path, CrossReferences, None),
+}
+
+
+def segment_name(kind, translation):
+    """Return the shared memory name of one packed file of this publisher"""
+    return f"{SEGMENT_PREFIX}_{os.getpid()}_{kind}_{translation.lower()}"
+
+
+def _attach_segment(name):
+    """Attach to an existing segment without handing it to this process's resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching registers the segment with the resource
+    # tracker, which then unlinks it when the attaching worker exits
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedCorpus:
+    """Packed indexes held in shared memory, with a reader over each"""
+
+    def __init__(self, manifest, segments, owner):
+        self.manifest = manifest
+        self.owner = owner
+        self._segments = segments
+        self._views = []
+        self.readers = {}
+        for kind, translations in manifest.items():
+            reader = CORPUS_KINDS[kind][1]
+            for translation, name in translations.items():
+                view = segments[name].buf.toreadonly()
+                self._views.append(view)
+                self.readers.setdefault(kind, {})[translation] = reader(buffer=view)
+
+    @property
+    def size(self):
+        """Total bytes of shared memory"""
+        return sum(segment.size for segment in self._segments.values())
+
+    def export_env(self, environ=None):
+        """Store the manifest in the environment inherited by worker processes"""
+        (os.environ if environ is None else environ)[CORPUS_ENV] = json.dumps(self.manifest)
+
+    def close(self):
+        """Release the readers and detach; the publisher also unlinks the segments"""
+        for readers in self.readers.values():
+            for reader in readers.values():
+                reader.close()
+        self.readers.clear()
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        for segment in self._segments.values():
+            segment.close()
+            if self.owner:
+                segment.unlink()
+        self._segments.clear()
+
+
+def publish_corpus(translations, kinds=("chapters",), build=False):
+    """Copy the packed files of translations into new shared memory segments
+
+    Missing files are skipped, or built from the assets first when build is set
+    and the kind can be built.
+    """
+    manifest = {}
+    segments = {}
+    try:
+        for kind in kinds:
+            path_of, _, writer = CORPUS_KINDS[kind]
+            for translation in translations:
+                path = path_of(translation)
+                if not os.path.exists(path):
+                    if not build or writer is None:
+                        continue
+                    bible_data = load_json_file(data_paths.translation_path(translation))
+                    if bible_data is None:
+                        continue
+                    writer(bible_data, translation, path)
+                name = segment_name(kind, translation)
+                size = os.path.getsize(path)
+                segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+                segments[name] = segment
+                with open(path, 'rb') as f:
+                    f.readinto(segment.buf[:size])
+                manifest.setdefault(kind, {})[translation] = name
+    except BaseException:
+        for segment in segments.values():
+            segment.close()
+            segment.unlink()
+        raise
+    return SharedCorpus(manifest, segments, owner=True)
+
+
+def attach_corpus(manifest=None):
+    """Attach read-only to a published corpus (default: the manifest in CHURCHLINK_CORPUS)"""
+    if manifest is None:
+        manifest = json.loads(os.environ[CORPUS_ENV])
+    segments = {}
+    try:
+        for translations in manifest.values():
+            for name in translations.values():
+                segments[name] = _attach_segment(name)
+    except BaseException:
+        for segment in segments.values():
+            segment.close()
+        raise
+    return SharedCorpus(manifest, segments, owner=False)
+
+
+def private_memory_bytes():
+    """Return this process's private (unshared) resident memory, or None if unknown"""
+    try:
+        with open("/proc/self/smaps_rollup", 'r') as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except (OSError, ValueError):
+        return None
+    return sum(int(fields.get(key, "0 kB").split()[0]) for key in ("Private_Clean", "Private_Dirty")) * 1024
+
+
+def _check_worker(manifest):
+    """Attach in a fresh process, read every chapter once and report the cost"""
+    before = private_memory_bytes()
+    started = time.perf_counter()
+    corpus = attach_corpus(manifest)
+    attached = time.perf_counter() - started
+    verses = 0
+    for store in corpus.readers.get("chapters", {}).values():
+        for index in range(len(store)):
+            verses += len(store.verses(index))
+    after = private_memory_bytes()
+    corpus.close()
+    growth = after - before if before is not None and after is not None else None
+    return os.getpid(), attached, verses, growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the packed Bible indexes in shared memory")
+    parser.add_argument("--translation", action="append", choices=data_paths.TRANSLATIONS,
+                        help="translation to publish (repeatable, default: all)")
+    parser.add_argument("--kind", action="append", choices=list(CORPUS_KINDS),
+                        help="packed files to publish (repeatable, default: chapters)")
+    parser.add_argument("--build", action="store_true", help="build missing chapter stores and offsets first")
+    parser.add_argument("--check", type=int, metavar="N",
+                        help="attach from N fresh worker processes, read every chapter and exit")
+    args = parser.parse_args()
+
+    with pipeline_profile.stage("publish"):
+        corpus = publish_corpus(args.translation or data_paths.TRANSLATIONS, args.kind or ["chapters"], args.build)
+    if not corpus.manifest:
+        print("Error: no packed files found; build them first or pass --build")
+        return 1
+
+    try:
+        published = ", ".join(f"{kind} {'/'.join(sorted(t))}" for kind, t in corpus.manifest.items())
+        print(f"Published {published} in shared memory ({corpus.size} bytes)")
+        if args.check:
+            with pipeline_profile.stage("check"):
+                context = get_context("spawn")
+                with context.Pool(args.check) as pool:
+                    results = pool.map(_check_worker, [corpus.manifest] * args.check)
+            for pid, attached, verses, growth in results:
+                memory = "n/a" if growth is None else f"{growth // 1024} KB"
+                print(f"  worker {pid}: attached in {attached * 1000:.2f} ms, read {verses} verses, "
+                      f"private memory +{memory}")
+            return 0
+
+        print(f"{CORPUS_ENV}={json.dumps(corpus.manifest)}")
+        print("Press Ctrl+C to unpublish", file=sys.stderr)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    finally:
+        corpus.close()
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "shared_corpus")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Cached intermediate representation (IR) of parsed source texts
+
+Parsing KJV.txt takes a few hundred milliseconds every time a script runs.
+cached_parse() stores a parser's result as a marshal file in build/data/ir,
+keyed by the SHA-256 of the source bytes, the parser name and the parser's
+version, so later runs load the same structure in milliseconds. A file is
+used only if its header matches the key and its payload checksum verifies;
+anything else is treated as a miss, reparsed and rewritten. Bump a parser's
+PARSER_VERSION whenever its output changes.
+
+Layout of an .ir file:
+    b"CLIR" | header length (<I) | JSON header | marshal payload
+
+Usage:
+    python source_ir.py            # list cached IR files
+    python source_ir.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import marshal
+import os
+import struct
+import zlib
+
+import data_paths
+import pipeline_profile
+
+IR_MAGIC = b"CLIR"
+IR_FORMAT = 1
+IR_DIR = "ir"
+HEADER_LENGTH = struct.Struct('<I')
+
+
+def ir_path(parser_name, parser_version, source_hash):
+    """Return the cache file of one (parser, version, source) combination"""
+    return data_paths.build_path(IR_DIR, f"{parser_name}.v{parser_version}.{source_hash[:24]}.ir")
+
+
+def read_ir(path, parser_name, parser_version, source_hash):
+    """Return the cached parse result, or None if the file is missing or invalid"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    if data[:4] != IR_MAGIC or len(data) < 8:
+        return None
+    header_length = HEADER_LENGTH.unpack_from(data, 4)[0]
+    start = 8 + header_length
+    try:
+        header = json.loads(data[8:start])
+    except ValueError:
+        return None
+
+    expected = {
+        "format": IR_FORMAT,
+        "parser": parser_name,
+        "parser_version": parser_version,
+        "source_sha256": source_hash,
+    }
+    if any(header.get(key) != value for key, value in expected.items()):
+        return None
+    payload = memoryview(data)[start:]
+    if len(payload) != header.get("length") or zlib.crc32(payload) != header.get("crc32"):
+        return None
+    try:
+        return marshal.loads(payload)
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def write_ir(path, parser_name, parser_version, source_hash, result):
+    """Write a parse result atomically and drop older IR files of the same parser"""
+    payload = marshal.dumps(result)
+    header = json.dumps({
+        "format": IR_FORMAT,
+        "parser": parser_name,
+        "parser_version": parser_version,
+        "source_sha256": source_hash,
+        "length": len(payload),
+        "crc32": zlib.crc32(payload),
+    }).encode('utf-8')
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(IR_MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        f.write(payload)
+    os.replace(temp_path, path)
+
+    directory = os.path.dirname(path)
+    for filename in os.listdir(directory):
+        if filename.startswith(f"{parser_name}.") and filename.endswith('.ir') and filename != os.path.basename(path):
+            os.remove(os.path.join(directory, filename))
+    return len(payload)
+
+
+def cached_parse_text(text, parser_name, parser_version, parse):
+    """Return parse(text), loading it from the IR cache when the text was parsed before"""
+    source_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    path = ir_path(parser_name, parser_version, source_hash)
+    with pipeline_profile.stage(f"load ir {parser_name}"):
+        result = read_ir(path, parser_name, parser_version, source_hash)
+    if result is not None:
+        return result
+
+    with pipeline_profile.stage(f"parse {parser_name}"):
+        result = parse(text)
+    try:
+        write_ir(path, parser_name, parser_version, source_hash, result)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not cache parsed source in {path}: {e}")
+    return result
+
+
+def cached_parse(source_path, parser_name, parser_version, parse):
+    """Return parse() of a UTF-8 source file, using the IR cache"""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return cached_parse_text(text, parser_name, parser_version, parse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the parsed-source IR cache")
+    parser.add_argument("--clear", action="store_true", help="delete every cached IR file")
+    args = parser.parse_args()
+
+    directory = os.path.join(data_paths.BUILD_DIR, IR_DIR)
+    filenames = sorted(f for f in os.listdir(directory) if f.endswith('.ir')) if os.path.isdir(directory) else []
+    for filename in filenames:
+        path = os.path.join(directory, filename)
+        if args.clear:
+            os.remove(path)
+        else:
+            print(f"{filename} ({os.path.getsize(path)} bytes)")
+    if args.clear:
+        print(f"Removed {len(filenames)} IR files from {directory}")
+    elif not filenames:
+        print(f"No IR files in {directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "source_ir")
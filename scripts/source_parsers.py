@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Script to ingest Bible sources (Gutenberg text, OSIS XML, USFM) as a verse-record stream
+
+Every parser reads its source incrementally and yields the same verse records,
+
+    (book, chapter, verse, text)
+
+with canonical book names, so adding a public-domain translation (WEB, ASV,
+BBE, ...) only needs a parser for its source format:
+
+    gutenberg  the KJV.txt line heuristics of fix_bible_verses.parse_kjv_text,
+               streamed line by line
+    osis       OSIS XML via iterparse; container and milestone (sID/eID) verses,
+               notes and titles skipped, finished elements cleared
+    usfm       one or more USFM files (or a directory of them) via a line
+               tokenizer; headings, footnotes and cross references skipped
+
+The records are grouped into chapters and written with stream_layout's
+LayoutWriter, so an ingest holds one chapter in memory at a time.
+
+Usage:
+    python source_parsers.py eng-web.osis.xml --translation WEB
+    python source_parsers.py usfm/ --translation ASV --format usfm -o bible_asv.json
+    python source_parsers.py KJV.txt --translation KJV --layout array
+"""
+
+import argparse
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from complete_bible_fix import BIBLE_STRUCTURE
+from fix_bible_verses import find_book_header
+from stream_layout import LAYOUTS, LayoutWriter
+
+# Standard OSIS and USFM book identifiers, in canonical order
+OSIS_BOOKS = [
+    "Gen", "Exod", "Lev", "Num", "Deut", "Josh", "Judg", "Ruth", "1Sam", "2Sam", "1Kgs", "2Kgs",
+    "1Chr", "2Chr", "Ezra", "Neh", "Esth", "Job", "Ps", "Prov", "Eccl", "Song", "Isa", "Jer",
+    "Lam", "Ezek", "Dan", "Hos", "Joel", "Amos", "Obad", "Jonah", "Mic", "Nah", "Hab", "Zeph",
+    "Hag", "Zech", "Mal", "Matt", "Mark", "Luke", "John", "Acts", "Rom", "1Cor", "2Cor", "Gal",
+    "Eph", "Phil", "Col", "1Thess", "2Thess", "1Tim", "2Tim", "Titus", "Phlm", "Heb", "Jas",
+    "1Pet", "2Pet", "1John", "2John", "3John", "Jude", "Rev",
+]
+USFM_BOOKS = [
+    "GEN", "EXO", "LEV", "NUM", "DEU", "JOS", "JDG", "RUT", "1SA", "2SA", "1KI", "2KI",
+    "1CH", "2CH", "EZR", "NEH", "EST", "JOB", "PSA", "PRO", "ECC", "SNG", "ISA", "JER",
+    "LAM", "EZK", "DAN", "HOS", "JOL", "AMO", "OBA", "JON", "MIC", "NAM", "HAB", "ZEP",
+    "HAG", "ZEC", "MAL", "MAT", "MRK", "LUK", "JHN", "ACT", "ROM", "1CO", "2CO", "GAL",
+    "EPH", "PHP", "COL", "1TH", "2TH", "1TI", "2TI", "TIT", "PHM", "HEB", "JAS",
+    "1PE", "2PE", "1JN", "2JN", "3JN", "JUD", "REV",
+]
+OSIS_BOOK_NAMES = dict(zip(OSIS_BOOKS, bible_canon.BOOKS))
+USFM_BOOK_NAMES = dict(zip(USFM_BOOKS, bible_canon.BOOKS))
+
+VERSE_START_RE = re.compile(r'^\d+:\d+')
+GUTENBERG_VERSE_RE = re.compile(r'(\d+):(\d+)\s+(.+)')
+
+# OSIS elements whose text is not verse text
+OSIS_SKIPPED = {"note", "title", "header", "reference"}
+# Block and line-break elements: words on either side are separated by a space
+OSIS_BREAKS = {"p", "l", "lg", "lb", "div", "list", "item", "table", "row", "cell"}
+
+# The one separator space after an opening marker belongs to the marker; the
+# text after a closing marker (\w*, \f*, \*) is kept as it is
+USFM_MARKER_RE = re.compile(r'\\(\+?[a-z]+[0-9]*(?:-[se])?\*?|\*)(?:(?<!\*)\s)?')
+# Paragraph and poetry markers: verse text continues after them
+USFM_PARAGRAPHS = {"p", "m", "pi", "pi1", "pi2", "pi3", "mi", "nb", "b", "q", "q1", "q2", "q3", "q4",
+                   "qr", "qc", "qm", "qm1", "qm2", "li", "li1", "li2", "li3", "pc", "pm", "pmo", "pmc",
+                   "pmr", "cls", "tr", "th1", "th2", "tc1", "tc2", "tc3"}
+# Notes run until their closing marker
+USFM_NOTES = {"f": "f*", "fe": "fe*", "x": "x*", "ef": "ef*", "ex": "ex*"}
+# Markers whose text is kept (character styles); every other marker's text is dropped
+USFM_CHARACTER = {"add", "bk", "dc", "k", "nd", "ord", "pn", "png", "qt", "sig", "sls", "tl", "wj",
+                  "em", "bd", "it", "bdit", "no", "sc", "sup", "w", "wg", "wh", "wa", "qs", "qac", "lit"}
+
+
+def iter_gutenberg_records(lines):
+    """Yield verse records from Project Gutenberg KJV text lines"""
+    book = None
+    verse = None
+    for raw in lines:
+        line = raw.strip()
+        if verse is not None:
+            # Non-empty lines that do not start a verse continue the current one
+            if line and not VERSE_START_RE.match(line):
+                verse[2] += " " + line
+                continue
+            yield book, verse[0], verse[1], verse[2]
+            verse = None
+        if not line:
+            continue
+        if line.startswith('***') or 'GUTENBERG' in line.upper() or 'PROJECT' in line.upper():
+            continue
+        found = find_book_header(line)
+        if found:
+            book = found
+            continue
+        if book and VERSE_START_RE.match(line):
+            match = GUTENBERG_VERSE_RE.match(line)
+            if match:
+                verse = [int(match.group(1)), int(match.group(2)), match.group(3).strip()]
+    if verse is not None:
+        yield book, verse[0], verse[1], verse[2]
+
+
+def _osis_verse(osis_id):
+    """Return (book, chapter, verse) of the first reference in an osisID, or None"""
+    parts = osis_id.split()[0].split(".") if osis_id else []
+    book = OSIS_BOOK_NAMES.get(parts[0]) if parts else None
+    if book is None or len(parts) < 3 or not parts[1].isdigit() or not parts[2].isdigit():
+        return None
+    return book, int(parts[1]), int(parts[2])
+
+
+def iter_osis_records(f):
+    """Yield verse records from an OSIS XML file with iterparse, clearing finished elements"""
+    stack = []
+    skipped = 0
+    current = None
+    parts = []
+    # Text becomes final at the next parser event: the previous slot is element.text
+    # after a start event and element.tail after an end event
+    previous = None
+
+    for event, element in ET.iterparse(f, events=("start", "end")):
+        if previous is not None:
+            previous_element, slot = previous
+            text = previous_element.text if slot == "text" else previous_element.tail
+            if text and current is not None and not skipped:
+                parts.append(text)
+            if slot == "tail":
+                previous_element.clear()
+                if len(stack) and len(stack[-1]) and stack[-1][0] is previous_element:
+                    del stack[-1][0]
+
+        tag = element.tag.rpartition("}")[2]
+        if tag in OSIS_BREAKS and current is not None and not skipped:
+            parts.append(" ")
+        if event == "start":
+            stack.append(element)
+            if tag in OSIS_SKIPPED:
+                skipped += 1
+            elif tag == "verse":
+                if element.get("eID"):
+                    if current is not None:
+                        yield current + (" ".join("".join(parts).split()),)
+                    current = None
+                else:
+                    reference = _osis_verse(element.get("osisID") or element.get("sID"))
+                    if reference is not None:
+                        if current is not None:
+                            yield current + (" ".join("".join(parts).split()),)
+                        current, parts = reference, []
+            previous = (element, "text")
+        else:
+            stack.pop()
+            if tag in OSIS_SKIPPED:
+                skipped -= 1
+            elif tag == "verse" and not element.get("sID") and not element.get("eID") and current is not None:
+                yield current + (" ".join("".join(parts).split()),)
+                current = None
+            previous = (element, "tail")
+
+    if current is not None:
+        yield current + (" ".join("".join(parts).split()),)
+
+
+def iter_usfm_records(lines):
+    """Yield verse records from USFM lines (one or more books)"""
+    book = None
+    chapter = None
+    current = None
+    parts = []
+    keep = False
+    note_end = None
+
+    def finish():
+        return current + (" ".join("".join(parts).split()),)
+
+    for line in lines:
+        tokens = USFM_MARKER_RE.split(line.rstrip("\r\n") + " ")
+        if tokens[0].strip() and keep and note_end is None:
+            parts.append(tokens[0])
+        for index in range(1, len(tokens), 2):
+            marker, text = tokens[index], tokens[index + 1]
+            name = marker.lstrip("+").rstrip("*")
+
+            if note_end is not None:
+                if marker == note_end:
+                    note_end = None
+                    parts.append(text)
+                continue
+            if marker in USFM_NOTES:
+                note_end = USFM_NOTES[marker]
+                continue
+            if name.endswith(("-s", "-e")):
+                # Milestones carry only attributes, up to their closing \*
+                continue
+
+            if marker == "id":
+                if current is not None:
+                    yield finish()
+                code = text.split()[0].upper() if text.split() else ""
+                book, chapter, current, keep = USFM_BOOK_NAMES.get(code), None, None, False
+            elif marker == "c":
+                if current is not None:
+                    yield finish()
+                number = text.split()[0] if text.split() else ""
+                chapter = int(number) if number.isdigit() else None
+                current, keep = None, False
+            elif marker == "v":
+                if current is not None:
+                    yield finish()
+                number, _, text = text.partition(" ")
+                number = re.match(r"\d+", number)
+                current = (book, chapter, int(number.group())) if book and chapter and number else None
+                parts = [text]
+                keep = current is not None
+            elif marker.endswith("*"):
+                # Closing a character style returns to the surrounding verse text
+                if current is not None:
+                    keep = True
+                    parts.append(text)
+            elif name in USFM_PARAGRAPHS:
+                if current is not None:
+                    keep = True
+                    parts.append(" " + text)
+            elif name in USFM_CHARACTER:
+                if current is not None:
+                    keep = True
+                    # \w word|strong="H7225"\w* keeps only the word
+                    parts.append(text.partition("|")[0])
+            else:
+                # Headings, titles and introductions
+                keep = False
+        parts.append(" ")
+
+    if current is not None:
+        yield finish()
+
+
+def _iter_usfm_path(path):
+    paths = [path]
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if name.lower().endswith((".usfm", ".sfm", ".ptx")))
+    for usfm_path in paths:
+        with open(usfm_path, 'r', encoding='utf-8-sig') as f:
+            yield from iter_usfm_records(f)
+
+
+def _iter_gutenberg_path(path):
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        yield from iter_gutenberg_records(f)
+
+
+def _iter_osis_path(path):
+    with open(path, 'rb') as f:
+        yield from iter_osis_records(f)
+
+
+SOURCE_PARSERS = {
+    "gutenberg": _iter_gutenberg_path,
+    "osis": _iter_osis_path,
+    "usfm": _iter_usfm_path,
+}
+
+
+def detect_format(path):
+    """Guess a source's format from its name"""
+    if os.path.isdir(path):
+        return "usfm"
+    lower = path.lower()
+    if lower.endswith((".xml", ".osis")):
+        return "osis"
+    if lower.endswith((".usfm", ".sfm", ".ptx")):
+        return "usfm"
+    return "gutenberg"
+
+
+def iter_source_records(path, source_format=None):
+    """Yield verse records from a source file or directory"""
+    return SOURCE_PARSERS[source_format or detect_format(path)](path)
+
+
+def iter_record_chapters(records):
+    """Group verse records into (book, testament, chapter_key, verses) chapters
+
+    Verses are placed at their number, so a verse missing from the source
+    becomes an empty string and later duplicates replace earlier ones.
+    """
+    key = None
+    verses = []
+    finished_books = set()
+    for book, chapter, verse, text in records:
+        if book is None or chapter is None:
+            continue
+        if (book, chapter) != key:
+            if key is not None:
+                yield key[0], BIBLE_STRUCTURE[key[0]]["testament"], str(key[1]), verses
+                if book != key[0]:
+                    finished_books.add(key[0])
+            if book in finished_books:
+                raise ValueError(f"{book} appears twice in the source")
+            key = (book, chapter)
+            verses = []
+        if verse > len(verses):
+            verses.extend([""] * (verse - len(verses)))
+        verses[verse - 1] = text
+    if key is not None:
+        yield key[0], BIBLE_STRUCTURE[key[0]]["testament"], str(key[1]), verses
+
+
+def ingest_source(path, output_path, source_format=None, layout="object", compact=False):
+    """Stream a source into a Bible JSON file; return stats"""
+    temp_path = output_path + ".tmp"
+    verses = 0
+    with open(temp_path, 'w', encoding='utf-8') as target:
+        writer = LayoutWriter(target, layout, compact)
+        for book, testament, chapter_key, chapter_verses in iter_record_chapters(iter_source_records(path, source_format)):
+            writer.write_chapter(book, testament, chapter_key, chapter_verses)
+            verses += len(chapter_verses)
+        writer.close()
+    os.replace(temp_path, output_path)
+    return {"books": writer.books, "chapters": writer.chapters, "verses": verses,
+            "bytes": os.path.getsize(output_path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a Gutenberg, OSIS or USFM source as a Bible asset")
+    parser.add_argument("source", help="source file, or a directory of USFM files")
+    parser.add_argument("--translation", required=True, help="translation code, e.g. WEB")
+    parser.add_argument("--format", dest="source_format", choices=sorted(SOURCE_PARSERS),
+                        help="source format (default: from the file name)")
+    parser.add_argument("-o", "--output", help="output path (default: assets/bible_<translation>.json)")
+    parser.add_argument("--layout", default="object", choices=LAYOUTS)
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+
+    output_path = args.output or data_paths.translation_path(args.translation)
+    source_format = args.source_format or detect_format(args.source)
+    started = time.perf_counter()
+    try:
+        with pipeline_profile.stage(f"ingest {source_format}"):
+            stats = ingest_source(args.source, output_path, source_format, args.layout, args.compact)
+    except (OSError, ValueError, ET.ParseError) as e:
+        print(f"Error ingesting {args.source}: {e}")
+        return 1
+
+    print(f"{args.translation}: {stats['books']} books, {stats['chapters']} chapters, {stats['verses']} verses "
+          f"from {source_format} in {time.perf_counter() - started:.2f} s")
+    print(f"Saved to {output_path} ({stats['bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "source_parsers")
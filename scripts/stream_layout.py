@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Script to convert Bible files between the array and object layouts in bounded memory
+
+    array layout (parse_kjv.py)  {"books": [{"name", "testament", "chapters": [{"number", "verses"}]}]}
+    object layout (assets)       {"books": {name: {"testament", "chapters": {"1": [...]}}}}
+
+The input is read in blocks by an incremental JSON tokenizer, so only the
+chapter being converted is ever held in memory; the input layout is detected
+from the value of "books". Output is written chapter by chapter in either
+layout, pretty-printed (byte-identical to json.dump(indent=2,
+ensure_ascii=False)) or compact (as save_json_file(compact=True)). Books and
+chapters keep their input order. Missing testaments are filled in from the
+canonical book list. Top-level keys other than "books" are kept and written
+after it.
+
+Usage:
+    python stream_layout.py ../assets/bible_kjv.json bible_kjv_array.json --to array
+    python stream_layout.py bible_kjv_array.json bible_kjv.min.json --to object --compact
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import pipeline_profile
+from complete_bible_fix import BIBLE_STRUCTURE
+
+BLOCK_SIZE = 1 << 16
+LAYOUTS = ["array", "object"]
+
+TOKEN_RE = re.compile(
+    r'[ \t\r\n]*(?:([{}\[\],:])|"((?:[^"\\]|\\.)*)"|(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null))',
+    re.S,
+)
+LITERALS = {"true": True, "false": False, "null": None}
+# What may follow a number in the buffer while it could still continue in the next block
+NUMBER_TAIL_RE = re.compile(r'[0-9.eE+-]*\Z')
+
+
+class JsonStream:
+    """Pull tokenizer and reader over a JSON text file, one block at a time"""
+
+    def __init__(self, f, block_size=BLOCK_SIZE):
+        self.f = f
+        self.block_size = block_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.peeked = None
+        self.bytes_read = 0
+
+    def _fill(self):
+        block = self.f.read(self.block_size)
+        self.bytes_read += len(block)
+        if not block:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + block
+        self.position = 0
+
+    def next_token(self):
+        """Return the next (kind, value) token; kind is a punctuation character or 'value'"""
+        if self.peeked is not None:
+            token, self.peeked = self.peeked, None
+            return token
+        while True:
+            match = TOKEN_RE.match(self.buffer, self.position)
+            # Other tokens are complete once they match, but a number cut by the
+            # block boundary matches as a shorter number ("12|.5", "-3|e2")
+            if match and (self.eof or match.group(3) is None or not NUMBER_TAIL_RE.match(self.buffer, match.end())):
+                break
+            if self.eof:
+                if self.buffer[self.position:].strip():
+                    raise ValueError(f"Invalid JSON near: {self.buffer[self.position:self.position + 40]!r}")
+                return None, None
+            self._fill()
+
+        self.position = match.end()
+        punctuation, string, number, literal = match.groups()
+        if punctuation:
+            return punctuation, None
+        if string is not None:
+            return "value", json.loads(f'"{string}"') if "\\" in string else string
+        if number is not None:
+            return "value", json.loads(number)
+        return "value", LITERALS[literal]
+
+    def peek(self):
+        if self.peeked is None:
+            self.peeked = self.next_token()
+        return self.peeked
+
+    def expect(self, kind):
+        token = self.next_token()
+        if token[0] != kind:
+            raise ValueError(f"Expected {kind!r}, found {token[0] or 'end of input'!r}")
+
+    def read_value(self):
+        """Read one complete value (materializing containers)"""
+        kind, value = self.next_token()
+        if kind == "value":
+            return value
+        if kind == "{":
+            self.peeked = (kind, None)
+            result = {}
+            for key in self.iter_object():
+                result[key] = self.read_value()
+            return result
+        if kind == "[":
+            self.peeked = (kind, None)
+            result = []
+            for _ in self.iter_array():
+                result.append(self.read_value())
+            return result
+        raise ValueError(f"Unexpected {kind!r}")
+
+    def iter_object(self):
+        """Yield the keys of an object; the caller must consume each value before continuing"""
+        self.expect("{")
+        if self.peek()[0] == "}":
+            self.next_token()
+            return
+        while True:
+            kind, key = self.next_token()
+            if kind != "value" or not isinstance(key, str):
+                raise ValueError("Expected an object key")
+            self.expect(":")
+            yield key
+            kind, _ = self.next_token()
+            if kind == "}":
+                return
+            if kind != ",":
+                raise ValueError(f"Expected ',' or '}}', found {kind or 'end of input'!r}")
+
+    def iter_array(self):
+        """Yield once per array element; the caller must consume each element before continuing"""
+        self.expect("[")
+        if self.peek()[0] == "]":
+            self.next_token()
+            return
+        while True:
+            yield
+            kind, _ = self.next_token()
+            if kind == "]":
+                return
+            if kind != ",":
+                raise ValueError(f"Expected ',' or ']', found {kind or 'end of input'!r}")
+
+
+def _default_testament(book_name):
+    return BIBLE_STRUCTURE.get(book_name, {}).get("testament")
+
+
+def _iter_object_books(stream):
+    for book_name in stream.iter_object():
+        testament = None
+        chapters = 0
+        for key in stream.iter_object():
+            if key == "testament":
+                testament = stream.read_value()
+            elif key == "chapters":
+                for chapter_key in stream.iter_object():
+                    yield book_name, testament or _default_testament(book_name), chapter_key, stream.read_value()
+                    chapters += 1
+            else:
+                stream.read_value()
+        if not chapters:
+            yield book_name, testament or _default_testament(book_name), None, None
+
+
+def _iter_array_books(stream):
+    for _ in stream.iter_array():
+        book = {}
+        pending = []
+        chapters = 0
+        for key in stream.iter_object():
+            if key != "chapters":
+                book[key] = stream.read_value()
+                continue
+            for _ in stream.iter_array():
+                chapters += 1
+                chapter = stream.read_value()
+                if isinstance(chapter, dict):
+                    record = (str(chapter.get("number", chapters)), chapter.get("verses", []))
+                else:
+                    record = (str(chapters), chapter)
+                # A name that follows the chapters forces this one book to be buffered
+                if "name" in book:
+                    yield (book["name"], book.get("testament") or _default_testament(book["name"])) + record
+                else:
+                    pending.append(record)
+        name = book["name"]
+        testament = book.get("testament") or _default_testament(name)
+        for record in pending:
+            yield (name, testament) + record
+        if not chapters:
+            yield name, testament, None, None
+
+
+def iter_layout_chapters(stream, extras=None):
+    """Yield (book, testament, chapter_key, verses) from a Bible JSON stream of either layout
+
+    Books without chapters are yielded once with chapter_key and verses None.
+    Top-level keys other than "books" are stored in extras.
+    """
+    for key in stream.iter_object():
+        if key != "books":
+            value = stream.read_value()
+            if extras is not None:
+                extras[key] = value
+        elif stream.peek()[0] == "{":
+            yield from _iter_object_books(stream)
+        else:
+            yield from _iter_array_books(stream)
+
+
+class LayoutWriter:
+    """Write a Bible file chapter by chapter in the array or object layout"""
+
+    def __init__(self, f, layout, compact=False):
+        self.f = f
+        self.layout = layout
+        self.compact = compact
+        self.separator = ":" if compact else ": "
+        self.book = None
+        self.books = 0
+        self.chapters = 0
+        self.book_chapters = 0
+        self.f.write("{" + self._newline(1) + '"books"' + self.separator + ("[" if layout == "array" else "{"))
+
+    def _newline(self, level):
+        return "" if self.compact else "\n" + "  " * level
+
+    def _dump(self, value, level):
+        if self.compact:
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        return json.dumps(value, indent=2, ensure_ascii=False).replace("\n", self._newline(level))
+
+    def _field(self, key, value, level):
+        return self._newline(level) + self._dump(key, level) + self.separator + self._dump(value, level)
+
+    def _start_book(self, book_name, testament):
+        self._end_book()
+        self.book = book_name
+        self.book_chapters = 0
+        parts = ["," if self.books else ""]
+        if self.layout == "array":
+            parts += [self._newline(2), "{", self._field("name", book_name, 3), ","]
+        else:
+            parts += [self._newline(2), self._dump(book_name, 2), self.separator, "{"]
+        parts += [self._field("testament", testament, 3), ",", self._newline(3), '"chapters"', self.separator,
+                  "[" if self.layout == "array" else "{"]
+        self.f.write("".join(parts))
+        self.books += 1
+
+    def _end_book(self):
+        if self.book is None:
+            return
+        close = "]" if self.layout == "array" else "}"
+        self.f.write((self._newline(3) if self.book_chapters else "") + close + self._newline(2) + "}")
+        self.book = None
+
+    def write_chapter(self, book_name, testament, chapter_key, verses):
+        """Append one chapter (or an empty book when chapter_key is None)"""
+        if book_name != self.book:
+            self._start_book(book_name, testament)
+        if chapter_key is None:
+            return
+        parts = ["," if self.book_chapters else ""]
+        if self.layout == "array":
+            parts += [self._newline(4), "{", self._field("number", int(chapter_key), 5), ",",
+                      self._field("verses", verses, 5), self._newline(4), "}"]
+        else:
+            parts += [self._field(str(chapter_key), verses, 4)]
+        self.f.write("".join(parts))
+        self.book_chapters += 1
+        self.chapters += 1
+
+    def close(self, extras=None):
+        """Finish the books and write any extra top-level keys"""
+        self._end_book()
+        close = "]" if self.layout == "array" else "}"
+        parts = [(self._newline(1) if self.books else "") + close]
+        for key, value in (extras or {}).items():
+            parts += [",", self._field(key, value, 1)]
+        parts.append(self._newline(0) + "}")
+        self.f.write("".join(parts))
+
+
+def convert_layout(input_path, output_path, layout, compact=False):
+    """Stream a Bible file into another layout; return stats"""
+    extras = {}
+    temp_path = output_path + ".tmp"
+    verses = 0
+    with open(input_path, 'r', encoding='utf-8-sig') as source, open(temp_path, 'w', encoding='utf-8') as target:
+        stream = JsonStream(source)
+        writer = LayoutWriter(target, layout, compact)
+        for book_name, testament, chapter_key, chapter_verses in iter_layout_chapters(stream, extras):
+            writer.write_chapter(book_name, testament, chapter_key, chapter_verses)
+            verses += len(chapter_verses or ())
+        writer.close(extras)
+    # Replacing at the end also allows converting a file in place
+    os.replace(temp_path, output_path)
+    return {
+        "books": writer.books,
+        "chapters": writer.chapters,
+        "verses": verses,
+        "input_bytes": os.path.getsize(input_path),
+        "output_bytes": os.path.getsize(output_path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a Bible file between the array and object layouts")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--to", dest="layout", required=True, choices=LAYOUTS)
+    parser.add_argument("--compact", action="store_true", help="write compact JSON instead of indent=2")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        with pipeline_profile.stage("convert"):
+            stats = convert_layout(args.input, args.output, args.layout, args.compact)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error converting {args.input}: {e}")
+        return 1
+
+    print(f"{stats['books']} books, {stats['chapters']} chapters, {stats['verses']} verses "
+          f"in {time.perf_counter() - started:.2f} s")
+    print(f"Saved {args.layout} layout to {args.output} ({stats['input_bytes']} -> {stats['output_bytes']} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "stream_layout")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# The pipeline scripts import each other as top-level modules
+sys.path.insert(0, SCRIPTS_DIR)
@@ -0,0 +1,22 @@
+import pytest
+
+import bible_canon
+
+
+@pytest.mark.parametrize("reference,expected", [
+    ("Genesis 1-3", ("Genesis", 1, None, 3, None)),
+    ("John 1:1-3", ("John", 1, 1, 1, 3)),
+    ("Luke 1:80 – 2:5", ("Luke", 1, 80, 2, 5)),
+    ("1 John 1:1", ("1 John", 1, 1, 1, 1)),
+    ("Psalm 23", ("Psalms", 23, None, 23, None)),
+    ("Song of Solomon 2:1-4", ("Song of Solomon", 2, 1, 2, 4)),
+])
+def test_parse_passage(reference, expected):
+    book, *span = expected
+    assert bible_canon.parse_passage(reference) == (bible_canon.book_index(book), *span)
+
+
+@pytest.mark.parametrize("reference", ["John 3:5-2", "Genesis 3-1", "Luke 2:1-1:80", "Hezekiah 1:1", "John", "John 1:2:3"])
+def test_parse_passage_rejects_invalid_references(reference):
+    with pytest.raises(ValueError):
+        bible_canon.parse_passage(reference)
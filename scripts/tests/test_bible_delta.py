@@ -0,0 +1,40 @@
+import copy
+
+import pytest
+
+pytest.importorskip("cryptography")
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+from bible_delta import apply_delta, create_delta, generate_signing_key
+
+OLD = {"books": {"John": {"testament": "NT", "chapters": {"1": ["In the beginning.", "The same."]}}}}
+NEW = {"books": {"John": {"testament": "NT", "chapters": {"1": ["In the beginning.", "The same was."],
+                                                          "2": ["And the third day."]}}}}
+
+
+def key_pair():
+    private_pem, public_pem = generate_signing_key()
+    return load_pem_private_key(private_pem, password=None), load_pem_public_key(public_pem)
+
+
+def test_signed_delta_applies_with_the_public_key():
+    private_key, public_key = key_pair()
+    bundle = create_delta(OLD, NEW, private_key, "KJV")
+    assert apply_delta(OLD, bundle, public_key) == NEW
+
+
+def test_tampered_or_foreign_bundles_are_rejected():
+    private_key, public_key = key_pair()
+    bundle = create_delta(OLD, NEW, private_key, "KJV")
+
+    tampered = copy.deepcopy(bundle)
+    tampered["translation"] = "NIV"
+    with pytest.raises(ValueError, match="signature"):
+        apply_delta(OLD, tampered, public_key)
+
+    _, other_public_key = key_pair()
+    with pytest.raises(ValueError, match="signature"):
+        apply_delta(OLD, bundle, other_public_key)
+
+    with pytest.raises(ValueError, match="signature"):
+        apply_delta(OLD, dict(bundle, signature="not base64!"), public_key)
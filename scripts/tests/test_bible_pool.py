@@ -0,0 +1,37 @@
+from bible_pool import build_pool, expand_translation, verify_pool
+
+KJV = {
+    "books": {
+        "Genesis": {"testament": "Old", "chapters": {
+            "1": ["In the beginning God created the heaven and the earth."],
+            "2": ["Thus the heavens and the earth were finished."],
+        }},
+    },
+}
+NIV = {
+    "books": {
+        "Genesis": {"testament": "Old", "chapters": {
+            "1": ["In the beginning God created the heavens and the earth."],
+            "2": ["Thus the heavens and the earth were finished."],
+        }},
+    },
+}
+
+
+def test_translations_round_trip_and_share_identical_chapters():
+    pool_data = build_pool([("KJV", KJV), ("NIV", NIV)])
+
+    assert expand_translation(pool_data, "KJV") == KJV
+    assert expand_translation(pool_data, "NIV") == NIV
+    assert len(pool_data["chapters"]) == 3
+    kjv_keys = pool_data["translations"]["KJV"]["books"]["Genesis"]["chapters"]
+    niv_keys = pool_data["translations"]["NIV"]["books"]["Genesis"]["chapters"]
+    assert kjv_keys["2"] == niv_keys["2"] and kjv_keys["1"] != niv_keys["1"]
+    assert verify_pool(pool_data)
+
+
+def test_verify_pool_catches_a_changed_chapter():
+    pool_data = build_pool([("KJV", KJV)])
+    pool_key = pool_data["translations"]["KJV"]["books"]["Genesis"]["chapters"]["1"]
+    pool_data["chapters"][pool_key] = ["Altered."]
+    assert not verify_pool(pool_data)
@@ -0,0 +1,41 @@
+import pytest
+
+import bible_canon
+from build_chapter_store import CHAPTER_KEY_STRIDE, ChapterStore, chapter_key, write_chapter_store
+
+HOSEA = bible_canon.book_index("Hosea")
+JOEL = bible_canon.book_index("Joel")
+
+BIBLE = {
+    "books": {
+        "Hosea": {"chapters": {"1": ["Hosea one.", "Hosea two."], "2": ["Hosea 2:1."]}},
+        "Joel": {"chapters": {"1": ["Joel one."]}},
+    },
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "chapters.bin")
+    write_chapter_store(BIBLE, "KJV", path)
+    store = ChapterStore(path)
+    yield store
+    store.close()
+
+
+def test_chapter_index_finds_chapters_in_order(store):
+    assert [store.chapter_index(HOSEA, 1), store.chapter_index(HOSEA, 2), store.chapter_index(JOEL, 1)] == [0, 1, 2]
+    assert store.chapter(2) == (JOEL, 1)
+    assert store.verses(0, 2) == [(2, "Hosea two.")]
+
+
+@pytest.mark.parametrize("chapter", [0, -1, 3, CHAPTER_KEY_STRIDE, CHAPTER_KEY_STRIDE + 1])
+def test_chapter_index_rejects_chapters_out_of_range(store, chapter):
+    assert store.chapter_index(HOSEA, chapter) == -1
+
+
+def test_chapter_key_rejects_chapters_that_overflow_into_the_next_book():
+    with pytest.raises(ValueError):
+        chapter_key(HOSEA, CHAPTER_KEY_STRIDE)
+    with pytest.raises(ValueError):
+        write_chapter_store({"books": {"Hosea": {"chapters": {"1025": ["x"]}}}}, "KJV", "/nonexistent/store.bin")
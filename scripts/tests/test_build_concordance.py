@@ -0,0 +1,61 @@
+import pytest
+
+from bible_text import normalize_word
+from build_concordance import Concordance, write_concordance
+
+BIBLE = {
+    "books": {
+        "Numbers": {"chapters": {"3": [
+            "And the Levites shall be mine.",
+            "Levites were numbered by their families.",
+            "Give the Levite his portion, as Moses said.",
+        ]}},
+    },
+}
+
+
+def test_lookup_matches_capitalized_words_anywhere(tmp_path):
+    path = str(tmp_path / "concordance.bin")
+    write_concordance(BIBLE, "KJV", path)
+    concordance = Concordance(path)
+    try:
+        for query in ("Levites", "levites", "Levite", "levite"):
+            result = concordance.lookup(query)
+            assert result is not None, query
+            assert (result["lemma"], result["total"], result["verses"]) == ("levite", 3, 3)
+        assert concordance.references("Levites") == ["Numbers 3:1", "Numbers 3:2", "Numbers 3:3"]
+        assert concordance.lookup("Moses")["lemma"] == "moses"
+    finally:
+        concordance.close()
+
+
+@pytest.mark.parametrize("word", [
+    "earnest", "harvest", "interest", "conquest", "Japheth", "Judas", "twentieth", "Jesus",
+])
+def test_normalize_keeps_words_that_only_look_inflected(word):
+    assert normalize_word(word) == word.lower()
+
+
+@pytest.mark.parametrize("word,lemma", [
+    ("believeth", "believe"), ("knowest", "know"), ("crieth", "cry"), ("causeth", "cause"),
+    ("delivereth", "deliver"), ("endureth", "endure"), ("visiteth", "visit"), ("sitteth", "sit"),
+    ("churches", "church"), ("cities", "city"), ("kings", "king"),
+])
+def test_normalize_strips_archaic_and_plural_endings(word, lemma):
+    assert normalize_word(word) == lemma
+
+
+def test_lookup_does_not_merge_earnest_with_earn(tmp_path):
+    bible = {"books": {"Proverbs": {"chapters": {"1": [
+        "The earnest of the harvest.",
+        "He that earneth wages.",
+    ]}}}}
+    path = str(tmp_path / "concordance.bin")
+    write_concordance(bible, "KJV", path)
+    concordance = Concordance(path)
+    try:
+        assert concordance.references("earnest") == ["Proverbs 1:1"]
+        assert concordance.references("earn") == ["Proverbs 1:2"]
+        assert concordance.lookup("harvest")["lemma"] == "harvest"
+    finally:
+        concordance.close()
@@ -0,0 +1,39 @@
+import pytest
+
+from build_fuzzy_index import FuzzyIndex, write_fuzzy_index
+
+BIBLE = {
+    "books": {
+        "Daniel": {"chapters": {"2": [
+            "In the second year of the reign of Nebuchadnezzar Nebuchadnezzar dreamed dreams.",
+            "Then the king commanded to call the magicians.",
+        ]}},
+        "Psalms": {"chapters": {"122": ["Our feet shall stand within thy gates, O Jerusalem."]}},
+    },
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "fuzzy.bin")
+    write_fuzzy_index(BIBLE, "KJV", path)
+    index = FuzzyIndex(path)
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize("typo,word,distance", [
+    ("nebuchadnezzar", "nebuchadnezzar", 0),
+    ("nebuchadnezar", "nebuchadnezzar", 1),
+    ("nebuchadnzar", "nebuchadnezzar", 2),
+    ("jeursalme", "jerusalem", 2),
+    ("magicans", "magicians", 1),
+])
+def test_candidates_find_words_within_two_edits(index, typo, word, distance):
+    assert [(index.words[word_id], d) for word_id, d in index.candidates(typo)] == [(word, distance)]
+
+
+def test_candidates_reject_three_edits_and_search_ranks_verses(index):
+    assert index.candidates("nbuchadnzar") == []
+    assert [(reference, score) for reference, _, score in index.search("Nebuchadnezar dreamd")] == [("Daniel 2:1", 0.5)]
+    assert index.search("Jeursalme")[0][0] == "Psalms 122:1"
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("scipy")
+
+from build_related_verses import RelatedVerses, write_related_verses
+
+BIBLE = {
+    "books": {
+        "John": {"chapters": {"1": [
+            "In the beginning was the Word, and the Word was with God.",
+            "The same was in the beginning with God.",
+            "All things were made by him.",
+            "In him was life; and the life was the light of men.",
+            "And the light shineth in darkness.",
+        ]}},
+    },
+}
+
+
+def test_limit_beyond_top_k_stays_within_the_verse(tmp_path):
+    path = str(tmp_path / "related.bin")
+    write_related_verses(BIBLE, "KJV", path, top_k=2)
+    related = RelatedVerses(path)
+    try:
+        for ordinal in range(5):
+            neighbors = related.related(ordinal, limit=10, min_score=0)
+            assert neighbors == related.related(ordinal, min_score=0)
+            assert len(neighbors) == 2
+            assert ordinal not in [neighbor for neighbor, _ in neighbors]
+    finally:
+        related.close()
+
+
+def test_padding_is_not_returned_when_there_are_fewer_verses_than_top_k(tmp_path):
+    path = str(tmp_path / "related.bin")
+    bible = {"books": {"John": {"chapters": {"11": ["Jesus wept.", "Then said the Jews, Behold how he loved him!"]}}}}
+    write_related_verses(bible, "KJV", path, top_k=5)
+    related = RelatedVerses(path)
+    try:
+        assert [neighbor for neighbor, _ in related.related(0, min_score=0)] == [1]
+        assert [neighbor for neighbor, _ in related.related(1, min_score=0)] == [0]
+    finally:
+        related.close()
@@ -0,0 +1,38 @@
+from build_token_offsets import TokenOffsets, write_token_offsets
+
+BIBLE = {
+    "books": {
+        "Psalms": {"chapters": {"150": [
+            "Praise ye the LORD.",
+            "\U0001D504 praise him in the firmament of his power.",
+        ]}},
+    },
+}
+
+
+def open_offsets(tmp_path):
+    path = str(tmp_path / "offsets.bin")
+    write_token_offsets(BIBLE, "KJV", path)
+    return TokenOffsets(path)
+
+
+def test_offsets_count_utf16_code_units(tmp_path):
+    offsets = open_offsets(tmp_path)
+    try:
+        assert offsets.spans(0) == [(0, 6), (7, 9), (10, 13), (14, 18)]
+        # The non-BMP letter takes two UTF-16 units, shifting every later offset by one
+        assert offsets.spans(1)[:2] == [(3, 9), (10, 13)]
+    finally:
+        offsets.close()
+
+
+def test_highlight_and_snippet_slice_python_strings(tmp_path):
+    offsets = open_offsets(tmp_path)
+    text = BIBLE["books"]["Psalms"]["chapters"]["150"][1]
+    try:
+        assert offsets.highlight(0, "Praise ye the LORD.", [3, 0]) == "[Praise] ye the [LORD]."
+        assert offsets.highlight(1, text, [0]) == "\U0001D504 [praise] him in the firmament of his power."
+        assert offsets.snippet(1, text, 4, radius=1) == "...the [firmament] of..."
+        assert offsets.snippet(1, text, 0, radius=2) == "[praise] him in..."
+    finally:
+        offsets.close()
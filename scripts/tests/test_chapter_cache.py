@@ -0,0 +1,81 @@
+import bible_canon
+from build_chapter_store import ChapterStore, write_chapter_store
+from chapter_cache import ChapterReader, StoreSource, chapter_bytes
+
+
+class DictSource:
+    """Chapters of one book from a dict, counting loads"""
+
+    def __init__(self, chapters):
+        self.chapters = chapters
+        self.loads = []
+
+    def load(self, book_idx, chapter):
+        self.loads.append((book_idx, chapter))
+        return self.chapters.get(chapter)
+
+    def next_chapter(self, book_idx, chapter):
+        return (book_idx, chapter + 1) if chapter + 1 in self.chapters else None
+
+
+CHAPTERS = {number: [f"Chapter {number} verse {verse}." for verse in range(1, number + 2)] for number in range(1, 6)}
+
+
+def test_eviction_keeps_size_within_capacity():
+    capacity = chapter_bytes(CHAPTERS[4]) + chapter_bytes(CHAPTERS[5])
+    reader = ChapterReader(DictSource(CHAPTERS), capacity)
+    for number in CHAPTERS:
+        reader.chapter(0, number)
+        assert reader.size <= capacity
+        assert reader.size == sum(size for _, size in reader.cache.values())
+    assert list(reader.cache) == [(0, 4), (0, 5)]
+    assert reader.stats()["evictions"] == 3
+
+
+def test_chapter_larger_than_capacity_is_not_cached():
+    reader = ChapterReader(DictSource(CHAPTERS), chapter_bytes(CHAPTERS[5]) - 1)
+    assert reader.chapter(0, 5) == CHAPTERS[5]
+    assert reader.chapter(0, 5) == CHAPTERS[5]
+    stats = reader.stats()
+    assert (stats["entries"], stats["bytes"], stats["misses"], stats["hits"]) == (0, 0, 2, 0)
+
+
+def test_hit_and_miss_counters():
+    source = DictSource(CHAPTERS)
+    reader = ChapterReader(source)
+    reader.chapter(0, 1)
+    reader.chapter(0, 1)
+    reader.chapter(0, 2)
+    assert reader.chapter(0, 9) is None
+    stats = reader.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 0)
+    assert source.loads == [(0, 1), (0, 2), (0, 9)]
+
+
+def test_sequential_read_hits_the_prefetched_chapter():
+    source = DictSource(CHAPTERS)
+    reader = ChapterReader(source, prefetch=True)
+    try:
+        for number in (1, 2, 3):
+            assert reader.chapter(0, number) == CHAPTERS[number]
+    finally:
+        reader.close()
+    stats = reader.stats()
+    assert stats["misses"] == 1
+    assert stats["prefetch_hits"] == 2
+    assert source.loads == [(0, 1), (0, 2), (0, 3), (0, 4)]
+
+
+def test_store_source_does_not_read_past_the_book(tmp_path):
+    path = str(tmp_path / "chapters.bin")
+    write_chapter_store({"books": {"Hosea": {"chapters": {"1": ["Hosea one."]}},
+                                   "Joel": {"chapters": {"1": ["Joel one."]}}}}, "KJV", path)
+    store = ChapterStore(path)
+    try:
+        source = StoreSource(store)
+        hosea = bible_canon.book_index("Hosea")
+        assert source.load(hosea, 1) == ["Hosea one."]
+        assert source.load(hosea, 1025) is None
+        assert source.next_chapter(hosea, 1025) is None
+    finally:
+        store.close()
@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+
+KJV = {"books": {"John": {"chapters": {"1": ["In the beginning was the Word."]}}}}
+
+
+def run_chain(tmp_path, *argv):
+    env = dict(os.environ, CHURCHLINK_ASSETS_DIR=str(tmp_path), CHURCHLINK_BUILD_DIR=str(tmp_path / "build"))
+    return subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "churchlink_data.py"), *argv],
+                          env=env, capture_output=True, text=True)
+
+
+def write_kjv(tmp_path):
+    with open(tmp_path / "bible_kjv.json", 'w', encoding='utf-8') as f:
+        json.dump(KJV, f)
+
+
+def test_stage_reading_files_sees_earlier_edits(tmp_path):
+    write_kjv(tmp_path)
+    converted = tmp_path / "esv_array.json"
+    result = run_chain(tmp_path, "fetch", "esv", "+", "convert", str(tmp_path / "bible_esv.json"),
+                       str(converted), "--to", "array")
+    assert result.returncode == 0, result.stdout + result.stderr
+    with open(converted, 'r', encoding='utf-8') as f:
+        assert json.load(f)["books"][0]["name"] == "John"
+
+
+def test_failed_stage_discards_unsaved_edits(tmp_path):
+    write_kjv(tmp_path)
+    result = run_chain(tmp_path, "fetch", "niv", "+", "validate")
+    assert result.returncode == 1
+    assert "failed, stopping without saving" in result.stdout
+    assert not (tmp_path / "bible_niv.json").exists()
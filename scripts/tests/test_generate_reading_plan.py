@@ -0,0 +1,36 @@
+import itertools
+import random
+
+import pytest
+
+from generate_reading_plan import partition
+
+
+def brute_force_heaviest_day(weights, days):
+    best = None
+    for cuts in itertools.combinations(range(1, len(weights)), days - 1):
+        bounds = (0,) + cuts + (len(weights),)
+        heaviest = max(sum(weights[a:b]) for a, b in zip(bounds, bounds[1:]))
+        best = heaviest if best is None else min(best, heaviest)
+    return best
+
+
+def test_partition_is_optimal_without_empty_days():
+    rng = random.Random(7)
+    for _ in range(200):
+        weights = [rng.randint(1, 60) for _ in range(rng.randint(1, 10))]
+        days = rng.randint(1, len(weights))
+        boundaries = partition(weights, days)
+
+        assert len(boundaries) == days + 1
+        assert boundaries[0] == 0 and boundaries[-1] == len(weights)
+        assert all(a < b for a, b in zip(boundaries, boundaries[1:]))
+        heaviest = max(sum(weights[a:b]) for a, b in zip(boundaries, boundaries[1:]))
+        assert heaviest == brute_force_heaviest_day(weights, days)
+
+
+def test_partition_with_one_chapter_per_day_and_invalid_days():
+    assert partition([5, 1, 9], 3) == [0, 1, 2, 3]
+    for days in (0, 4):
+        with pytest.raises(ValueError):
+            partition([5, 1, 9], days)
@@ -0,0 +1,71 @@
+import importlib.util
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image
+
+import image_derivatives
+
+
+def make_sources(directory, duplicates):
+    first = os.path.join(directory, "upload.jpg")
+    Image.effect_noise((1800, 1200), 50).convert('RGB').save(first, quality=90)
+    sources = [first]
+    for number in range(duplicates):
+        copy = os.path.join(directory, f"copy{number}.jpg")
+        shutil.copy(first, copy)
+        sources.append(copy)
+    return sources
+
+
+def test_duplicate_uploads_render_once(tmp_path):
+    sources = make_sources(str(tmp_path), 8)
+    output_dir = str(tmp_path / "media")
+    entries = list(image_derivatives.process_images(sources, output_dir, workers=4, force=True))
+
+    assert [entry['source'] for entry in entries] == sources
+    assert not any('error' in entry for entry in entries)
+    assert [entry['cached'] for entry in entries] == [False] + [True] * 8
+    assert len({entry['key'] for entry in entries}) == 1
+    destination = image_derivatives.cache_dir(output_dir, entries[0]['key'])
+    assert not [name for name in os.listdir(destination) if name.endswith('.tmp')]
+
+
+def test_sources_are_consumed_as_they_arrive(tmp_path):
+    sources = make_sources(str(tmp_path), 1)
+    output_dir = str(tmp_path / "media")
+    consumed = []
+
+    def arriving():
+        for source in sources:
+            consumed.append(source)
+            yield source
+
+    entries = image_derivatives.process_images(arriving(), output_dir, workers=1)
+    assert next(entries)['source'] == sources[0]
+    assert consumed == sources[:1]
+    assert next(entries)['cached']
+
+
+def test_each_source_is_hashed_once(tmp_path, monkeypatch):
+    sources = make_sources(str(tmp_path), 2)
+    hashed = []
+    source_key = image_derivatives.source_key
+    monkeypatch.setattr(image_derivatives, 'source_key', lambda data: hashed.append(len(data)) or source_key(data))
+
+    entries = list(image_derivatives.process_images(sources, str(tmp_path / "media"), workers=1))
+    assert not any('error' in entry for entry in entries)
+    assert len(hashed) == len(sources)
+
+
+def test_heic_is_listed_only_with_pillow_heif(tmp_path):
+    (tmp_path / "photo.heic").write_bytes(b"")
+    (tmp_path / "photo.jpg").write_bytes(b"")
+    found = [os.path.basename(path) for path in image_derivatives.iter_sources([str(tmp_path)])]
+    if importlib.util.find_spec('pillow_heif') is None:
+        assert found == ["photo.jpg"]
+    else:
+        assert found == ["photo.heic", "photo.jpg"]
@@ -0,0 +1,34 @@
+from ingest_cross_references import (CrossReferences, build_cross_reference_arrays, ingest_cross_references,
+                                     verse_ordinals)
+from packed_arrays import write_packed
+
+BIBLE = {"books": {"Genesis": {"chapters": {"1": ["One.", "Two.", "Three.", "Four."]}}}}
+
+LINES = [
+    "From Verse\tTo Verse\tVotes\t#www.openbible.info CC-BY 2015-01-01\n",
+    "Gen.1.1\tGen.1.2\t12\n",
+    "Gen.1.1\tGen.1.3-Gen.1.4\t0\n",
+    "Gen.1.1\tGen.1.4\t-7\n",
+    "Gen.1.2\tGen.1.1\t-2\n",
+]
+
+
+def test_negative_votes_survive_a_round_trip(tmp_path):
+    ordinals, verse_table = verse_ordinals(BIBLE)
+    ranked, stats = ingest_cross_references(LINES, ordinals, min_votes=-10)
+    assert (stats["lines"], stats["below_votes"], stats["references"]) == (4, 0, 4)
+
+    path = str(tmp_path / "crossrefs.bin")
+    write_packed(path, build_cross_reference_arrays(ranked, verse_table), {})
+    cross_references = CrossReferences(path)
+    try:
+        assert cross_references.targets(0) == [(1, 1, 12), (2, 3, 0), (3, 3, -7)]
+        assert cross_references.lookup("Genesis 1:2") == [("Genesis 1:1", -2)]
+    finally:
+        cross_references.close()
+
+
+def test_min_votes_drops_low_and_negative_votes():
+    ordinals, _ = verse_ordinals(BIBLE)
+    ranked, stats = ingest_cross_references(LINES, ordinals)
+    assert (stats["below_votes"], stats["references"]) == (3, 1)
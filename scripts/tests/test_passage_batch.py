@@ -0,0 +1,53 @@
+import pytest
+
+from build_chapter_store import ChapterStore, write_chapter_store
+from passage_batch import passage_span, resolve_passages
+
+BIBLE = {
+    "books": {
+        "Hosea": {"chapters": {"1": ["Hosea one."]}},
+        "Joel": {"chapters": {"1": ["Joel one."]}},
+        "John": {"chapters": {
+            "1": ["One.", "Two.", "Three."],
+            "2": ["Four.", "Five."],
+        }},
+    },
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "chapters.bin")
+    write_chapter_store(BIBLE, "KJV", path)
+    store = ChapterStore(path)
+    yield store
+    store.close()
+
+
+def test_spans_of_verses_chapters_and_ranges(store):
+    assert passage_span(store, "John 1:2") == (3, 3)
+    assert passage_span(store, "John 1") == (2, 4)
+    assert passage_span(store, "John 1:3-2:1") == (4, 5)
+    assert passage_span(store, "John 1:2-9") == (3, 4)
+
+
+@pytest.mark.parametrize("reference", ["John 1:0", "John 1:0-2", "John 1:2-2:0", "John 1:4", "John 3",
+                                       "Hosea 1025:1", "Hosea 1:1-1025:1", "Hosea 1024"])
+def test_invalid_or_missing_verses_are_rejected(store, reference):
+    with pytest.raises(ValueError):
+        passage_span(store, reference)
+
+
+def test_batch_reports_errors_in_request_order(store):
+    results, stats = resolve_passages(store, ["John 2:1", "John 1:0", "John 1:1-2", "John 2:1"])
+    assert [result.get("passage") for result in results] == ["John 2:1", None, "John 1:1-2", "John 2:1"]
+    assert "error" in results[1]
+    assert [verse["text"] for verse in results[2]["verses"]] == ["One.", "Two."]
+    assert (stats["distinct"], stats["errors"], stats["runs"]) == (3, 1, 2)
+
+
+def test_chapters_beyond_the_key_range_do_not_reach_the_next_book(store):
+    results, stats = resolve_passages(store, ["Hosea 1025:1", "Hosea 1:1-1025:1", "Hosea 1"])
+    assert ["error" in result for result in results] == [True, True, False]
+    assert results[2]["passage"] == "Hosea 1:1"
+    assert stats["verses_read"] == 1
@@ -0,0 +1,42 @@
+from fix_bible_verses import parse_kjv_text, split_book_sections
+from pipeline_watch import BuildDaemon
+
+SOURCE = """*** START OF THE PROJECT GUTENBERG EBOOK ***
+
+The First Book of Moses: Called Genesis
+
+1:1 In the beginning God created the heaven and the earth.
+
+1:2 And the earth was without form,
+as it is written in the Book of Ruth.
+
+Ruth
+
+1:1 Now it came to pass in the days when the judges ruled.
+"""
+
+
+def parse_sections(text):
+    parsed = {}
+    for _, section_text in split_book_sections(text):
+        parsed.update(parse_kjv_text(section_text))
+    return parsed
+
+
+def test_sections_parse_like_the_whole_text():
+    assert [book for book, _ in split_book_sections(SOURCE)] == ["Genesis", "Ruth"]
+    assert parse_sections(SOURCE) == parse_kjv_text(SOURCE)
+    assert parse_sections(SOURCE)["Genesis"][1][2] == "And the earth was without form, as it is written in the Book of Ruth."
+
+
+def test_daemon_reparses_only_the_edited_book(tmp_path):
+    source = tmp_path / "kjv.txt"
+    source.write_text(SOURCE, encoding="utf-8")
+    daemon = BuildDaemon(str(source), translations=["KJV"])
+    assert daemon.load_source() == {"Genesis", "Ruth"}
+    assert daemon.load_source() == set()
+
+    source.write_text(SOURCE.replace("judges ruled", "judges judged"), encoding="utf-8")
+    assert daemon.load_source() == {"Ruth"}
+    assert daemon.kjv_books["Ruth"][1][1] == "Now it came to pass in the days when the judges judged."
+    assert daemon.kjv_books["Genesis"][1][1] == "In the beginning God created the heaven and the earth."
@@ -0,0 +1,94 @@
+import json
+import os
+
+from conftest import FIXTURES_DIR
+
+import bible_canon
+from plan_notifications import (MAX_MULTICAST_TOKENS, MAX_PAYLOAD_BYTES, LocalSender, PlanResolver, build_messages,
+                                group_subscriptions, iter_subscriptions)
+from render_static_chapters import chapter_url
+
+BIBLE = {
+    "books": {
+        "John": {"chapters": {
+            "1": ["In the beginning was the Word, and the Word was with God, and the Word was God."],
+            "3": ["x"] * 15 + ["For God so loved the world, that he gave his only begotten Son."],
+            "4": ["This verse is being loaded. Please check back later."],
+        }},
+    },
+}
+
+
+def load_plans():
+    with open(os.path.join(FIXTURES_DIR, "reading_plans.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def subscription(token, day=1, **fields):
+    return dict({"userId": token, "token": token, "planId": "gospel-of-john", "currentDay": day}, **fields)
+
+
+def test_group_subscriptions_dedupes_tokens_and_skips_inactive_plans():
+    subscriptions = [
+        subscription("a"), subscription("a"), subscription("b", translation="niv"), subscription("c"),
+        subscription("d", isPaused=True), subscription("e", isCompleted=True),
+        subscription(None), subscription("f", day="2"),
+    ]
+    groups, stats = group_subscriptions(subscriptions)
+    assert groups == {("gospel-of-john", 1, "KJV"): ["a", "c"], ("gospel-of-john", 1, "NIV"): ["b"]}
+    assert stats == {"subscriptions": 8, "skipped": 4, "groups": 2}
+
+
+def test_iter_subscriptions_reads_ndjson_and_json_arrays():
+    records = [subscription("a"), subscription("b")]
+    assert list(iter_subscriptions([json.dumps(r) + "\n" for r in records])) == records
+    assert list(iter_subscriptions(json.dumps(records, indent=2).splitlines(True))) == records
+
+
+def test_build_messages_chunks_tokens_by_500():
+    tokens = [f"token-{n}" for n in range(1201)]
+    resolver = PlanResolver(load_plans(), lambda translation: BIBLE)
+    messages = list(build_messages({("gospel-of-john", 1, "KJV"): tokens}, resolver))
+    assert [len(message["tokens"]) for message in messages] == [500, 500, 201]
+    assert sum((message["tokens"] for message in messages), []) == tokens
+    assert resolver.resolved == 1
+
+
+def test_plan_resolver_round_trip():
+    loaded = []
+    resolver = PlanResolver(load_plans(), lambda translation: loaded.append(translation) or BIBLE,
+                            base_url="https://example.org/")
+    john = bible_canon.book_index("John")
+
+    day2 = resolver.resolve("gospel-of-john", 2, "KJV")
+    assert day2["notification"] == {
+        "title": "Gospel of John: Day 2",
+        "body": "John 3:16-21, Psalm 23: For God so loved the world, that he gave his only begotten Son.",
+    }
+    assert day2["data"]["link"] == "https://example.org" + chapter_url("KJV", john, 3) + "#v16"
+    assert (day2["data"]["book"], day2["data"]["chapter"], day2["data"]["verse"]) == ("John", "3", "16")
+
+    # Placeholder text is left out of the body, days without readings are not sent
+    assert resolver.resolve("gospel-of-john", 3, "KJV")["notification"]["body"] == "John 4"
+    assert resolver.resolve("gospel-of-john", 4, "KJV") is None
+    assert resolver.resolve("other-plan", 1, "KJV") is None
+    assert (resolver.resolved, resolver.unresolved, loaded) == (2, 2, ["KJV"])
+    assert LocalSender().check(dict(day2, tokens=["a"])) == []
+
+
+def test_local_sender_rejects_invalid_messages():
+    resolver = PlanResolver(load_plans(), lambda translation: BIBLE)
+    message = next(build_messages({("gospel-of-john", 1, "KJV"): ["a", "b"]}, resolver))
+    sender = LocalSender()
+    assert sender.send_each_for_multicast(message) == (2, 0)
+
+    numeric = dict(message, data=dict(message["data"], day=1))
+    assert sender.check(numeric) == ["data values must be strings"]
+    oversized = dict(message, notification=dict(message["notification"], body="x" * MAX_PAYLOAD_BYTES))
+    assert any("payload" in problem for problem in sender.check(oversized))
+    too_many = dict(message, tokens=[str(n) for n in range(MAX_MULTICAST_TOKENS + 1)])
+    assert sender.check(too_many) == [f"{MAX_MULTICAST_TOKENS + 1} tokens (1-{MAX_MULTICAST_TOKENS} allowed)"]
+    assert sender.check(dict(message, tokens=["a", "a"])) == ["duplicate tokens"]
+
+    assert sender.send_each_for_multicast(numeric) == (0, 2)
+    assert (sender.messages, sender.sent, sender.failed) == (2, 2, 2)
@@ -0,0 +1,57 @@
+import gzip
+import json
+
+import render_static_chapters
+from render_static_chapters import book_jobs, chapter_url, render_books, write_sitemap
+
+BIBLE = {
+    "books": {
+        "Malachi": {"chapters": {"4": ["For, behold, the day cometh <that shall burn> as an oven."]}},
+        "Matthew": {"chapters": {
+            "1": ["The book of the generation of Jesus Christ."],
+            "2": ["Now when Jesus was born in Bethlehem of Judaea."],
+        }},
+    },
+}
+
+
+def render(output_dir):
+    jobs, chapters = book_jobs("KJV", BIBLE, output_dir, "https://example.org")
+    totals = [sum(column) for column in zip(*render_books(jobs, workers=1))]
+    return totals, chapters
+
+
+def test_chapters_render_as_html_and_json_with_gzip_siblings(tmp_path):
+    output_dir = str(tmp_path)
+    totals, chapters = render(output_dir)
+    assert len(chapters) == 3
+    assert totals[:2] == [6, 0]
+
+    with open(output_dir + chapter_url("KJV", *chapters[1], "json"), encoding="utf-8") as f:
+        assert json.load(f) == {"translation": "KJV", "book": "Matthew", "chapter": 1,
+                                "verses": [{"verse": 1, "text": "The book of the generation of Jesus Christ."}]}
+
+    path = output_dir + chapter_url("KJV", *chapters[0])
+    with open(path, "rb") as f:
+        page = f.read()
+    with open(path + ".gz", "rb") as f:
+        assert gzip.decompress(f.read()) == page
+    page = page.decode("utf-8")
+    assert '<p id="v1"><sup>1</sup>For, behold, the day cometh &lt;that shall burn&gt; as an oven.</p>' in page
+    # The last chapter of a book links on to the first chapter of the next
+    assert f'<a href="{chapter_url("KJV", *chapters[1])}">Matthew 1 &rarr;</a>' in page
+
+
+def test_rerender_leaves_unchanged_files_alone(tmp_path):
+    render(str(tmp_path))
+    totals, _ = render(str(tmp_path))
+    assert totals[:2] == [0, 6]
+
+
+def test_sitemap_splits_into_an_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(render_static_chapters, "SITEMAP_URL_LIMIT", 2)
+    urls = [f"/bible/kjv/john/{chapter}.html" for chapter in range(1, 6)]
+    assert write_sitemap(str(tmp_path), "https://example.org", urls) == 3
+    index = (tmp_path / "sitemap.xml").read_text(encoding="utf-8")
+    assert index.count("<sitemap>") == 3
+    assert "https://example.org/bible/kjv/john/5.html" in (tmp_path / "sitemap-3.xml").read_text(encoding="utf-8")
@@ -0,0 +1,111 @@
+import os
+import threading
+import uuid
+
+import pytest
+
+pytest.importorskip("google.api_core")
+from google.api_core.exceptions import Aborted, PermissionDenied
+
+import seed_firestore
+from seed_firestore import MAX_BATCH_OPS, BatchSeeder, plan_documents
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.operations = []
+
+    def set(self, reference, data, merge=False):
+        self.operations.append((reference, data))
+
+    def commit(self, retry=None):
+        self.client.commit(self.operations)
+
+
+class FakeClient:
+    """Stand-in Firestore client whose commits fail with the errors queued for each batch size"""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.lock = threading.Lock()
+        self.attempts = []
+        self.documents = {}
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def document(self, *path):
+        return "/".join(path)
+
+    def commit(self, operations):
+        assert len(operations) <= MAX_BATCH_OPS
+        with self.lock:
+            self.attempts.append(len(operations))
+            if self.failures:
+                raise self.failures.pop(0)
+            self.documents.update(operations)
+
+
+def plan_with_days(plan_id, days):
+    return {"plans": [{"id": plan_id, "name": "Test plan",
+                       "readings": [{"day": day, "passages": [f"Genesis {day}"]} for day in range(1, days + 1)]}]}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(seed_firestore.time, "sleep", lambda seconds: None)
+
+
+def test_documents_are_split_into_500_operation_batches():
+    client = FakeClient()
+    seeder = BatchSeeder(client, workers=4)
+    seeder.submit(plan_documents(plan_with_days("split", 1200)))
+    seeder.wait()
+    assert sorted(client.attempts) == [201, 500, 500]
+    assert (seeder.documents, seeder.batches, seeder.retried) == (1201, 3, 0)
+    assert len(client.documents) == 1201
+
+
+def test_aborted_commits_are_retried():
+    client = FakeClient([Aborted("contention"), Aborted("contention")])
+    seeder = BatchSeeder(client, workers=1, retries=3)
+    seeder.submit(plan_documents(plan_with_days("retry", 699)))
+    seeder.wait()
+    assert client.attempts == [500, 500, 500, 200]
+    assert (seeder.documents, seeder.batches, seeder.retried) == (700, 2, 2)
+    assert client.documents["bible_reading_plans/retry/days/699"]["planId"] == "retry"
+
+
+def test_errors_after_the_last_retry_or_not_retryable_are_raised():
+    seeder = BatchSeeder(FakeClient([Aborted("contention")] * 3), workers=1, retries=2)
+    seeder.submit(plan_documents(plan_with_days("exhausted", 9)))
+    with pytest.raises(Aborted):
+        seeder.wait()
+    assert (seeder.documents, seeder.retried) == (0, 2)
+
+    client = FakeClient([PermissionDenied("rules")])
+    seeder = BatchSeeder(client, workers=1)
+    seeder.submit(plan_documents(plan_with_days("denied", 9)))
+    with pytest.raises(PermissionDenied):
+        seeder.wait()
+    assert client.attempts == [10]
+
+
+@pytest.mark.skipif(not os.environ.get("FIRESTORE_EMULATOR_HOST"), reason="FIRESTORE_EMULATOR_HOST is not set")
+def test_seeding_the_emulator():
+    firestore = pytest.importorskip("google.cloud.firestore")
+    client = firestore.Client(project="demo-churchlink")
+    plan_id = f"test-{uuid.uuid4().hex[:8]}"
+    seeder = BatchSeeder(client, workers=4)
+    seeder.submit(plan_documents(plan_with_days(plan_id, 750)))
+    seeder.wait()
+    plan = client.collection(seed_firestore.PLANS_COLLECTION).document(plan_id)
+    try:
+        assert (seeder.documents, seeder.batches) == (751, 2)
+        assert plan.get().to_dict()["dayCount"] == 750
+        assert len(list(plan.collection(seed_firestore.PLAN_DAYS_COLLECTION).stream())) == 750
+    finally:
+        for day in plan.collection(seed_firestore.PLAN_DAYS_COLLECTION).stream():
+            day.reference.delete()
+        plan.delete()
@@ -0,0 +1,45 @@
+from multiprocessing import get_context
+
+import pytest
+
+import shared_corpus
+from build_chapter_store import ChapterStore, write_chapter_store
+
+BIBLE = {
+    "books": {
+        "Genesis": {"chapters": {"1": ["In the beginning God created the heaven and the earth.",
+                                       "And the earth was without form, and void."]}},
+        "Exodus": {"chapters": {"1": ["Now these are the names of the children of Israel."]}},
+    },
+}
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    path = str(tmp_path / "chapters_kjv.bin")
+    write_chapter_store(BIBLE, "KJV", path)
+    monkeypatch.setitem(shared_corpus.CORPUS_KINDS, "chapters", (lambda translation: path, ChapterStore, None))
+    corpus = shared_corpus.publish_corpus(["KJV"], ["chapters"])
+    yield corpus
+    corpus.close()
+
+
+def test_spawned_workers_attach_and_read_every_chapter(corpus):
+    with get_context("spawn").Pool(2) as pool:
+        results = pool.map(shared_corpus._check_worker, [corpus.manifest] * 2)
+    assert [verses for _, _, verses, _ in results] == [3, 3]
+
+    # Workers exiting must not unlink the publisher's segments
+    attached = shared_corpus.attach_corpus(corpus.manifest)
+    try:
+        store = attached.readers["chapters"]["KJV"]
+        assert store.verses(0, 2) == [(2, "And the earth was without form, and void.")]
+    finally:
+        attached.close()
+
+
+def test_segments_are_gone_after_the_publisher_closes(corpus):
+    manifest = corpus.manifest
+    corpus.close()
+    with pytest.raises(FileNotFoundError):
+        shared_corpus.attach_corpus(manifest)
@@ -0,0 +1,45 @@
+import source_ir
+
+SOURCE_HASH = "ab" * 32
+RESULT = {"Genesis": {1: {1: "In the beginning God created the heaven and the earth."}}}
+
+
+def test_round_trip_and_key_mismatch(tmp_path):
+    path = str(tmp_path / "kjv.v1.ir")
+    source_ir.write_ir(path, "kjv", 1, SOURCE_HASH, RESULT)
+    assert source_ir.read_ir(path, "kjv", 1, SOURCE_HASH) == RESULT
+    assert source_ir.read_ir(path, "kjv", 2, SOURCE_HASH) is None
+    assert source_ir.read_ir(path, "kjv", 1, "cd" * 32) is None
+    assert source_ir.read_ir(str(tmp_path / "missing.ir"), "kjv", 1, SOURCE_HASH) is None
+
+
+def test_corrupted_or_truncated_payload_is_rejected(tmp_path):
+    path = tmp_path / "kjv.v1.ir"
+    source_ir.write_ir(str(path), "kjv", 1, SOURCE_HASH, RESULT)
+    data = path.read_bytes()
+
+    flipped = bytearray(data)
+    flipped[-3] ^= 0x01
+    path.write_bytes(bytes(flipped))
+    assert source_ir.read_ir(str(path), "kjv", 1, SOURCE_HASH) is None
+
+    path.write_bytes(data[:-1])
+    assert source_ir.read_ir(str(path), "kjv", 1, SOURCE_HASH) is None
+
+
+def test_cached_parse_reparses_after_corruption(tmp_path, monkeypatch):
+    monkeypatch.setattr(source_ir, "ir_path", lambda name, version, source_hash: str(tmp_path / f"{name}.ir"))
+    calls = []
+
+    def parse(text):
+        calls.append(text)
+        return {"words": text.split()}
+
+    assert source_ir.cached_parse_text("in the beginning", "words", 1, parse) == {"words": ["in", "the", "beginning"]}
+    assert source_ir.cached_parse_text("in the beginning", "words", 1, parse) == {"words": ["in", "the", "beginning"]}
+    assert len(calls) == 1
+
+    path = tmp_path / "words.ir"
+    path.write_bytes(path.read_bytes()[:-2] + b"xx")
+    assert source_ir.cached_parse_text("in the beginning", "words", 1, parse) == {"words": ["in", "the", "beginning"]}
+    assert len(calls) == 2
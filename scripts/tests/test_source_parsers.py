@@ -0,0 +1,55 @@
+import io
+import os
+
+from conftest import FIXTURES_DIR
+
+import source_parsers
+
+
+def usfm_records(text):
+    return list(source_parsers.iter_usfm_records(io.StringIO(text)))
+
+
+def osis_records(text):
+    return list(source_parsers.iter_osis_records(io.BytesIO(text.encode('utf-8'))))
+
+
+def test_usfm_fixture_keeps_spaces_between_words():
+    with open(os.path.join(FIXTURES_DIR, "web_genesis.usfm"), 'r', encoding='utf-8') as f:
+        records = list(source_parsers.iter_usfm_records(f))
+    assert records == [
+        ("Genesis", 1, 1, "In the beginning, God created the heavens and the earth."),
+        ("Genesis", 1, 2, "The earth was formless and empty. Darkness was on the surface of the deep "
+                          "and God’s Spirit was hovering over the surface of the waters."),
+        ("Genesis", 1, 3, "God said, “Let there be light,” and there was light."),
+        ("Genesis", 1, 4, "And God saw the light, and saw that it was good."),
+    ]
+
+
+def test_usfm_closing_marker_keeps_following_text():
+    records = usfm_records('\\id GEN\n\\c 1\n\\p\n\\v 1 \\w God|strong="H0430"\\w*\\f + \\ft note\\f* created, \\nd Lord\\nd*.\n')
+    assert records == [("Genesis", 1, 1, "God created, Lord.")]
+
+
+def test_usfm_nested_character_markers():
+    records = usfm_records('\\id JHN\n\\c 3\n\\p\n\\v 16 \\wj For \\+w God|strong="G2316"\\+w* so loved\\wj* the world.\n')
+    assert records == [("John", 3, 16, "For God so loved the world.")]
+
+
+def test_osis_fixture_separates_blocks_and_lines():
+    with open(os.path.join(FIXTURES_DIR, "kjv_genesis.osis.xml"), 'rb') as f:
+        records = list(source_parsers.iter_osis_records(f))
+    assert records == [
+        ("Genesis", 1, 1, "In the beginning God created the heaven and the earth."),
+        ("Genesis", 1, 2, "And the earth was without form, and void; and darkness was upon the face of the deep."),
+        ("Genesis", 1, 3, "And God said, Let there be light: and there was light."),
+        ("Genesis", 1, 4, "And God saw the light, that it was good."),
+    ]
+
+
+def test_osis_milestone_verse_across_paragraphs():
+    records = osis_records(
+        '<osis><div type="book" osisID="Gen"><p><verse sID="Gen.1.5" osisID="Gen.1.5"/>light.</p>'
+        '<p>More light.<verse eID="Gen.1.5"/></p></div></osis>'
+    )
+    assert records == [("Genesis", 1, 5, "light. More light.")]
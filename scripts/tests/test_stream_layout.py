@@ -0,0 +1,25 @@
+import io
+import json
+
+import pytest
+
+from stream_layout import JsonStream
+
+DOCUMENTS = [
+    '{"books":{},"v":12.5}',
+    '{"books":{},"v":-3e2,"w":[1.5E+10,0,-0.25e-3],"x":"a\\"b\\\\","y":[true,false,null]}',
+]
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_values_split_across_every_block_boundary(text):
+    for block_size in range(1, len(text) + 1):
+        stream = JsonStream(io.StringIO(text), block_size=block_size)
+        assert stream.read_value() == json.loads(text), block_size
+        assert stream.next_token() == (None, None)
+
+
+def test_truncated_input_is_rejected():
+    stream = JsonStream(io.StringIO('{"v":12.'), block_size=3)
+    with pytest.raises(ValueError):
+        stream.read_value()
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from build_chapter_store import ChapterStore, write_chapter_store
+from verse_api import VerseAPI
+
+BIBLE = {
+    "books": {
+        "Hosea": {"chapters": {"1": ["Hosea one.", "Hosea two.", "Hosea three."]}},
+        "Joel": {"chapters": {"1": ["Joel one."]}},
+    },
+}
+
+
+@pytest.fixture
+def api(tmp_path):
+    path = str(tmp_path / "chapters.bin")
+    write_chapter_store(BIBLE, "KJV", path)
+    store = ChapterStore(path)
+    yield VerseAPI({"KJV": store})
+    store.close()
+
+
+def get(api, target, headers=None):
+    status, response_headers, body = api.respond("GET", target, headers or {})
+    return status, response_headers, json.loads(body) if body else None
+
+
+@pytest.mark.parametrize("target", ["/v1/KJV/Hosea/1025", "/v1/KJV/Hosea/1025/1", "/v1/KJV/Hosea/0", "/v1/KJV/Hosea/2"])
+def test_missing_chapters_are_not_found(api, target):
+    assert get(api, target)[0] == 404
+
+
+def test_verse_range(api):
+    status, _, data = get(api, "/v1/kjv/hosea/1/2-9")
+    assert status == 200
+    assert (data["book"], data["chapter"]) == ("Hosea", 1)
+    assert data["verses"] == [{"verse": 2, "text": "Hosea two."}, {"verse": 3, "text": "Hosea three."}]
+    assert get(api, "/v1/KJV/Hosea/1/4")[0] == 404
+    assert get(api, "/v1/KJV/Hosea/1/x")[0] == 400
+
+
+def test_etag_answers_if_none_match_with_304(api):
+    status, headers, _ = get(api, "/v1/KJV/Joel/1")
+    etag = headers["ETag"]
+    assert status == 200
+    status, headers, body = get(api, "/v1/KJV/Joel/1", {"if-none-match": f'W/{etag}'})
+    assert (status, headers["ETag"], body) == (304, etag, None)
+    assert get(api, "/v1/KJV/Joel/1", {"if-none-match": '"other"'})[0] == 200
+    assert get(api, "/v1/KJV/Joel/1/1")[1]["ETag"] != etag
+
+
+def test_passages_resolve_a_posted_batch(api):
+    body = json.dumps({"references": ["Joel 1:1", "Hosea 1:2-3", "Hosea 1025:1"]}).encode('utf-8')
+    status, _, response = api.respond("POST", "/v1/KJV/passages", {}, body)
+    passages = json.loads(response)["passages"]
+    assert status == 200
+    assert [p.get("passage") for p in passages] == ["Joel 1:1", "Hosea 1:2-3", None]
+
+
+def test_passages_reject_lone_surrogates(api):
+    status, _, response = api.respond("POST", "/v1/KJV/passages", {}, b'{"references": ["\\ud800"]}')
+    assert status == 400
+    assert "error" in json.loads(response)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script to verify Bible data files for missing books, chapters and placeholder verses
+"""
+
+import data_paths
+import pipeline_profile
+from complete_bible_fix import BIBLE_STRUCTURE, load_json_file
+from fix_bible_verses import is_placeholder_verse
+
+def validate_bible_data(bible_data):
+    """Return a list of problems found in Bible data"""
+    problems = []
+
+    books = bible_data.get("books")
+    if not isinstance(books, dict):
+        return ["Expected {\"books\": {name: {...}}} layout"]
+
+    for book_name, book_info in BIBLE_STRUCTURE.items():
+        if book_name not in books:
+            problems.append(f"Missing book: {book_name}")
+            continue
+
+        chapters = books[book_name].get("chapters", {})
+        if len(chapters) != book_info["chapters"]:
+            problems.append(f"{book_name}: {len(chapters)}/{book_info['chapters']} chapters")
+
+        placeholders = 0
+        for chapter_key, verses in chapters.items():
+            if not verses:
+                problems.append(f"{book_name} {chapter_key}: no verses")
+            placeholders += sum(1 for verse in verses if is_placeholder_verse(verse))
+        if placeholders:
+            problems.append(f"{book_name}: {placeholders} placeholder verses")
+
+    for book_name in books:
+        if book_name not in BIBLE_STRUCTURE:
+            problems.append(f"Unknown book: {book_name}")
+
+    return problems
+
+def main():
+    failed = False
+
+    for translation in data_paths.TRANSLATIONS:
+        file_path = data_paths.translation_path(translation)
+        with pipeline_profile.stage(f"validate {translation}"):
+            bible_data = load_json_file(file_path)
+            problems = ["File could not be loaded"] if bible_data is None else validate_bible_data(bible_data)
+
+        if problems:
+            failed = True
+            print(f"✗ {translation}: {len(problems)} problems")
+            for problem in problems:
+                print(f"  {problem}")
+        else:
+            print(f"✓ {translation} Bible data is complete")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "verify_bible_data")
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Lightweight asyncio HTTP API serving chapters and verse ranges
+
+Routes (GET and HEAD):
+    /v1/translations
+    /v1/{translation}/{book}/{chapter}            e.g. /v1/KJV/John/3
+    /v1/{translation}/{book}/{chapter}/{verses}   e.g. /v1/KJV/1-john/4/7-8
+    /v1/{translation}/passages?ref=John+3:16&ref=Genesis+1-3
+    /healthz
+
+POST /v1/{translation}/passages with {"references": [...]} resolves a larger
+batch in one pass (passage_batch.py) and returns the passages in request
+order.
+
+Text comes from the memory-mapped chapter stores written by
+build_chapter_store.py, so the process only pages in the chapters it serves.
+Responses carry strong ETags derived from each chapter's content digest and
+answer If-None-Match with 304. Rendered (and gzip-compressed) bodies of hot
+chapters are kept in an in-process LRU cache. The server speaks HTTP/1.1 with
+keep-alive and only needs the standard library.
+
+With --workers N the chapter stores are published once in shared memory
+(shared_corpus.py) and N worker processes attach to them and accept on the
+same port (SO_REUSEPORT), so extra workers cost no Bible data memory.
+
+Usage:
+    python build_chapter_store.py --translation KJV
+    python verse_api.py --port 8080
+    python verse_api.py --port 8080 --workers 4
+    python verse_api_loadtest.py --url http://127.0.0.1:8080 --duration 10
+
+    # In a container (no dependencies beyond Python)
+    docker run --rm -p 8080:8080 -v "$PWD":/app -w /app/scripts python:3.11-slim \\
+        python verse_api.py --host 0.0.0.0 --build
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+from collections import OrderedDict
+from email.utils import formatdate
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from build_chapter_store import ChapterStore, chapter_store_path, write_chapter_store
+from passage_batch import MAX_BATCH_REFERENCES, resolve_passages
+
+DEFAULT_PORT = 8080
+DEFAULT_CACHE_SIZE = 512
+GZIP_MIN_BYTES = 1024
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 64 * 1024
+CACHE_CONTROL = "public, max-age=3600"
+VERSES_RE = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+STATUS_TEXT = {
+    200: "OK",
+    204: "No Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+def _normalize_book(name):
+    return re.sub(r"[\s_\-]+", "", name.lower())
+
+
+# "1 John", "1-john", "1john" and aliases such as "psalm" all resolve
+BOOK_SLUGS = {_normalize_book(name): bible_canon.book_index(name)
+              for name in list(bible_canon.BOOKS) + list(bible_canon.BOOK_ALIASES)}
+
+
+def book_from_slug(slug):
+    """Return the canonical index of a book named in a URL, or None"""
+    return BOOK_SLUGS.get(_normalize_book(unquote(slug)))
+
+
+def etag_matches(header, etag):
+    """Return True if an If-None-Match header matches an ETag (weak comparison)"""
+    if header.strip() == "*":
+        return True
+    base = etag.replace('-gz"', '"')
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.replace('-gz"', '"') == base:
+            return True
+    return False
+
+
+class VerseAPI:
+    """Request routing, rendering and the hot-chapter cache"""
+
+    def __init__(self, stores, cache_size=DEFAULT_CACHE_SIZE):
+        self.stores = stores
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    def render(self, translation, index, start=None, end=None):
+        """Return [etag, body, gzip body or None] for a chapter or verse range, through the LRU cache"""
+        key = (translation, index, start, end)
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+
+        store = self.stores[translation]
+        book_idx, chapter = store.chapter(index)
+        verses = store.verses(index, start or 1, end)
+        etag = store.etag(index)
+        if start is not None:
+            etag = f'{etag[:-1]}-{start}-{end}"'
+        body = json.dumps({
+            "translation": translation,
+            "book": bible_canon.BOOKS[book_idx],
+            "chapter": chapter,
+            "verses": [{"verse": number, "text": text} for number, text in verses],
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        entry = [etag, body, None]
+        self.cache[key] = entry
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return entry
+
+    def json_response(self, status, data):
+        return status, {"Content-Type": "application/json; charset=utf-8"}, json.dumps(data).encode('utf-8')
+
+    def passages(self, method, translation, query, body, headers):
+        """Resolve a batch of references from ?ref= parameters or a {"references": [...]} body"""
+        store = self.stores.get(translation)
+        if store is None:
+            return self.json_response(404, {"error": f"Unknown translation {translation}"})
+        if method == "POST":
+            try:
+                references = json.loads(body).get("references")
+            except (ValueError, AttributeError):
+                references = None
+        else:
+            references = parse_qs(query).get("ref")
+        if not references or not isinstance(references, list) or not all(isinstance(r, str) for r in references):
+            return self.json_response(400, {"error": 'Pass references as ?ref=... or a {"references": [...]} body'})
+        if len(references) > MAX_BATCH_REFERENCES:
+            return self.json_response(400, {"error": f"At most {MAX_BATCH_REFERENCES} references per request"})
+        try:
+            # JSON escapes can produce lone surrogates, which cannot be echoed back as UTF-8
+            for reference in references:
+                reference.encode('utf-8')
+        except UnicodeEncodeError:
+            return self.json_response(400, {"error": "References must be valid Unicode text"})
+
+        results, _ = resolve_passages(store, references)
+        body = json.dumps({"translation": translation, "passages": results},
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        response_headers = {"Content-Type": "application/json; charset=utf-8", "Vary": "Accept-Encoding"}
+        if method != "POST":
+            response_headers["Cache-Control"] = CACHE_CONTROL
+        if len(body) >= GZIP_MIN_BYTES and "gzip" in headers.get("accept-encoding", ""):
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            response_headers["Content-Encoding"] = "gzip"
+        return 200, response_headers, body
+
+    def respond(self, method, target, headers, body=b""):
+        """Return (status, headers, body) for one request"""
+        self.requests += 1
+        if method == "OPTIONS":
+            return 204, {
+                "Access-Control-Allow-Methods": "GET, HEAD, POST",
+                "Access-Control-Allow-Headers": "Content-Type",
+                "Access-Control-Max-Age": "86400",
+            }, b""
+        if method not in ("GET", "HEAD", "POST"):
+            status, response_headers, body = self.json_response(405, {"error": "Only GET, HEAD and POST are supported"})
+            response_headers["Allow"] = "GET, HEAD, POST"
+            return status, response_headers, body
+
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        if len(parts) == 3 and parts[0] == "v1" and parts[2] == "passages":
+            return self.passages(method, parts[1].upper(), url.query, body, headers)
+        if method == "POST":
+            status, response_headers, body = self.json_response(405, {"error": "Only passages accept POST"})
+            response_headers["Allow"] = "GET, HEAD"
+            return status, response_headers, body
+
+        if parts == ["healthz"]:
+            return self.json_response(200, {
+                "status": "ok",
+                "translations": sorted(self.stores),
+                "requests": self.requests,
+                "cache": {"entries": len(self.cache), "hits": self.hits, "misses": self.misses},
+            })
+        if parts == ["v1", "translations"]:
+            return self.json_response(200, {
+                t: {"version": store.meta["source_version"], "chapters": len(store), "verses": store.meta["verses"]}
+                for t, store in sorted(self.stores.items())
+            })
+        if len(parts) not in (4, 5) or parts[0] != "v1":
+            return self.json_response(404, {"error": "Not found"})
+
+        translation = parts[1].upper()
+        store = self.stores.get(translation)
+        book_idx = book_from_slug(parts[2])
+        if store is None:
+            return self.json_response(404, {"error": f"Unknown translation {parts[1]}"})
+        if book_idx is None:
+            return self.json_response(404, {"error": f"Unknown book {unquote(parts[2])}"})
+        if not parts[3].isdigit():
+            return self.json_response(400, {"error": "Chapter must be a number"})
+        index = store.chapter_index(book_idx, int(parts[3]))
+        if index < 0:
+            return self.json_response(404, {"error": f"{bible_canon.BOOKS[book_idx]} {parts[3]} is not in {translation}"})
+
+        start = end = None
+        if len(parts) == 5:
+            match = VERSES_RE.match(parts[4])
+            if not match:
+                return self.json_response(400, {"error": "Verses must look like 16 or 16-18"})
+            start = int(match.group(1))
+            end = int(match.group(2) or start)
+            if start < 1 or end < start or start > store.verse_count(index):
+                return self.json_response(404, {"error": f"Verses {parts[4]} are not in this chapter"})
+            end = min(end, store.verse_count(index))
+
+        entry = self.render(translation, index, start, end)
+        etag, body = entry[0], entry[1]
+        response_headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if len(body) >= GZIP_MIN_BYTES and "gzip" in headers.get("accept-encoding", ""):
+            if entry[2] is None:
+                entry[2] = gzip.compress(body, compresslevel=6, mtime=0)
+            body = entry[2]
+            etag = f'{etag[:-1]}-gz"'
+            response_headers["Content-Encoding"] = "gzip"
+        response_headers["ETag"] = etag
+
+        if "if-none-match" in headers and etag_matches(headers["if-none-match"], etag):
+            response_headers.pop("Content-Type")
+            response_headers.pop("Content-Encoding", None)
+            return 304, response_headers, b""
+        return 200, response_headers, body
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until it closes"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.write_response(writer, *self.json_response(400, {"error": "Bad request line"}), keep_alive=False)
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                body = b""
+                if "transfer-encoding" in headers:
+                    await self.write_response(writer, *self.json_response(400, {"error": "Send a Content-Length body"}), keep_alive=False)
+                    break
+                if headers.get("content-length", "0") != "0":
+                    length = int(headers["content-length"]) if headers["content-length"].isdigit() else -1
+                    if not 0 <= length <= MAX_BODY_BYTES:
+                        await self.write_response(writer, *self.json_response(413, {"error": "Request body too large"}), keep_alive=False)
+                        break
+                    body = await reader.readexactly(length)
+
+                status, response_headers, body = self.respond(method, target, headers, body)
+                await self.write_response(writer, status, response_headers, body, keep_alive, head=method == "HEAD")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def write_response(self, writer, status, headers, body, keep_alive, head=False):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+                 f"Date: {formatdate(usegmt=True)}",
+                 "Access-Control-Allow-Origin: *",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if body and not head:
+            writer.write(body)
+        await writer.drain()
+
+
+def open_stores(translations, build=False):
+    """Open the chapter store of each translation, building missing ones if asked"""
+    from bible_delta import load_json_file
+
+    stores = {}
+    for translation in translations:
+        path = chapter_store_path(translation)
+        if not os.path.exists(path):
+            if not build:
+                continue
+            bible_data = load_json_file(data_paths.translation_path(translation))
+            if bible_data is None:
+                continue
+            write_chapter_store(bible_data, translation, path)
+        stores[translation] = ChapterStore(path)
+    return stores
+
+
+async def serve(api, host, port, reuse_port=False):
+    server = await asyncio.start_server(api.handle_connection, host, port, backlog=1024,
+                                        reuse_port=reuse_port or None)
+    addresses = ", ".join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets)
+    print(f"Serving {', '.join(sorted(api.stores))} on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+
+def run_worker(manifest, cache_size, host, port):
+    """Serve the chapter stores of a shared corpus from one worker process"""
+    from shared_corpus import attach_corpus
+    corpus = attach_corpus(manifest)
+    try:
+        asyncio.run(serve(VerseAPI(corpus.readers["chapters"], cache_size), host, port, reuse_port=True))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        corpus.close()
+
+
+def serve_workers(translations, workers, cache_size, host, port, build=False):
+    """Publish the chapter stores in shared memory and serve them from worker processes"""
+    import multiprocessing
+    from shared_corpus import publish_corpus
+
+    corpus = publish_corpus(translations, ["chapters"], build)
+    if not corpus.manifest:
+        corpus.close()
+        print("Error: no chapter stores found; run build_chapter_store.py or pass --build")
+        return 1
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(corpus.manifest, cache_size, host, port))
+                 for _ in range(workers)]
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        corpus.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve chapters and verse ranges over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", DEFAULT_PORT)))
+    parser.add_argument("--translation", action="append", choices=data_paths.TRANSLATIONS,
+                        help="translation to serve (repeatable, default: every built store)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="rendered responses kept in memory")
+    parser.add_argument("--build", action="store_true", help="build missing chapter stores from the assets first")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes sharing the chapter stores through shared memory")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        return serve_workers(args.translation or data_paths.TRANSLATIONS, args.workers, args.cache_size,
+                             args.host, args.port, args.build)
+
+    stores = open_stores(args.translation or data_paths.TRANSLATIONS, args.build)
+    if not stores:
+        print("Error: no chapter stores found; run build_chapter_store.py or pass --build")
+        return 1
+
+    try:
+        asyncio.run(serve(VerseAPI(stores, args.cache_size), args.host, args.port))
+    except KeyboardInterrupt:
+        print("Stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "verse_api")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Script to load-test the verse API
+
+Opens --connections keep-alive connections and has each one request random
+chapters and verse ranges back to back for --duration seconds (or until
+--requests responses have arrived). The paths come from the chapter stores on
+disk, so every request names a chapter that exists. --hot limits the paths to
+a small set of chapters to exercise the server's cache, and --revalidate
+repeats each path with If-None-Match so the 304 path is measured too.
+
+Prints requests/sec, latency percentiles (p50, p90, p99, max) and status counts.
+
+Usage:
+    python verse_api_loadtest.py --url http://127.0.0.1:8080 --duration 10
+    python verse_api_loadtest.py --connections 64 --hot 50 --revalidate
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import bible_canon
+import data_paths
+import pipeline_profile
+from verse_api import DEFAULT_PORT, open_stores
+
+
+def build_paths(stores, hot=None, seed=1):
+    """Return request paths over every stored chapter, half of them verse ranges"""
+    rng = random.Random(seed)
+    paths = []
+    for translation, store in sorted(stores.items()):
+        for index in range(len(store)):
+            book_idx, chapter = store.chapter(index)
+            book = bible_canon.BOOKS[book_idx].replace(" ", "-")
+            path = f"/v1/{translation}/{book}/{chapter}"
+            count = store.verse_count(index)
+            if rng.random() < 0.5 and count > 1:
+                start = rng.randint(1, count)
+                end = min(count, start + rng.randint(0, 5))
+                path += f"/{start}" if start == end else f"/{start}-{end}"
+            paths.append(path)
+    rng.shuffle(paths)
+    return paths[:hot] if hot else paths
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; return (status, headers)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers
+
+
+async def worker(host, port, paths, deadline, budget, results, seed, revalidate, gzip):
+    """Issue requests on one keep-alive connection until the deadline or budget is reached"""
+    rng = random.Random(seed)
+    etags = {}
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline and budget[0] > 0:
+            budget[0] -= 1
+            path = rng.choice(paths)
+            lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+            if gzip:
+                lines.append("Accept-Encoding: gzip")
+            if revalidate and path in etags:
+                lines.append(f"If-None-Match: {etags[path]}")
+            started = time.perf_counter()
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+            status, headers = await read_response(reader)
+            results["latencies"].append(time.perf_counter() - started)
+            results["statuses"][status] += 1
+            if "etag" in headers:
+                etags[path] = headers["etag"]
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        results["errors"][type(e).__name__] += 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of sorted values"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run_load(host, port, paths, connections, duration, requests, revalidate, gzip):
+    results = {"latencies": [], "statuses": Counter(), "errors": Counter()}
+    budget = [requests or float("inf")]
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(host, port, paths, deadline, budget, results, seed, revalidate, gzip)
+                           for seed in range(connections)))
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the verse API")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--translation", action="append", choices=data_paths.TRANSLATIONS,
+                        help="translation to request (repeatable, default: every built store)")
+    parser.add_argument("--hot", type=int, help="only request this many distinct paths")
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match for paths seen before")
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip")
+    args = parser.parse_args()
+
+    stores = open_stores(args.translation or data_paths.TRANSLATIONS)
+    if not stores:
+        print("Error: no chapter stores found; run build_chapter_store.py first")
+        return 1
+    paths = build_paths(stores, args.hot)
+
+    url = urlsplit(args.url)
+    print(f"{args.connections} connections, {len(paths)} distinct paths, "
+          f"{f'{args.requests} requests' if args.requests else f'{args.duration:g} s'} against {args.url}")
+    results, elapsed = asyncio.run(run_load(url.hostname, url.port or 80, paths, args.connections,
+                                            args.duration, args.requests, args.revalidate, args.gzip))
+
+    latencies = sorted(results["latencies"])
+    if not latencies:
+        print(f"Error: no responses ({dict(results['errors']) or 'server unreachable'})")
+        return 1
+    print(f"{len(latencies)} requests in {elapsed:.2f} s: {len(latencies) / elapsed:,.0f} req/s")
+    print("Latency: " + ", ".join(f"{name} {percentile(latencies, fraction) * 1000:.2f} ms"
+                                  for name, fraction in [("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)]))
+    print("Status: " + ", ".join(f"{status} x{count}" for status, count in sorted(results["statuses"].items())))
+    if results["errors"]:
+        print("Errors: " + ", ".join(f"{name} x{count}" for name, count in results["errors"].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    pipeline_profile.run(main, "verse_api_loadtest")
@@ -0,0 +1,66 @@
+-- Bible text and reading plans loaded by scripts/export_supabase.py
+
+CREATE TABLE IF NOT EXISTS bible_translations (
+    code TEXT PRIMARY KEY, -- 'KJV', 'NIV', 'ESV'
+    version TEXT NOT NULL, -- Content digest of the asset build that was loaded
+    verse_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS bible_verses (
+    translation TEXT NOT NULL REFERENCES bible_translations(code) ON DELETE CASCADE,
+    book_index SMALLINT NOT NULL, -- Canonical position, 0 = Genesis
+    book TEXT NOT NULL,
+    chapter SMALLINT NOT NULL,
+    verse SMALLINT NOT NULL,
+    ordinal INTEGER NOT NULL, -- Position in the translation's canonical verse stream
+    text TEXT NOT NULL,
+    PRIMARY KEY (translation, book_index, chapter, verse)
+);
+
+CREATE TABLE IF NOT EXISTS bible_reading_plans (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    duration INTEGER NOT NULL,
+    category TEXT,
+    difficulty TEXT,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS bible_reading_plan_days (
+    plan_id TEXT NOT NULL REFERENCES bible_reading_plans(id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,
+    readings TEXT[] NOT NULL DEFAULT '{}',
+    description TEXT,
+    PRIMARY KEY (plan_id, day)
+);
+
+-- Create indexes for better performance
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bible_verses_ordinal ON bible_verses (translation, ordinal);
+CREATE INDEX IF NOT EXISTS idx_bible_verses_book_name ON bible_verses (translation, book, chapter);
+CREATE INDEX IF NOT EXISTS idx_bible_verses_text_search ON bible_verses USING GIN (to_tsvector('english', text));
+
+-- Enable Row Level Security (RLS)
+ALTER TABLE bible_translations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE bible_verses ENABLE ROW LEVEL SECURITY;
+ALTER TABLE bible_reading_plans ENABLE ROW LEVEL SECURITY;
+ALTER TABLE bible_reading_plan_days ENABLE ROW LEVEL SECURITY;
+
+-- Bible text and plans are public and read-only; the loader uses the service role
+DROP POLICY IF EXISTS "Anyone can read bible translations" ON bible_translations;
+DROP POLICY IF EXISTS "Anyone can read bible verses" ON bible_verses;
+DROP POLICY IF EXISTS "Anyone can read reading plans" ON bible_reading_plans;
+DROP POLICY IF EXISTS "Anyone can read reading plan days" ON bible_reading_plan_days;
+
+CREATE POLICY "Anyone can read bible translations" ON bible_translations
+    FOR SELECT USING (true);
+
+CREATE POLICY "Anyone can read bible verses" ON bible_verses
+    FOR SELECT USING (true);
+
+CREATE POLICY "Anyone can read reading plans" ON bible_reading_plans
+    FOR SELECT USING (true);
+
+CREATE POLICY "Anyone can read reading plan days" ON bible_reading_plan_days
+    FOR SELECT USING (true);